@@ -0,0 +1,26 @@
+# Gunicorn picks this file up from the working directory
+
+import os
+
+from t2india_id_generator import MAX_WORKERS, WORKER_ID_ENV
+
+
+def on_starting(server):
+    """Refuse to start more workers than the itinerary ID has worker slots for"""
+    if server.cfg.workers > MAX_WORKERS:
+        raise RuntimeError(f"At most {MAX_WORKERS} workers can generate itinerary IDs, {server.cfg.workers} configured")
+
+
+def pre_fork(server, worker):
+    """Give each new worker the lowest itinerary-ID worker slot not held by a live worker"""
+    taken = {getattr(live, "t2india_worker_id", None) for live in server.WORKERS.values()}
+    free = [slot for slot in range(MAX_WORKERS) if slot not in taken]
+    if not free:
+        # Sharing a slot would let two workers issue the same IDs
+        raise RuntimeError(f"All {MAX_WORKERS} itinerary ID worker slots are held by live workers")
+    worker.t2india_worker_id = free[0]
+
+
+def post_fork(server, worker):
+    """Expose the slot to the worker before the app (and its ID generator) is imported"""
+    os.environ[WORKER_ID_ENV] = str(worker.t2india_worker_id)
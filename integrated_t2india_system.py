@@ -3,13 +3,36 @@ T2India Integrated System with Intermediate Connectivity
 Complete implementation with A→C→B routing logic
 """
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from t2india_comprehensive_system import T2IndiaComprehensiveSystem
 from intermediate_connectivity_system import IntermediateConnectivitySystem
+from t2india_connectivity_graph import format_duration
+from t2india_data_registry import get_data_registry
+from t2india_day_scheduler import DayScheduler
+from t2india_routing_engine import TIME_WEIGHT
+
+SEGMENT_WORKERS = 8
 
 class T2IndiaIntegratedSystem:
-    def __init__(self):
-        self.comprehensive_system = T2IndiaComprehensiveSystem()
-        self.connectivity_system = IntermediateConnectivitySystem()
+    def __init__(self, registry=None, segment_lookups=None, segment_workers=SEGMENT_WORKERS):
+        registry = registry or get_data_registry()
+        self.comprehensive_system = T2IndiaComprehensiveSystem(registry)
+        self.connectivity_system = IntermediateConnectivitySystem(registry)
+        self.scheduler = DayScheduler(
+            max_travel_minutes=self.comprehensive_system.max_travel_hours * 60,
+            sightseeing_minutes=self.comprehensive_system.max_sightseeing_hours * 60
+        )
+        
+        # Optional slow per-segment services, e.g. live flight or hotel lookups: name -> fn(origin, destination)
+        self.segment_lookups = dict(segment_lookups or {})
+        self.segment_workers = segment_workers
+        self.segment_pool = None
+        self.segment_pool_lock = threading.Lock()
+        
+        # Routing options and timings per (origin, destination) are cached in the registry; see segment_cache
+        self.registry = registry
     
     def process_query_with_connectivity(self, user_input):
         """Process query with full connectivity analysis"""
@@ -19,21 +42,94 @@ class T2IndiaIntegratedSystem:
         
         # Add intermediate connectivity analysis
         route = comprehensive_result['recommendation']['optimized_route']
-        connectivity_analysis = {}
+        segments = list(zip(route, route[1:]))
+        analyses = self.analyze_segments(segments, self.comprehensive_system.data)
         
-        for i in range(len(route) - 1):
-            origin = route[i]
-            destination = route[i + 1]
-            
-            # Get all routing options including intermediate hubs
-            routing_options = self.connectivity_system.get_all_possible_routes(origin, destination)
-            connectivity_analysis[f"{origin}→{destination}"] = routing_options
+        # Integrate connectivity into comprehensive result; formatting reuses the timings
+        comprehensive_result['intermediate_connectivity'] = {
+            f"{origin}→{destination}": analysis['routing_options'] for (origin, destination), analysis in analyses.items()
+        }
+        comprehensive_result['segment_timings'] = {
+            f"{origin}→{destination}": analysis['time_analysis'] for (origin, destination), analysis in analyses.items()
+        }
+        if self.segment_lookups:
+            comprehensive_result['segment_lookups'] = {
+                f"{origin}→{destination}": analysis['lookups'] for (origin, destination), analysis in analyses.items()
+            }
+        leg_minutes = [analyses[segment]['minutes'] for segment in segments]
         
-        # Integrate connectivity into comprehensive result
-        comprehensive_result['intermediate_connectivity'] = connectivity_analysis
+        # Day-by-day timeline over the requested (or estimated) duration
+        days = comprehensive_result['parsed_input']['duration'] or comprehensive_result['recommendation']['estimated_duration']
+        comprehensive_result['day_schedule'] = self.scheduler.schedule(route, leg_minutes, days)
         
         return comprehensive_result
     
+    def analyze_segments(self, segments, data=None):
+        """Analysis per distinct segment; repeated segments such as round-trip legs are analyzed once"""
+        data = data or self.comprehensive_system.data
+        unique = list(dict.fromkeys(segments))
+        if self.segment_lookups and len(unique) > 1 and self.segment_workers > 1:
+            # Slow lookups wait on I/O, so the segments overlap in threads
+            analyses = self.segment_thread_pool().map(lambda segment: self.analyze_segment(*segment, data), unique)
+        else:
+            analyses = (self.analyze_segment(*segment, data) for segment in unique)
+        return dict(zip(unique, analyses))
+    
+    def segment_thread_pool(self):
+        """Threads for the segment lookups, created on first use; concurrent requests share one pool"""
+        with self.segment_pool_lock:
+            if self.segment_pool is None:
+                self.segment_pool = ThreadPoolExecutor(max_workers=self.segment_workers)
+            return self.segment_pool
+    
+    def close(self):
+        """Shut down the segment lookup threads and the comprehensive system's batch workers"""
+        with self.segment_pool_lock:
+            pool, self.segment_pool = self.segment_pool, None
+        if pool is not None:
+            pool.shutdown()
+        self.comprehensive_system.close()
+    
+    def segment_cache(self, data):
+        """Segment analyses, shared until the hub routes or the connectivity behind segment_minutes change
+
+        Keyed on the reference generation (hub routes), the connectivity
+        generation and the routing engine itself, which an in-process
+        reload_connectivity swaps without a new generation.
+        """
+        generation = (self.registry.reference_store.current().generation, data.generation, data.routing_engine)
+        return self.registry.shared("segment_analysis_cache", generation, dict)
+    
+    def analyze_segment(self, origin, destination, data=None):
+        """Routing options, journey time analysis and minutes for one segment"""
+        data = data or self.comprehensive_system.data
+        segment_cache = self.segment_cache(data)
+        analysis = segment_cache.get((origin, destination))
+        if analysis is None:
+            # Get all routing options including intermediate hubs
+            routing_options = self.connectivity_system.get_all_possible_routes(origin, destination)
+            time_analysis = None
+            if not routing_options[0].get('direct_connection'):
+                time_analysis = self.connectivity_system.calculate_total_journey_time(routing_options[0])
+            analysis = {
+                'routing_options': routing_options,
+                'time_analysis': time_analysis,
+                'minutes': self.segment_minutes(origin, destination, time_analysis, data)
+            }
+            segment_cache[(origin, destination)] = analysis
+        if self.segment_lookups:
+            lookups = {name: lookup(origin, destination) for name, lookup in self.segment_lookups.items()}
+            analysis = dict(analysis, lookups=lookups)
+        return analysis
+    
+    def segment_minutes(self, origin, destination, time_analysis, data=None):
+        """Door-to-door minutes for one route segment, or None when unknown"""
+        if time_analysis is not None:
+            return time_analysis['total_minutes']
+        data = data or self.comprehensive_system.data
+        path = data.routing_engine.shortest_path(origin, destination, TIME_WEIGHT)
+        return path['minutes'] if path else None
+    
     def format_integrated_output(self, result):
         """Format output with connectivity details"""
         
@@ -52,22 +148,55 @@ class T2IndiaIntegratedSystem:
                 if primary_route.get('direct_connection'):
                     output += "  ✓ Direct connection available\n"
                 else:
-                    hub = primary_route['intermediate_hub']
-                    output += f"  → Via {hub} (Intermediate Hub)\n"
+                    hub = primary_route.get('intermediate_hub')
+                    if hub is None:
+                        output += "  → By road (no intermediate hub)\n"
+                    elif 'egress_hub' in primary_route:
+                        output += f"  → Via {hub} and {primary_route['egress_hub']} (Intermediate Hubs)\n"
+                    else:
+                        output += f"  → Via {hub} (Intermediate Hub)\n"
                     
                     if 'leg1' in primary_route:
                         leg1 = primary_route['leg1']
-                        if 'time' in leg1:
-                            output += f"    Leg 1: {leg1['time']} by {leg1['transport']}\n"
+                        if 'minutes' in leg1:
+                            output += f"    Leg 1: {format_duration(leg1['minutes'])} by {leg1['transport']}\n"
                     
-                    # Calculate total time
-                    time_analysis = self.connectivity_system.calculate_total_journey_time(primary_route)
-                    output += f"    Total Journey: {time_analysis['total_time']}\n"
+                    # Total time from the segment analysis
+                    time_analysis = result.get('segment_timings', {}).get(route_segment)
+                    if time_analysis is None:
+                        time_analysis = self.connectivity_system.calculate_total_journey_time(primary_route)
+                    output += f"    Total Journey: {format_duration(time_analysis['total_minutes'])}\n"
                     
                     # Show alternatives if available
                     if len(routing_options) > 1:
                         output += f"    Alternatives: {len(routing_options) - 1} other hub options\n"
         
+        # Add day-by-day schedule section
+        if 'day_schedule' in result:
+            output += self.format_day_schedule(result['day_schedule'])
+        
+        return output
+    
+    def format_day_schedule(self, schedule):
+        """Clock-timed days, with infeasible days flagged"""
+        output = "\n=== DAY-BY-DAY SCHEDULE ===\n"
+        for day in schedule['days']:
+            marker = "" if day['feasible'] else " ⚠ NOT FEASIBLE"
+            output += f"\nDay {day['day']} - {day['city']}{marker}\n"
+            for activity in day['activities']:
+                if activity['type'] == 'travel':
+                    output += (f"  {activity['start']}-{activity['end']} Travel {activity['from']} → {activity['to']} "
+                               f"({format_duration(activity['minutes'])})\n")
+                else:
+                    output += f"  {activity['start']}-{activity['end']} Sightseeing in {activity['city']}\n"
+            for issue in day['issues']:
+                output += f"  ! {issue}\n"
+        
+        if schedule['feasible']:
+            output += f"\n✓ All {schedule['scheduled_days']} days within service limits\n"
+        else:
+            days = ", ".join(str(day) for day in schedule['infeasible_days'])
+            output += f"\n⚠ Infeasible days: {days} ({schedule['scheduled_days']} days scheduled for {schedule['requested_days']} requested)\n"
         return output
 
 def test_integrated_system():
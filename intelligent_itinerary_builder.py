@@ -3,188 +3,65 @@ Intelligent Itinerary Builder for T2India
 Helps clients build complete travel plans from minimal input
 """
 
+from t2india_circuit_index import CircuitIndex
+from t2india_data_registry import get_data_registry
+from t2india_geo import get_geo_index
+from t2india_route_optimizer import nearest_neighbour_two_opt
+
+# Known destination mappings
+DESTINATION_KEYWORDS = {
+    "golden triangle": ["Delhi", "Agra", "Jaipur"],
+    "delhi": ["Delhi"],
+    "agra": ["Agra"],
+    "jaipur": ["Jaipur"],
+    "rajasthan": ["Jaipur", "Jodhpur", "Udaipur"],
+    "kerala": ["Kochi", "Munnar", "Alleppey"],
+    "goa": ["Goa"],
+    "mumbai": ["Mumbai"],
+    "kolkata": ["Kolkata"],
+    "darjeeling": ["Darjeeling"],
+    "sikkim": ["Sikkim"],
+    "puri": ["Puri"],
+    "hampi": ["Hampi"],
+    "bangalore": ["Bangalore"],
+    "jodhpur": ["Jodhpur"],
+    "udaipur": ["Udaipur"],
+    "jaisalmer": ["Jaisalmer"]
+}
+
 class ItinerarySuggestionEngine:
-    def __init__(self):
+    def __init__(self, registry=None):
+        registry = registry or get_data_registry()
+        
         # Popular travel circuits in India
-        self.travel_circuits = {
-            "golden_triangle": {
-                "destinations": ["Delhi", "Agra", "Jaipur"],
-                "optimal_route": ["Delhi", "Agra", "Jaipur", "Delhi"],
-                "recommended_duration": {"min": 5, "max": 7, "optimal": 6},
-                "entry_exit": "Delhi",
-                "travel_times": {
-                    "Delhi-Agra": {"hours": 3.5, "km": 230},
-                    "Agra-Jaipur": {"hours": 4.5, "km": 240},
-                    "Jaipur-Delhi": {"hours": 5, "km": 280}
-                },
-                "highlights": [
-                    "Red Fort & India Gate (Delhi)",
-                    "Taj Mahal & Agra Fort (Agra)", 
-                    "Amber Fort & City Palace (Jaipur)"
-                ]
-            },
-            "rajasthan_royal": {
-                "destinations": ["Jaipur", "Jodhpur", "Udaipur"],
-                "optimal_route": ["Jaipur", "Jodhpur", "Udaipur", "Jaipur"],
-                "recommended_duration": {"min": 7, "max": 10, "optimal": 8},
-                "entry_exit": "Jaipur",
-                "travel_times": {
-                    "Jaipur-Jodhpur": {"hours": 5.5, "km": 340},
-                    "Jodhpur-Udaipur": {"hours": 4.5, "km": 250},
-                    "Udaipur-Jaipur": {"hours": 6, "km": 390}
-                },
-                "highlights": [
-                    "Pink City & Amber Fort (Jaipur)",
-                    "Blue City & Mehrangarh Fort (Jodhpur)",
-                    "City of Lakes & Lake Palace (Udaipur)"
-                ]
-            },
-            "kerala_backwaters": {
-                "destinations": ["Kochi", "Munnar", "Alleppey"],
-                "optimal_route": ["Kochi", "Munnar", "Alleppey", "Kochi"],
-                "recommended_duration": {"min": 5, "max": 8, "optimal": 6},
-                "entry_exit": "Kochi",
-                "travel_times": {
-                    "Kochi-Munnar": {"hours": 4, "km": 130},
-                    "Munnar-Alleppey": {"hours": 4.5, "km": 170},
-                    "Alleppey-Kochi": {"hours": 1.5, "km": 60}
-                },
-                "highlights": [
-                    "Chinese Fishing Nets & Spice Markets (Kochi)",
-                    "Tea Plantations & Hill Stations (Munnar)",
-                    "Houseboat & Backwater Cruise (Alleppey)"
-                ]
-            }
-        }
+        self.travel_circuits = registry.reference("travel_circuits")
+        generation = registry.reference_store.current().generation
+        self.circuit_index = registry.shared(
+            "circuit_index", generation, lambda: CircuitIndex(self.travel_circuits)
+        )
         
         # Distance and travel time matrix for major Indian cities
-        self.city_matrix = {
-            "Delhi": {
-                "Agra": {"hours": 3.5, "km": 230},
-                "Jaipur": {"hours": 5, "km": 280},
-                "Mumbai": {"hours": 17, "km": 1400, "flight": 2},
-                "Goa": {"hours": 20, "km": 1900, "flight": 2.5},
-                "Kolkata": {"hours": 17, "km": 1500, "flight": 2.5}
-            },
-            "Mumbai": {
-                "Goa": {"hours": 8, "km": 600},
-                "Pune": {"hours": 3, "km": 150},
-                "Delhi": {"hours": 17, "km": 1400, "flight": 2}
-            },
-            "Goa": {
-                "Mumbai": {"hours": 8, "km": 600},
-                "Bangalore": {"hours": 8, "km": 560},
-                "Hampi": {
-                    "hours": 5, "km": 350,
-                    "public_transport": {"bus": "₹350-500"},
-                    "private_transport": {"car": "₹3000-4500", "taxi": "₹4000-6000"}
-                },
-                "Delhi": {"hours": 20, "km": 1900, "flight": 2.5}
-            },
-            "Kolkata": {
-                "Delhi": {"hours": 17, "km": 1500, "flight": 2.5},
-                "Darjeeling": {
-                    "hours": 12, "km": 650,
-                    "public_transport": {"bus": "₹550-1400", "train": "₹3000-11000"},
-                    "private_transport": {"car": "₹8000-12000", "taxi": "₹10000-15000"}
-                },
-                "Sikkim": {
-                    "hours": 14, "km": 720,
-                    "public_transport": {"bus": "₹800-1500"},
-                    "private_transport": {"car": "₹10000-15000", "taxi": "₹12000-18000"}
-                },
-                "Puri": {
-                    "hours": 6, "km": 500,
-                    "public_transport": {"bus": "₹500-800", "train": "₹800-2000"},
-                    "private_transport": {"car": "₹4000-6000", "taxi": "₹5000-8000"}
-                }
-            },
-            "Hampi": {
-                "Goa": {"hours": 5, "km": 350},
-                "Bangalore": {"hours": 6, "km": 350}
-            },
-            "Darjeeling": {
-                "Kolkata": {"hours": 12, "km": 650},
-                "Sikkim": {"hours": 4, "km": 100}
-            },
-            "Puri": {
-                "Kolkata": {"hours": 6, "km": 500},
-                "Bhubaneswar": {"hours": 1, "km": 60}
-            }
-        }
+        self.city_matrix = registry.reference("city_matrix")
+        
+        # City coordinates for ordering custom routes
+        self.geo_index = get_geo_index(registry)
 
         # Regional extensions - suggest nearby destinations
-        self.regional_extensions = {
-            "Kolkata": {
-                "hill_stations": {
-                    "destinations": ["Darjeeling", "Sikkim"],
-                    "theme": "Mountain & Tea Gardens",
-                    "description": "Explore hill stations, tea plantations, and mountain monasteries",
-                    "additional_days": 3
-                },
-                "religious": {
-                    "destinations": ["Puri"],
-                    "theme": "Religious & Spiritual",
-                    "description": "Visit the sacred Jagannath Temple and spiritual sites",
-                    "additional_days": 2
-                }
-            },
-            "Goa": {
-                "heritage": {
-                    "destinations": ["Hampi"],
-                    "theme": "UNESCO Heritage",
-                    "description": "Explore ancient Vijayanagara Empire ruins and temples",
-                    "additional_days": 2
-                },
-                "cultural": {
-                    "destinations": ["Bangalore"],
-                    "theme": "Modern Culture",
-                    "description": "Experience India's Silicon Valley and modern culture",
-                    "additional_days": 2
-                }
-            },
-            "Jaipur": {
-                "desert": {
-                    "destinations": ["Jodhpur", "Jaisalmer"],
-                    "theme": "Desert & Forts",
-                    "description": "Explore the Thar Desert and magnificent forts",
-                    "additional_days": 4
-                }
-            },
-            "Delhi": {
-                "golden_triangle": {
-                    "destinations": ["Agra", "Jaipur"],
-                    "theme": "Golden Triangle - Essential India",
-                    "description": "Complete the iconic Golden Triangle with Taj Mahal and royal palaces",
-                    "additional_days": 3,
-                    "priority": 1
-                },
-                "spiritual": {
-                    "destinations": ["Rishikesh", "Haridwar"],
-                    "theme": "Yoga & Spirituality", 
-                    "description": "Experience yoga capital and spiritual Ganges",
-                    "additional_days": 3,
-                    "priority": 2
-                }
-            }
-        }
+        self.regional_extensions = registry.reference("circuit_extensions")
 
     def identify_circuit(self, destinations):
-        """Identify if destinations match a known travel circuit"""
-        dest_set = set([d.lower().replace(" ", "_") for d in destinations])
-        
-        for circuit_name, circuit_data in self.travel_circuits.items():
-            circuit_destinations = set([d.lower().replace(" ", "_") for d in circuit_data["destinations"]])
-            if dest_set.issubset(circuit_destinations) or circuit_destinations.issubset(dest_set):
-                return circuit_name, circuit_data
-        
-        return None, None
+        """Identify the known travel circuit that best matches the destinations"""
+        return self.circuit_index.best(destinations)
 
-    def suggest_itinerary(self, user_input):
-        """Generate intelligent itinerary suggestions from minimal user input"""
+    def suggest_itinerary(self, user_input, parsed=None):
+        """Generate intelligent itinerary suggestions from minimal user input
+        
+        parsed, a ParsedQuery for the same input, supplies the destinations
+        so the input is not parsed again.
+        """
         
         # Parse user input
-        destinations = self.extract_destinations(user_input)
+        destinations = parsed.destinations if parsed is not None else self.extract_destinations(user_input)
         
         if not destinations:
             return {"error": "Could not identify destinations from input"}
@@ -198,36 +75,16 @@ class ItinerarySuggestionEngine:
             return self.build_custom_suggestion(destinations, user_input)
 
     def extract_destinations(self, user_input):
-        """Extract destination names from user input"""
+        """Extract destination names from user input, in order of first mention and without duplicates"""
         input_lower = user_input.lower()
         
-        # Known destination mappings
-        destination_keywords = {
-            "golden triangle": ["Delhi", "Agra", "Jaipur"],
-            "delhi": ["Delhi"],
-            "agra": ["Agra"], 
-            "jaipur": ["Jaipur"],
-            "rajasthan": ["Jaipur", "Jodhpur", "Udaipur"],
-            "kerala": ["Kochi", "Munnar", "Alleppey"],
-            "goa": ["Goa"],
-            "mumbai": ["Mumbai"],
-            "kolkata": ["Kolkata"],
-            "darjeeling": ["Darjeeling"],
-            "sikkim": ["Sikkim"],
-            "puri": ["Puri"],
-            "hampi": ["Hampi"],
-            "bangalore": ["Bangalore"],
-            "jodhpur": ["Jodhpur"],
-            "udaipur": ["Udaipur"],
-            "jaisalmer": ["Jaisalmer"]
-        }
-        
-        destinations = []
-        for keyword, places in destination_keywords.items():
-            if keyword in input_lower:
-                destinations.extend(places)
-        
-        return list(set(destinations))  # Remove duplicates
+        # Keywords in the order they appear, so the first city named leads (and starts custom routes)
+        mentions = sorted(
+            ((input_lower.find(keyword), places) for keyword, places in DESTINATION_KEYWORDS.items()
+             if keyword in input_lower),
+            key=lambda mention: mention[0]
+        )
+        return list(dict.fromkeys(place for _, places in mentions for place in places))
 
     def build_circuit_suggestion(self, circuit_name, circuit_data, user_input):
         """Build suggestion for known travel circuits"""
@@ -352,19 +209,35 @@ class ItinerarySuggestionEngine:
             ]
         }
 
-    def suggest_route_order(self, destinations):
-        """Suggest optimal order for visiting destinations"""
-        # Simple heuristic: start with northernmost, move south
-        # In real implementation, use geographical optimization
+    def suggest_route_order(self, destinations, entry_point=None, exit_point=None):
+        """Suggest optimal order for visiting destinations
         
-        region_order = {
-            "Delhi": 1, "Agra": 2, "Jaipur": 3,
-            "Mumbai": 4, "Goa": 5, "Bangalore": 6,
-            "Kochi": 7, "Kolkata": 8
-        }
+        Shortest great-circle tour from the entry point (default: the first
+        destination). Without an exit point, or with the entry point as exit,
+        the tour returns to the start; a different exit ends the tour there.
+        Cities without coordinates keep their order after the located ones.
+        """
+        entry_point = entry_point or destinations[0]
+        closed = exit_point is None or exit_point == entry_point
+        middle = [city for city in dict.fromkeys(destinations) if city not in (entry_point, exit_point)]
+        located = [city for city in middle if city in self.geo_index]
+        unlocated = [city for city in middle if city not in self.geo_index]
+        
+        # Tour over the located cities, anchored at the entry and (open tours) exit when they have coordinates
+        anchor_start = entry_point in self.geo_index
+        anchor_end = not closed and exit_point in self.geo_index
+        nodes = [entry_point] * anchor_start + located + [exit_point] * anchor_end
+        ordered = []
+        if nodes:
+            distances = self.geo_index.submatrix(nodes).tolist()
+            loop = closed and anchor_start  # the leg back to the entry counts too
+            order = nearest_neighbour_two_opt(
+                distances, start=0, end=len(nodes) - 1 if anchor_end else None, closed=loop
+            )
+            ordered = [nodes[i] for i in order][anchor_start:len(order) - (anchor_end or loop)]
         
-        sorted_destinations = sorted(destinations, key=lambda x: region_order.get(x, 999))
-        return sorted_destinations + [sorted_destinations[0]]  # Return to start
+        # Return to start, or finish at the exit
+        return [entry_point] + ordered + unlocated + [entry_point if closed else exit_point]
 
     def get_travel_logistics(self, route):
         """Get travel logistics for custom routes"""
@@ -3,277 +3,279 @@ T2India Intermediate Connectivity System
 A → C → B routing where C is the intermediate hub
 """
 
+import hashlib
+import json
+import logging
+import os
+import zipfile
+
+from t2india_connectivity_graph import format_distance, format_duration
+from t2india_data_registry import get_data_registry
+from t2india_geo import FlightTimeModel, get_geo_index
+from t2india_hub_routing import DEFAULT_HUB_ROUTING_TABLE_PATH, HUB_ROUTING_TABLE_PATH_ENV, HubRoutingTable
+from t2india_routing_engine import CAB_PAISE_PER_KM
+
+logger = logging.getLogger(__name__)
+
+# Rough flight time estimates by distance category, for airports without coordinates
+FLIGHT_ESTIMATES = {
+    "short": 90,  # < 500km
+    "medium": 150,  # 500-1000km
+    "long": 210    # > 1000km
+}
+CONNECTION_MINUTES = 120  # Connections/transfers at hubs without their own buffer
+DEFAULT_FLIGHT_FARE_PAISE = 450000  # Fare for airports without coordinates
+MINUTES_PER_RUPEE = 0.01  # Hub choice trade-off: ₹100 of fares is worth one minute of travel
+ROUTE_LEG_KEYS = ("leg1", "leg2", "leg3")
+# Reference tables the hub routing table is computed from
+HUB_ROUTING_TABLES = ("intermediate_hubs", "major_hubs", "city_coordinates", "hub_connection_minutes")
+
+
+def build_flight_time_model(registry):
+    """Hub-to-destination flight times precomputed from the city coordinates"""
+    return FlightTimeModel(
+        get_geo_index(registry),
+        registry.reference("hub_connection_minutes"),
+        CONNECTION_MINUTES
+    )
+
 class IntermediateConnectivitySystem:
-    def __init__(self):
+    def __init__(self, registry=None):
+        registry = registry or get_data_registry()
+        self.registry = registry
+        
         # Define intermediate hubs (C locations) for various destinations
-        self.intermediate_hubs = {
-            # Airport hubs for flight connections
-            "Hampi": {
-                "nearest_airports": {
-                    "Hubli": {"distance": "160km", "travel_time": "3h", "transport": "cab"},
-                    "Bangalore": {"distance": "350km", "travel_time": "6h", "transport": "cab"},
-                    "Belgaum": {"distance": "190km", "travel_time": "4h", "transport": "cab"}
-                },
-                "primary_hub": "Hubli"
-            },
-            "Darjeeling": {
-                "nearest_airports": {
-                    "Bagdogra": {"distance": "95km", "travel_time": "3h", "transport": "cab"},
-                    "Siliguri": {"distance": "78km", "travel_time": "2.5h", "transport": "cab"}
-                },
-                "primary_hub": "Bagdogra"
-            },
-            "Rishikesh": {
-                "nearest_airports": {
-                    "Dehradun": {"distance": "35km", "travel_time": "1h", "transport": "cab"},
-                    "Delhi": {"distance": "240km", "travel_time": "6h", "transport": "road"}
-                },
-                "primary_hub": "Dehradun"
-            },
-            "Haridwar": {
-                "nearest_airports": {
-                    "Dehradun": {"distance": "55km", "travel_time": "1.5h", "transport": "cab"},
-                    "Delhi": {"distance": "220km", "travel_time": "5.5h", "transport": "road"}
-                },
-                "primary_hub": "Dehradun"
-            },
-            "Puri": {
-                "nearest_airports": {
-                    "Bhubaneswar": {"distance": "65km", "travel_time": "1.5h", "transport": "cab"}
-                },
-                "primary_hub": "Bhubaneswar"
-            },
-            "Alleppey": {
-                "nearest_airports": {
-                    "Cochin": {"distance": "85km", "travel_time": "2h", "transport": "cab"}
-                },
-                "primary_hub": "Cochin"
-            },
-            "Kumarakom": {
-                "nearest_airports": {
-                    "Cochin": {"distance": "95km", "travel_time": "2.5h", "transport": "cab"}
-                },
-                "primary_hub": "Cochin"
-            },
-            "Manali": {
-                "nearest_airports": {
-                    "Bhuntar": {"distance": "50km", "travel_time": "2h", "transport": "cab"},
-                    "Chandigarh": {"distance": "310km", "travel_time": "8h", "transport": "road"}
-                },
-                "primary_hub": "Bhuntar"
-            },
-            "Shimla": {
-                "nearest_airports": {
-                    "Chandigarh": {"distance": "120km", "travel_time": "3.5h", "transport": "cab"},
-                    "Delhi": {"distance": "350km", "travel_time": "8h", "transport": "road"}
-                },
-                "primary_hub": "Chandigarh"
-            }
-        }
+        self.intermediate_hubs = registry.reference("intermediate_hubs")
         
         # Major connectivity hubs with flight connections
-        self.major_hubs = {
-            "Delhi": {
-                "type": "major_airport",
-                "connections": "International + Domestic",
-                "serves_regions": ["North India", "Golden Triangle", "Hill Stations"]
-            },
-            "Mumbai": {
-                "type": "major_airport", 
-                "connections": "International + Domestic",
-                "serves_regions": ["West India", "Goa", "Rajasthan"]
-            },
-            "Bangalore": {
-                "type": "major_airport",
-                "connections": "International + Domestic", 
-                "serves_regions": ["South India", "Karnataka", "Tech Cities"]
-            },
-            "Kolkata": {
-                "type": "major_airport",
-                "connections": "International + Domestic",
-                "serves_regions": ["East India", "West Bengal", "Northeast"]
-            },
-            "Chennai": {
-                "type": "major_airport",
-                "connections": "International + Domestic",
-                "serves_regions": ["Tamil Nadu", "South India Coast"]
-            },
-            "Cochin": {
-                "type": "major_airport",
-                "connections": "International + Domestic",
-                "serves_regions": ["Kerala", "Backwaters", "Spice Coast"]
-            },
-            "Hubli": {
-                "type": "regional_airport",
-                "connections": "Domestic only",
-                "serves_regions": ["North Karnataka", "Hampi region"]
-            },
-            "Bagdogra": {
-                "type": "regional_airport", 
-                "connections": "Domestic only",
-                "serves_regions": ["North Bengal", "Darjeeling", "Sikkim"]
-            },
-            "Bhubaneswar": {
-                "type": "regional_airport",
-                "connections": "Domestic only", 
-                "serves_regions": ["Odisha", "Temple circuits"]
-            }
-        }
+        self.major_hubs = registry.reference("major_hubs")
         
         # Railway junction hubs
-        self.railway_hubs = {
-            "New Jalpaiguri": {
-                "serves": ["Darjeeling", "Sikkim", "Northeast"],
-                "major_trains": ["Rajdhani Express", "Darjeeling Mail"]
-            },
-            "Hospet Junction": {
-                "serves": ["Hampi"],
-                "major_trains": ["Hampi Express", "Karnataka Express"]
-            },
-            "Haridwar Junction": {
-                "serves": ["Rishikesh", "Char Dham"],
-                "major_trains": ["Shatabdi Express", "Jan Shatabdi"]
-            }
-        }
+        self.railway_hubs = registry.reference("railway_hubs")
+        
+        # Flight model and ranked-route cache are looked up per call, so a reference reload reaches them;
+        # (generation, model) spares the registry lookup while the generation is unchanged
+        self.flight_model_entry = (None, None)
 
     def find_intermediate_hub(self, origin, destination):
         """Find intermediate hub C for A→C→B routing"""
-        
-        # Check if origin needs intermediate hub
-        if origin in self.intermediate_hubs:
-            hub_info = self.intermediate_hubs[origin]
-            primary_hub = hub_info["primary_hub"]
-            hub_details = hub_info["nearest_airports"][primary_hub]
-            
-            return {
-                "origin": origin,
-                "intermediate_hub": primary_hub,
-                "destination": destination,
-                "route_type": "A→C→B",
-                "leg1": {
-                    "from": origin,
-                    "to": primary_hub,
-                    "distance": hub_details["distance"],
-                    "time": hub_details["travel_time"],
-                    "transport": hub_details["transport"]
-                },
-                "leg2": {
-                    "from": primary_hub,
-                    "to": destination,
-                    "transport": "flight",
-                    "note": "Flight connection from hub"
-                },
-                "total_complexity": "2-leg journey"
-            }
-        
-        # Check if destination needs intermediate hub (reverse routing)
-        if destination in self.intermediate_hubs:
-            hub_info = self.intermediate_hubs[destination]
-            primary_hub = hub_info["primary_hub"]
-            hub_details = hub_info["nearest_airports"][primary_hub]
-            
-            return {
-                "origin": origin,
-                "intermediate_hub": primary_hub,
-                "destination": destination,
-                "route_type": "A→C→B",
-                "leg1": {
-                    "from": origin,
-                    "to": primary_hub,
-                    "transport": "flight",
-                    "note": "Flight to nearest hub"
-                },
-                "leg2": {
-                    "from": primary_hub,
-                    "to": destination,
-                    "distance": hub_details["distance"],
-                    "time": hub_details["travel_time"],
-                    "transport": hub_details["transport"]
-                },
-                "total_complexity": "2-leg journey"
-            }
-        
-        # Direct connection available
-        return {
-            "origin": origin,
-            "destination": destination,
-            "route_type": "A→B",
-            "direct_connection": True,
-            "note": "No intermediate hub required"
-        }
+        return copy_route(self.cached_hub_routes(origin, destination)[0])
 
     def get_all_possible_routes(self, origin, destination):
         """Get all possible routing options including intermediate hubs"""
-        
-        routes = []
-        
-        # Primary route via intermediate hub
-        primary_route = self.find_intermediate_hub(origin, destination)
-        routes.append(primary_route)
-        
-        # Alternative routes if origin has multiple hub options
-        if origin in self.intermediate_hubs:
-            hub_info = self.intermediate_hubs[origin]
-            for hub_name, hub_details in hub_info["nearest_airports"].items():
-                if hub_name != hub_info["primary_hub"]:
-                    alternative_route = {
-                        "origin": origin,
-                        "intermediate_hub": hub_name,
-                        "destination": destination,
-                        "route_type": "A→C→B (Alternative)",
-                        "leg1": {
-                            "from": origin,
-                            "to": hub_name,
-                            "distance": hub_details["distance"],
-                            "time": hub_details["travel_time"],
-                            "transport": hub_details["transport"]
-                        },
-                        "leg2": {
-                            "from": hub_name,
-                            "to": destination,
-                            "transport": "flight",
-                            "note": "Alternative hub connection"
-                        },
-                        "priority": "secondary"
-                    }
-                    routes.append(alternative_route)
-        
+        return list(self.rank_hub_routes(origin, destination))
+
+    def current_flight_model(self):
+        """Flight block times and per-hub connection buffers for the current reference data"""
+        generation = self.registry.reference_store.current().generation
+        entry = self.flight_model_entry
+        if entry[0] != generation:
+            model = self.registry.shared("flight_time_model", generation, lambda: build_flight_time_model(self.registry))
+            entry = self.flight_model_entry = (generation, model)
+        return entry[1]
+
+    def route_cache(self):
+        """Ranked hub routes per (origin, destination), shared until the reference data changes"""
+        generation = self.registry.reference_store.current().generation
+        return self.registry.shared("hub_route_cache", generation, dict)
+
+    def rank_hub_routes(self, origin, destination):
+        """Every hub option for a city pair, best door-to-door time and cost first
+
+        The routes are fresh copies: callers may annotate them without
+        touching the cached ones.
+        """
+        return tuple(copy_route(route) for route in self.cached_hub_routes(origin, destination))
+
+    def cached_hub_routes(self, origin, destination):
+        """Ranked routes for a city pair as held in the shared cache; must not be modified"""
+        route_cache = self.route_cache()
+        key = (origin, destination)
+        routes = route_cache.get(key)
+        if routes is None:
+            flight_model = self.current_flight_model()
+            origin_hubs = self.access_options(origin)
+            destination_hubs = self.access_options(destination)
+            if origin_hubs is None and destination_hubs is None:
+                # Direct connection available
+                routes = ({
+                    "origin": origin,
+                    "destination": destination,
+                    "route_type": "A→B",
+                    "direct_connection": True,
+                    "note": "No intermediate hub required"
+                },)
+            else:
+                candidates = [
+                    self.build_hub_route(origin, destination, access, egress, flight_model)
+                    for access in origin_hubs or [None]
+                    for egress in destination_hubs or [None]
+                ]
+                ranked = sorted(candidates, key=lambda route: self.route_score(route, flight_model))
+                for route in ranked[1:]:
+                    route["route_type"] += " (Alternative)"
+                    route["priority"] = "secondary"
+                routes = tuple(ranked)
+            route_cache[key] = routes
         return routes
 
-    def calculate_total_journey_time(self, route):
+    def access_options(self, city):
+        """(airport, ground leg details) pairs for a remote city, or None when it has its own connections"""
+        intermediate_hubs = self.registry.reference("intermediate_hubs")
+        if city not in intermediate_hubs:
+            return None
+        return list(intermediate_hubs[city]["nearest_airports"].items())
+
+    def build_hub_route(self, origin, destination, access, egress, flight_model=None):
+        """A→C→B route through the origin's airport, the destination's airport, or both (A→C→C'→B)"""
+        flight_model = flight_model or self.current_flight_model()
+        stops = [origin]
+        legs = []
+        if access is not None:
+            hub, details = access
+            legs.append(self.ground_leg(origin, hub, details))
+            stops.append(hub)
+        if egress is not None:
+            hub, details = egress
+            if hub != stops[-1]:
+                legs.append(self.flight_leg(stops[-1], hub, "Flight to nearest hub", flight_model))
+                stops.append(hub)
+            legs.append(self.ground_leg(hub, destination, details))
+        elif destination != stops[-1]:
+            legs.append(self.flight_leg(stops[-1], destination, "Flight connection from hub", flight_model))
+        if destination != stops[-1]:
+            stops.append(destination)
+
+        route = {"origin": origin}
+        if len(stops) > 2:
+            route["intermediate_hub"] = stops[1]
+        route["destination"] = destination
+        # A city and its own airport are joined by road alone, with no hub in between
+        route["route_type"] = "A→C→B" if len(stops) > 2 else "A→B (road)"
+        if len(stops) > 3:
+            route["egress_hub"] = stops[2]
+            route["route_type"] = "A→C→C'→B"
+        for i, leg in enumerate(legs, 1):
+            route[f"leg{i}"] = leg
+        route["total_complexity"] = f"{len(legs)}-leg journey"
+        return route
+
+    def ground_leg(self, from_city, to_city, details):
+        """Cab/road leg from the hub table"""
+        return {
+            "from": from_city,
+            "to": to_city,
+            "distance_km": details["distance_km"],
+            "minutes": details["travel_minutes"],
+            "transport": details["transport"]
+        }
+
+    def flight_leg(self, from_hub, to_city, note, flight_model=None):
+        """Flight leg with its block time looked up once, when the route is built and cached"""
+        return {
+            "from": from_hub,
+            "to": to_city,
+            "minutes": self.estimate_flight_minutes(from_hub, to_city, flight_model),
+            "transport": "flight",
+            "note": note
+        }
+
+    def route_legs(self, route):
+        return [route[key] for key in ROUTE_LEG_KEYS if key in route]
+
+    def route_score(self, route, flight_model=None):
+        """Door-to-door minutes plus fares converted to minutes"""
+        flight_model = flight_model or self.current_flight_model()
+        minutes = self.calculate_total_journey_time(route, flight_model)["total_minutes"]
+        cost_paise = sum(self.estimate_leg_cost_paise(leg, flight_model) for leg in self.route_legs(route))
+        return minutes + cost_paise / 100 * MINUTES_PER_RUPEE
+
+    def estimate_leg_cost_paise(self, leg, flight_model=None):
+        """Cab fare by distance, flight fare from the flight model"""
+        if leg["transport"] == "flight":
+            flight_model = flight_model or self.current_flight_model()
+            return flight_model.pair_fares_paise.get((leg["from"], leg["to"]), DEFAULT_FLIGHT_FARE_PAISE)
+        return leg.get("distance_km", 0) * CAB_PAISE_PER_KM
+
+    def calculate_total_journey_time(self, route, flight_model=None):
         """Calculate total journey time for multi-leg routes"""
         
         if route.get("direct_connection"):
-            return {"total_time": "Direct connection", "complexity": "Simple"}
-        
-        leg1_time = 0
-        leg2_time = 0
-        
-        # Parse leg 1 time
-        if "leg1" in route and "time" in route["leg1"]:
-            time_str = route["leg1"]["time"]
-            if "h" in time_str:
-                leg1_time = float(time_str.replace("h", ""))
+            return {"total_minutes": None, "complexity": "Simple"}
         
-        # Estimate leg 2 time (flight time based on distance categories)
-        if "leg2" in route:
-            # Rough flight time estimates
-            flight_estimates = {
-                "short": 1.5,  # < 500km
-                "medium": 2.5,  # 500-1000km  
-                "long": 3.5    # > 1000km
-            }
-            leg2_time = flight_estimates["medium"]  # Default estimate
+        # Ground legs carry their time from the hub table, flight legs from the flight model when the route was built
+        flight_model = flight_model or self.current_flight_model()
+        legs = self.route_legs(route)
+        analysis = {f"leg{i}_minutes": self.estimate_leg_minutes(leg, flight_model) for i, leg in enumerate(legs, 1)}
         
-        total_time = leg1_time + leg2_time + 2  # +2 hours for connections/transfers
+        # Buffer at the airport each flight departs from
+        connection_minutes = sum(
+            flight_model.connection_minutes(leg["from"]) for leg in legs if leg["transport"] == "flight"
+        )
         
-        return {
-            "leg1_time": f"{leg1_time}h",
-            "leg2_time": f"{leg2_time}h", 
-            "connection_time": "2h",
-            "total_time": f"{total_time}h",
+        analysis.update({
+            "connection_minutes": connection_minutes,
+            "total_minutes": sum(analysis.values()) + connection_minutes,
             "complexity": "Multi-leg journey"
-        }
+        })
+        return analysis
+
+    def estimate_leg_minutes(self, leg, flight_model=None):
+        """Minutes for one leg of a route"""
+        if "minutes" in leg:
+            return leg["minutes"]
+        if leg["transport"] == "flight":
+            return self.estimate_flight_minutes(leg["from"], leg["to"], flight_model)
+        return 0
+
+    def estimate_flight_minutes(self, from_hub, to_hub, flight_model=None):
+        """Flight time between two airports"""
+        flight_model = flight_model or self.current_flight_model()
+        return flight_model.pair_minutes.get((from_hub, to_hub), FLIGHT_ESTIMATES["medium"])
+
+    def connection_minutes(self, hub, flight_model=None):
+        """Connection buffer when departing from a hub"""
+        return (flight_model or self.current_flight_model()).connection_minutes(hub)
+
+    def build_hub_routing_table(self, fingerprint=None):
+        """All-pairs A→C→B routing table over every remote city and airport hub"""
+        flight_model = self.current_flight_model()
+        return HubRoutingTable.build(
+            self.registry.reference("intermediate_hubs"), self.registry.reference("major_hubs"),
+            lambda from_hub, to_hub: self.estimate_flight_minutes(from_hub, to_hub, flight_model),
+            flight_model.connection_minutes,
+            fingerprint or self.hub_routing_fingerprint()
+        )
+
+    def hub_routing_fingerprint(self):
+        """Content hash of the reference tables the hub routing table is computed from"""
+        tables = {table: self.registry.reference(table) for table in HUB_ROUTING_TABLES}
+        return hashlib.sha256(json.dumps(tables, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def hub_routing_table(self):
+        """Process-wide routing table, loaded or rebuilt only when the reference data changes"""
+        generation = self.registry.reference_store.current().generation
+        return self.registry.shared("hub_routing_table", generation, self.load_hub_routing_table)
+
+    def load_hub_routing_table(self, path=None):
+        """The table written by the nightly build when it matches the current reference data, else a fresh build"""
+        path = path or os.environ.get(HUB_ROUTING_TABLE_PATH_ENV, DEFAULT_HUB_ROUTING_TABLE_PATH)
+        fingerprint = self.hub_routing_fingerprint()
+        if os.path.exists(path):
+            try:
+                table = HubRoutingTable.load(path)
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+                logger.warning("Building the hub routing table: %s is unusable: %s", path, e)
+            else:
+                if table.fingerprint == fingerprint:
+                    return table
+                # A table from older reference data must not serve routes
+                logger.warning("Building the hub routing table: %s was built from other reference data", path)
+        return self.build_hub_routing_table(fingerprint)
+
+    def lookup_hub_route(self, origin, destination):
+        """O(1) best hub route for a city pair from the precomputed table"""
+        return self.hub_routing_table().lookup(origin, destination)
 
     def format_route_output(self, routes):
         """Format route information for client presentation"""
@@ -289,37 +291,41 @@ class IntermediateConnectivitySystem:
                 output += f"{route['origin']} → {route['destination']} (Direct)\n"
                 output += "No intermediate hub required\n"
             else:
-                output += f"{route['origin']} → {route['intermediate_hub']} → {route['destination']}\n"
-                
-                # Leg 1 details
-                leg1 = route['leg1']
-                output += f"\nLeg 1: {leg1['from']} → {leg1['to']}\n"
-                if 'distance' in leg1:
-                    output += f"  Distance: {leg1['distance']}\n"
-                if 'time' in leg1:
-                    output += f"  Time: {leg1['time']}\n"
-                output += f"  Transport: {leg1['transport'].title()}\n"
+                stops = [leg['from'] for leg in self.route_legs(route)] + [route['destination']]
+                output += " → ".join(stops) + "\n"
                 
-                # Leg 2 details  
-                leg2 = route['leg2']
-                output += f"\nLeg 2: {leg2['from']} → {leg2['to']}\n"
-                output += f"  Transport: {leg2['transport'].title()}\n"
-                if 'note' in leg2:
-                    output += f"  Note: {leg2['note']}\n"
+                # Leg details
+                for i, leg in enumerate(self.route_legs(route), 1):
+                    output += f"\nLeg {i}: {leg['from']} → {leg['to']}\n"
+                    if 'distance_km' in leg:
+                        output += f"  Distance: {format_distance(leg['distance_km'])}\n"
+                    if 'minutes' in leg:
+                        output += f"  Time: {format_duration(leg['minutes'])}\n"
+                    output += f"  Transport: {leg['transport'].title()}\n"
+                    if 'note' in leg:
+                        output += f"  Note: {leg['note']}\n"
                 
                 # Journey time calculation
                 time_analysis = self.calculate_total_journey_time(route)
                 output += f"\nJourney Time Analysis:\n"
-                output += f"  Leg 1: {time_analysis['leg1_time']}\n"
-                output += f"  Leg 2: {time_analysis['leg2_time']}\n" 
-                output += f"  Connections: {time_analysis['connection_time']}\n"
-                output += f"  Total: {time_analysis['total_time']}\n"
+                for i in range(1, len(self.route_legs(route)) + 1):
+                    output += f"  Leg {i}: {format_duration(time_analysis[f'leg{i}_minutes'])}\n"
+                output += f"  Connections: {format_duration(time_analysis['connection_minutes'])}\n"
+                output += f"  Total: {format_duration(time_analysis['total_minutes'])}\n"
                 output += f"  Complexity: {time_analysis['complexity']}\n"
             
             output += "\n" + "-"*50 + "\n\n"
         
         return output
 
+def copy_route(route):
+    """Route dict with its own leg dicts, so changes to it stay out of the route cache"""
+    copied = dict(route)
+    for key in ROUTE_LEG_KEYS:
+        if key in copied:
+            copied[key] = dict(copied[key])
+    return copied
+
 def test_intermediate_connectivity():
     """Test the intermediate connectivity system"""
     
@@ -333,6 +339,7 @@ def test_intermediate_connectivity():
         ("Rishikesh", "Kolkata"),
         ("Puri", "Delhi"),
         ("Cochin", "Darjeeling"),
+        ("Hampi", "Darjeeling"),  # Both ends need a hub
         ("Delhi", "Goa")  # Direct connection test
     ]
     
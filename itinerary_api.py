@@ -0,0 +1,100 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask_cors import cross_origin
+
+from intermediate_connectivity_system import IntermediateConnectivitySystem
+from t2india_comprehensive_system import T2IndiaComprehensiveSystem
+
+itinerary_bp = Blueprint('itinerary', __name__)
+
+# One system per worker process; its indexes and query cache are reused across requests
+comprehensive_system = T2IndiaComprehensiveSystem()
+connectivity_system = IntermediateConnectivitySystem()
+
+def read_body():
+    """JSON object body, or an empty dict for anything else"""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+def read_query():
+    """The free-text query from a JSON body or the query string; ValueError unless a non-empty string"""
+    query = read_body().get('query') or request.args.get('query', '')
+    if not isinstance(query, str):
+        raise ValueError("query must be a string")
+    if not query:
+        raise ValueError("Query is required")
+    return query
+
+def read_city(name):
+    """A city name from a JSON body or the query string; ValueError unless a non-empty string"""
+    city = read_body().get(name) or request.args.get(name, '')
+    if not isinstance(city, str) or not city:
+        raise ValueError(f"{name} must be a non-empty string")
+    return city
+
+def read_fields():
+    """Requested result fields as a list, or None for the full result"""
+    data = read_body()
+    fields = data.get('fields') or request.args.get('fields')
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    elif fields is not None and (not isinstance(fields, list)
+                                 or not all(isinstance(field, str) for field in fields)):
+        raise ValueError("fields must be a comma-separated string or a list of strings")
+    return fields or None
+
+@itinerary_bp.route('/query', methods=['GET', 'POST'])
+@cross_origin()
+def process_query():
+    """Process a query; `fields` limits the result to the listed (dotted) fields"""
+    try:
+        query = read_query()
+        fields = read_fields()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result = comprehensive_system.process_comprehensive_query(query, lazy=True)
+    try:
+        return jsonify(result.to_dict(fields))
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 400
+
+@itinerary_bp.route('/query/stream', methods=['GET', 'POST'])
+@cross_origin()
+def stream_query():
+    """Stream the formatted analysis section by section as plain text"""
+    try:
+        query = read_query()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result = comprehensive_system.process_comprehensive_query(query, lazy=True)
+    return Response(
+        stream_with_context(comprehensive_system.iter_comprehensive_output(result)),
+        mimetype='text/plain; charset=utf-8'
+    )
+
+@itinerary_bp.route('/query/stream.jsonl', methods=['GET', 'POST'])
+@cross_origin()
+def stream_query_jsonl():
+    """Stream the result as JSON lines, one section per line"""
+    try:
+        query = read_query()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result = comprehensive_system.process_comprehensive_query(query, lazy=True)
+    return Response(
+        stream_with_context(comprehensive_system.iter_comprehensive_jsonl(result)),
+        mimetype='application/x-ndjson'
+    )
+
+@itinerary_bp.route('/hub-route', methods=['GET', 'POST'])
+@cross_origin()
+def hub_route():
+    """Best door-to-door hub routing for an origin/destination pair from the precomputed table"""
+    try:
+        origin = read_city('origin')
+        destination = read_city('destination')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    route = connectivity_system.lookup_hub_route(origin, destination)
+    if route is None:
+        return jsonify({"error": f"No hub route from {origin} to {destination}"}), 404
+    return jsonify(route)
@@ -3,179 +3,148 @@ T2India Itinerary Library Integration System
 Suggests existing itineraries before generating new ones
 """
 
+import heapq
 import json
+import logging
 from datetime import datetime, timedelta
 import re
 
+from t2india_alias_index import DestinationAliasIndex
+from intermediate_connectivity_system import build_flight_time_model
+from t2india_data_registry import get_data_registry
+from t2india_geo import door_to_door_minutes
+from t2india_itinerary_fitting import ItineraryFitter
+from t2india_library_snapshot import ItineraryTable
+from t2india_minhash_index import LSH_MIN_LIBRARY_SIZE, LSH_NUM_PERM, LSH_THRESHOLD, MinHashLSHIndex
+
+logger = logging.getLogger(__name__)
+
+FIT_CANDIDATES = 10  # top matches fitted to the request when choosing a base itinerary
+
+
+def build_itinerary_fitter(registry):
+    """Fitting engine over the door-to-door travel times between located cities"""
+    generation = registry.reference_store.current().generation
+    flight_model = registry.shared("flight_time_model", generation, lambda: build_flight_time_model(registry))
+    return ItineraryFitter(
+        flight_model.geo.city_ids, door_to_door_minutes(flight_model), registry.reference("destination_stays")
+    )
+
+
 class T2IndiaItineraryLibrary:
-    def __init__(self):
+    def __init__(self, registry=None, lsh_threshold=LSH_THRESHOLD, lsh_num_perm=LSH_NUM_PERM):
+        registry = registry or get_data_registry()
+        
         # Sample existing T2India itineraries database
-        self.existing_itineraries = {
-            "golden_triangle_6d": {
-                "id": "GT001",
-                "name": "Classic Golden Triangle",
-                "destinations": ["Delhi", "Agra", "Jaipur"],
-                "duration": 6,
-                "route": ["Delhi", "Agra", "Jaipur", "Delhi"],
-                "bookings": 156,
-                "rating": 4.8,
-                "price_range": "₹15,000",
-                "highlights": ["Taj Mahal", "Red Fort", "Hawa Mahal", "Amber Fort"],
-                "day_wise": {
-                    "Day 1": "Delhi arrival, Red Fort, India Gate",
-                    "Day 2": "Delhi to Agra, Taj Mahal visit",
-                    "Day 3": "Agra Fort, drive to Jaipur",
-                    "Day 4": "Amber Fort, City Palace, Hawa Mahal",
-                    "Day 5": "Jaipur local sightseeing",
-                    "Day 6": "Return to Delhi, departure"
-                },
-                "tags": ["heritage", "culture", "monuments", "unesco"]
-            },
-            "kerala_backwaters_5d": {
-                "id": "KB001", 
-                "name": "Kerala Backwater Bliss",
-                "destinations": ["Kochi", "Alleppey", "Kumarakom"],
-                "duration": 5,
-                "route": ["Kochi", "Alleppey", "Kumarakom", "Kochi"],
-                "bookings": 89,
-                "rating": 4.9,
-                "price_range": "₹18,000",
-                "highlights": ["Houseboat", "Backwaters", "Spice Gardens", "Ayurveda"],
-                "day_wise": {
-                    "Day 1": "Kochi arrival, Fort Kochi exploration",
-                    "Day 2": "Kochi to Alleppey, houseboat check-in",
-                    "Day 3": "Backwater cruise, Kumarakom",
-                    "Day 4": "Bird sanctuary, Ayurveda spa",
-                    "Day 5": "Return to Kochi, departure"
-                },
-                "tags": ["nature", "backwaters", "ayurveda", "relaxation"]
-            },
-            "rajasthan_royal_8d": {
-                "id": "RR001",
-                "name": "Rajasthan Royal Heritage", 
-                "destinations": ["Jodhpur", "Udaipur", "Jaisalmer"],
-                "duration": 8,
-                "route": ["Jodhpur", "Udaipur", "Jaisalmer", "Jodhpur"],
-                "bookings": 134,
-                "rating": 4.7,
-                "price_range": "₹22,000",
-                "highlights": ["Mehrangarh Fort", "Lake Palace", "Desert Safari", "Camel Ride"],
-                "day_wise": {
-                    "Day 1": "Jodhpur arrival, Mehrangarh Fort",
-                    "Day 2": "Jodhpur to Udaipur, City Palace",
-                    "Day 3": "Lake Pichola, Jagdish Temple",
-                    "Day 4": "Udaipur to Jaisalmer",
-                    "Day 5": "Jaisalmer Fort, Patwon Ki Haveli",
-                    "Day 6": "Desert safari, camel ride",
-                    "Day 7": "Sam Sand Dunes, cultural evening",
-                    "Day 8": "Return to Jodhpur, departure"
-                },
-                "tags": ["royal", "desert", "forts", "heritage"]
-            },
-            "kashmir_paradise_7d": {
-                "id": "KP001",
-                "name": "Kashmir Paradise",
-                "destinations": ["Srinagar", "Gulmarg", "Pahalgam"],
-                "duration": 7,
-                "route": ["Srinagar", "Gulmarg", "Pahalgam", "Srinagar"],
-                "bookings": 67,
-                "rating": 4.9,
-                "price_range": "₹25,000",
-                "highlights": ["Dal Lake", "Shikara Ride", "Gondola", "Valley Views"],
-                "day_wise": {
-                    "Day 1": "Srinagar arrival, Dal Lake shikara",
-                    "Day 2": "Mughal Gardens, local markets",
-                    "Day 3": "Srinagar to Gulmarg, Gondola ride",
-                    "Day 4": "Gulmarg to Pahalgam",
-                    "Day 5": "Betaab Valley, Aru Valley",
-                    "Day 6": "Pahalgam to Srinagar",
-                    "Day 7": "Departure from Srinagar"
-                },
-                "tags": ["mountains", "lakes", "nature", "adventure"]
-            },
-            "goa_hampi_heritage_6d": {
-                "id": "GH001",
-                "name": "Goa Hampi Heritage Circuit",
-                "destinations": ["Goa", "Hampi"],
-                "duration": 6,
-                "route": ["Goa", "Hampi", "Goa"],
-                "bookings": 45,
-                "rating": 4.6,
-                "price_range": "₹16,000",
-                "highlights": ["Beaches", "UNESCO Heritage", "Vijayanagara Ruins", "Portuguese Architecture"],
-                "day_wise": {
-                    "Day 1": "Goa arrival, beach relaxation",
-                    "Day 2": "Old Goa churches, spice plantation",
-                    "Day 3": "Goa to Hampi (5 hours drive)",
-                    "Day 4": "Hampi ruins, Virupaksha Temple",
-                    "Day 5": "Vittala Temple, Stone Chariot",
-                    "Day 6": "Return to Goa, departure"
-                },
-                "tags": ["heritage", "unesco", "beaches", "history"]
-            },
-            "kolkata_darjeeling_hills_8d": {
-                "id": "KD001",
-                "name": "Kolkata Darjeeling Hills",
-                "destinations": ["Kolkata", "Darjeeling"],
-                "duration": 8,
-                "route": ["Kolkata", "Darjeeling", "Kolkata"],
-                "bookings": 78,
-                "rating": 4.5,
-                "price_range": "₹19,000",
-                "highlights": ["Victoria Memorial", "Tea Gardens", "Toy Train", "Tiger Hill"],
-                "day_wise": {
-                    "Day 1": "Kolkata arrival, Victoria Memorial",
-                    "Day 2": "Howrah Bridge, Dakshineswar Temple",
-                    "Day 3": "Kolkata to Darjeeling (train/road)",
-                    "Day 4": "Tiger Hill sunrise, tea garden visit",
-                    "Day 5": "Toy train ride, local markets",
-                    "Day 6": "Darjeeling monastery visits",
-                    "Day 7": "Return journey to Kolkata",
-                    "Day 8": "Kolkata departure"
-                },
-                "tags": ["hills", "tea", "heritage", "train"]
-            }
-        }
+        self.existing_itineraries = registry.reference("existing_itineraries")
         
         # Destination aliases for flexible matching
-        self.destination_aliases = {
-            "delhi": ["delhi", "new delhi"],
-            "agra": ["agra"],
-            "jaipur": ["jaipur", "pink city"],
-            "goa": ["goa", "panaji"],
-            "kolkata": ["kolkata", "calcutta"],
-            "darjeeling": ["darjeeling"],
-            "hampi": ["hampi"],
-            "kochi": ["kochi", "cochin"],
-            "alleppey": ["alleppey", "alappuzha"],
-            "jodhpur": ["jodhpur", "blue city"],
-            "udaipur": ["udaipur", "city of lakes"],
-            "jaisalmer": ["jaisalmer", "golden city"],
-            "srinagar": ["srinagar"],
-            "gulmarg": ["gulmarg"],
-            "pahalgam": ["pahalgam"]
+        self.destination_aliases = registry.reference("destination_aliases")
+        
+        # Alias map and library destinations normalized once per data generation, not per query.
+        # Structures over the library also follow its snapshot; the cached entry keeps the table, so its id stays unique
+        generation = registry.reference_store.current().generation
+        library_generation = (generation, id(self.existing_itineraries))
+        self.alias_index = registry.shared(
+            "destination_alias_index", generation, lambda: DestinationAliasIndex(self.destination_aliases)
+        )
+        self.normalized_destinations = registry.shared(
+            "normalized_library_destinations", library_generation, self.normalize_library
+        )
+        
+        # Candidate retrieval for top-k matching on large libraries
+        self.lsh_threshold = lsh_threshold
+        self.lsh_num_perm = lsh_num_perm
+        self.similarity_index = registry.shared(
+            f"library_minhash_index_{lsh_num_perm}_{lsh_threshold}", library_generation, self.build_similarity_index
+        )
+        
+        # Fits library itineraries to a request's destinations and days
+        self.fitter = registry.shared("itinerary_fitter", generation, lambda: build_itinerary_fitter(registry))
+
+    def normalize_library(self):
+        """Normalized destination set per library itinerary, keyed by its id; built on lookup for a mapped library"""
+        if isinstance(self.existing_itineraries, ItineraryTable):
+            return self.existing_itineraries.destination_sets(self.normalize_destination)
+        return {
+            itinerary.get("id", key): frozenset(self.normalize_destination(d) for d in itinerary["destinations"])
+            for key, itinerary in self.existing_itineraries.items()
         }
 
+    def build_similarity_index(self):
+        """MinHash/LSH index over library destination sets, or None when a scan is cheap enough"""
+        if len(self.existing_itineraries) < LSH_MIN_LIBRARY_SIZE:
+            return None
+        if isinstance(self.existing_itineraries, ItineraryTable):
+            # Buckets written by the snapshot build serve as long as the aliases and settings match
+            index = self.existing_itineraries.similarity_index(
+                self.destination_aliases, self.lsh_num_perm, self.lsh_threshold
+            )
+            if index is not None:
+                return index
+            logger.warning("Building the library LSH index: the snapshot has no buckets for the current "
+                           "destination aliases with num_perm=%s, threshold=%s", self.lsh_num_perm, self.lsh_threshold)
+        token_sets = {}
+        for key, itinerary_id in self.library_ids():
+            destinations = self.normalized_destinations[itinerary_id]
+            if destinations:  # itineraries without destinations never reach the minimum score
+                token_sets[key] = destinations
+        return MinHashLSHIndex(token_sets, self.lsh_num_perm, self.lsh_threshold)
+
+    def library_ids(self):
+        """(library key, itinerary id) pairs in library order"""
+        if isinstance(self.existing_itineraries, ItineraryTable):
+            return self.existing_itineraries.key_ids()
+        return [(key, itinerary.get("id", key)) for key, itinerary in self.existing_itineraries.items()]
+
     def normalize_destination(self, destination):
-        """Normalize destination names for matching"""
-        dest_lower = destination.lower().strip()
-        for standard, aliases in self.destination_aliases.items():
-            if dest_lower in aliases:
-                return standard.title()
-        return destination.title()
+        """Normalize destination names for matching, tolerating small misspellings"""
+        return self.alias_index.normalize(destination)
+
+    def itinerary_destinations(self, itinerary):
+        """Normalized destinations of an itinerary, precomputed for library entries"""
+        normalized = self.normalized_destinations.get(itinerary.get("id"))
+        if normalized is None:
+            normalized = frozenset(self.normalize_destination(d) for d in itinerary["destinations"])
+        return normalized
 
-    def find_matching_itineraries(self, user_destinations, duration=None):
+    def normalize_request(self, user_destinations):
+        """Normalized requested destinations in request order, without duplicates"""
+        return list(dict.fromkeys(self.normalize_destination(d) for d in user_destinations))
+
+    def find_matching_itineraries(self, user_destinations, duration=None, limit=None):
         """Find existing itineraries that match user requirements"""
-        normalized_destinations = [self.normalize_destination(d) for d in user_destinations]
+        normalized_destinations = set(self.normalize_request(user_destinations))
+        return self.rank_matches(self.existing_itineraries, normalized_destinations, duration, limit)
+
+    def find_similar_itineraries(self, user_destinations, duration=None, k=3):
+        """Top k matches, with candidates retrieved through the MinHash/LSH index on large libraries
+
+        Candidates are re-scored exactly, so scores agree with
+        find_matching_itineraries; an itinerary that overlaps the request too
+        little to share any LSH band can be missed.
+        """
+        return self.similar_itineraries(set(self.normalize_request(user_destinations)), duration, k)
+
+    def similar_itineraries(self, normalized_destinations, duration, k):
+        """find_similar_itineraries for an already normalized destination set"""
+        if self.similarity_index is None:
+            return self.rank_matches(self.existing_itineraries, normalized_destinations, duration, k)
+        candidates = self.similarity_index.candidates(normalized_destinations)
+        return self.rank_matches(candidates, normalized_destinations, duration, k)
+
+    def rank_matches(self, itinerary_ids, normalized_destinations, duration, limit):
+        """Score library entries, best first; library order breaks ties"""
         matches = []
-        
-        for itinerary_id, itinerary in self.existing_itineraries.items():
+        for itinerary_id in itinerary_ids:
+            itinerary = self.existing_itineraries[itinerary_id]
+            
             # Check destination overlap
-            itinerary_destinations = [self.normalize_destination(d) for d in itinerary["destinations"]]
+            itinerary_destinations = self.normalized_destinations[itinerary.get("id", itinerary_id)]
             
             # Calculate match percentage
-            common_destinations = set(normalized_destinations) & set(itinerary_destinations)
-            match_percentage = len(common_destinations) / len(set(normalized_destinations) | set(itinerary_destinations))
+            common_destinations = normalized_destinations & itinerary_destinations
+            match_percentage = len(common_destinations) / len(normalized_destinations | itinerary_destinations)
             
             # Consider duration match if specified
             duration_match = 1.0
@@ -191,44 +160,71 @@ class T2IndiaItineraryLibrary:
                     "itinerary": itinerary,
                     "match_score": overall_score,
                     "common_destinations": list(common_destinations),
-                    "missing_destinations": list(set(normalized_destinations) - set(itinerary_destinations)),
-                    "extra_destinations": list(set(itinerary_destinations) - set(normalized_destinations))
+                    "missing_destinations": list(normalized_destinations - itinerary_destinations),
+                    "extra_destinations": list(itinerary_destinations - normalized_destinations)
                 })
         
         # Sort by match score
-        matches.sort(key=lambda x: x["match_score"], reverse=True)
-        return matches
+        if limit is None:
+            matches.sort(key=lambda x: x["match_score"], reverse=True)
+            return matches
+        return heapq.nlargest(limit, matches, key=lambda x: x["match_score"])
+
+    def fit_itinerary(self, base_itinerary, user_destinations, user_duration):
+        """Concrete modified itinerary: the base route with missing destinations inserted and stays fitted to the duration"""
+        return self.fit_requested(base_itinerary, self.normalize_request(user_destinations), user_duration)
 
-    def suggest_itinerary_modifications(self, base_itinerary, user_destinations, user_duration):
+    def fit_requested(self, base_itinerary, requested, user_duration):
+        """fit_itinerary for already normalized requested destinations"""
+        route = [self.normalize_destination(city) for city in base_itinerary.get("route") or base_itinerary["destinations"]]
+        fitted = self.fitter.fit(route, base_itinerary["duration"], requested, user_duration)
+        fitted["base_id"] = base_itinerary.get("id")
+        fitted["name"] = base_itinerary["name"] if not (fitted["inserted"] or fitted["removed"]) \
+            else f"{base_itinerary['name']} (Customized)"
+        return fitted
+
+    def suggest_itinerary_modifications(self, base_itinerary, user_destinations, user_duration, fitted=None):
         """Suggest how to modify existing itinerary to match user needs"""
+        fitted = fitted or self.fit_itinerary(base_itinerary, user_destinations, user_duration)
         modifications = []
         
         # Duration adjustments
-        duration_diff = user_duration - base_itinerary["duration"]
+        duration_diff = fitted["duration"] - base_itinerary["duration"]
         if duration_diff > 0:
             modifications.append(f"Extend by {duration_diff} days for more exploration")
         elif duration_diff < 0:
             modifications.append(f"Compress by {abs(duration_diff)} days for shorter trip")
         
-        # Destination adjustments
-        base_destinations = set([self.normalize_destination(d) for d in base_itinerary["destinations"]])
-        user_destinations_set = set([self.normalize_destination(d) for d in user_destinations])
-        
-        missing = user_destinations_set - base_destinations
-        extra = base_destinations - user_destinations_set
-        
-        if missing:
-            modifications.append(f"Add destinations: {', '.join(missing)}")
-        if extra:
-            modifications.append(f"Optional to remove: {', '.join(extra)}")
+        # Destination adjustments, in route order
+        route = fitted["route"]
+        stays = {stay["city"]: stay["days"] for stay in fitted["stays"]}
+        for city in fitted["inserted"]:
+            position = route.index(city)
+            if position + 1 < len(route):
+                modifications.append(f"Add {city} between {route[position - 1]} and {route[position + 1]} "
+                                     f"({stays[city]} days)")
+            else:
+                modifications.append(f"Add {city} after {route[position - 1]} ({stays[city]} days)")
+        for city in fitted["removed"]:
+            modifications.append(f"Remove {city} to fit {fitted['duration']} days")
+        for city, change in fitted["day_changes"].items():
+            modifications.append(f"Stay {stays[city]} days in {city} (was {stays[city] - change})")
+        if fitted["optional"]:
+            modifications.append(f"Optional to remove: {', '.join(fitted['optional'])}")
+        modifications.extend(fitted["issues"])
         
         return modifications
 
-    def generate_hybrid_itinerary(self, user_input, user_destinations, user_duration):
-        """Generate itinerary using existing library + new generation"""
+    def generate_hybrid_itinerary(self, user_input, user_destinations, user_duration, parsed=None):
+        """Generate itinerary using existing library + new generation
+        
+        parsed, a ParsedQuery for the same request, supplies the normalized
+        destinations so they are not normalized again.
+        """
+        requested = parsed.normalized_destinations if parsed is not None else self.normalize_request(user_destinations)
         
         # First, try to find matching existing itineraries
-        matches = self.find_matching_itineraries(user_destinations, user_duration)
+        matches = self.similar_itineraries(set(requested), user_duration, FIT_CANDIDATES)
         
         result = {
             "approach": "hybrid",
@@ -238,14 +234,18 @@ class T2IndiaItineraryLibrary:
         }
         
         if matches:
-            best_match = matches[0]
+            # Base on the match needing the least rework; match order breaks ties
+            fits = [self.fit_requested(match["itinerary"], requested, user_duration) for match in matches]
+            chosen = min(range(len(matches)), key=lambda i: (fits[i]["modification_cost"], i))
+            best_match = matches[chosen]
             result["existing_match"] = {
                 "found": True,
                 "itinerary": best_match["itinerary"],
                 "match_score": best_match["match_score"],
                 "modifications_needed": self.suggest_itinerary_modifications(
-                    best_match["itinerary"], user_destinations, user_duration
+                    best_match["itinerary"], user_destinations, user_duration, fits[chosen]
                 ),
+                "modified_itinerary": fits[chosen],
                 "common_destinations": best_match["common_destinations"],
                 "missing_destinations": best_match["missing_destinations"]
             }
@@ -257,6 +257,7 @@ class T2IndiaItineraryLibrary:
             else:
                 result["recommendation"] = "create_new_with_reference"
                 result["reference_itinerary"] = best_match["itinerary"]
+            matches = [best_match] + matches[:chosen] + matches[chosen + 1:]
         else:
             result["existing_match"] = {"found": False}
             result["recommendation"] = "create_completely_new"
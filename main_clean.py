@@ -13,6 +13,7 @@ from flask_cors import CORS
 import re
 import json
 from datetime import datetime
+from itinerary_api import itinerary_bp
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'travmechanix-intelligent-search-2024'
@@ -20,6 +21,8 @@ app.config['SECRET_KEY'] = 'travmechanix-intelligent-search-2024'
 # Enable CORS for all routes
 CORS(app, origins="*")
 
+app.register_blueprint(itinerary_bp, url_prefix='/api/itinerary')
+
 # Auto-learning database for 0-result queries
 ZERO_RESULTS_DB = []
 OPERATION_REMINDERS = []
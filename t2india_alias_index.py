@@ -0,0 +1,81 @@
+"""
+T2India Destination Alias Index
+Reverse alias → canonical name map with a trigram index for misspelled destinations
+"""
+
+from functools import lru_cache
+
+MIN_TRIGRAM_SIMILARITY = 0.5  # Jaccard overlap of padded trigram sets
+SHORT_NAME_LENGTH = 5  # names up to this length allow one typo, longer ones two
+
+
+def trigrams(text):
+    """Trigrams of a name padded so that prefixes and suffixes count"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 as soon as it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class DestinationAliasIndex:
+    def __init__(self, destination_aliases, fuzzy_cache_size=4096):
+        # Every alias and canonical key maps straight to its display name; aliases are
+        # entered first so a key that is also another destination's alias keeps that meaning
+        self.canonical = {}
+        for standard, aliases in destination_aliases.items():
+            for alias in aliases:
+                self.canonical.setdefault(alias, standard.title())
+        for standard in destination_aliases:
+            self.canonical.setdefault(standard, standard.title())
+
+        # Trigram -> aliases containing it, for typo candidates
+        self.alias_trigrams = {alias: trigrams(alias) for alias in self.canonical}
+        self.postings = {}
+        for alias, grams in self.alias_trigrams.items():
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(alias)
+
+        # Misspellings repeat across queries; remember what each resolved to
+        self.fuzzy_match = lru_cache(maxsize=fuzzy_cache_size)(self.find_fuzzy_match)
+
+    def normalize(self, destination):
+        """Canonical display name for a destination, alias or close misspelling"""
+        key = destination.lower().strip()
+        standard = self.canonical.get(key)
+        if standard is None:
+            standard = self.fuzzy_match(key)
+        return standard if standard is not None else destination.title()
+
+    def find_fuzzy_match(self, key):
+        """Canonical name of the closest alias within the typo budget, or None"""
+        grams = trigrams(key)
+        shared = {}
+        for gram in grams:
+            for alias in self.postings.get(gram, ()):
+                shared[alias] = shared.get(alias, 0) + 1
+
+        limit = 1 if len(key) <= SHORT_NAME_LENGTH else 2
+        best = None
+        for alias, common in shared.items():
+            similarity = common / (len(grams) + len(self.alias_trigrams[alias]) - common)
+            if similarity < MIN_TRIGRAM_SIMILARITY:
+                continue
+            distance = edit_distance(key, alias, limit)
+            if distance <= limit:
+                rank = (distance, -similarity, alias)
+                if best is None or rank < best[0]:
+                    best = (rank, alias)
+        return self.canonical[best[1]] if best else None
@@ -0,0 +1,1404 @@
+"""
+T2India Performance Benchmarks
+Micro-benchmarks comparing the optimized code paths against the original implementations
+"""
+
+import gc
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+from integrated_t2india_system import T2IndiaIntegratedSystem
+from intelligent_itinerary_builder import ItinerarySuggestionEngine
+from itinerary_library_integration import FIT_CANDIDATES, LSH_THRESHOLD, T2IndiaItineraryLibrary
+from intermediate_connectivity_system import FLIGHT_ESTIMATES, IntermediateConnectivitySystem
+from t2india_alias_index import DestinationAliasIndex
+from t2india_circuit_index import CircuitIndex
+from t2india_comprehensive_system import T2IndiaComprehensiveSystem
+from t2india_connectivity_graph import MISSING
+from t2india_data_registry import LIBRARY_TABLES, DataRegistry, get_data_registry
+from t2india_data_store import SNAPSHOT_TABLES, DataStore, write_snapshot
+from t2india_day_scheduler import DayScheduler
+from t2india_final_system import T2IndiaFinalSystem
+from t2india_hub_routing import HubRoutingTable
+from t2india_id_generator import ItineraryIdGenerator
+from t2india_itinerary_display_system import T2IndiaItineraryDisplaySystem
+from t2india_library_snapshot import DEFAULT_LIBRARY_SOURCE_PATH, LibrarySnapshot, build_library_snapshot, file_sha256
+from t2india_route_optimizer import RouteOptimizer
+
+BENCHMARK_QUERIES = [
+    "Golden Triangle for 6 days",
+    "Cochin, Goa, Hampi, Delhi, Kolkata for 18 days",
+    "Rajasthan royal tour with desert experience 10 days",
+    "Kerala backwaters and spiritual journey 8 days",
+    "Delhi Agra Jaipur with yoga in Rishikesh 9 days",
+    "Goa to Hampi heritage circuit 5 days",
+    "Kolkata Darjeeling hills and tea gardens 7 days",
+    "Mumbai Goa Hampi Bangalore south circuit 12 days",
+    "Delhi to Kashmir spiritual and mountain 14 days",
+    "Complete India tour Delhi Mumbai Goa Kolkata 21 days"
+]
+
+
+def legacy_parse_user_input(user_input):
+    """Original substring-scan parser, kept as the benchmark baseline"""
+    destinations = []
+    destination_keywords = {
+        "delhi": "Delhi", "new delhi": "Delhi",
+        "agra": "Agra", "taj mahal": "Agra",
+        "jaipur": "Jaipur", "pink city": "Jaipur",
+        "goa": "Goa", "panaji": "Goa",
+        "kolkata": "Kolkata", "calcutta": "Kolkata",
+        "darjeeling": "Darjeeling",
+        "hampi": "Hampi",
+        "cochin": "Cochin", "kochi": "Cochin",
+        "mumbai": "Mumbai", "bombay": "Mumbai",
+        "bangalore": "Bangalore", "bengaluru": "Bangalore",
+        "jodhpur": "Jodhpur", "blue city": "Jodhpur",
+        "udaipur": "Udaipur", "city of lakes": "Udaipur",
+        "jaisalmer": "Jaisalmer", "golden city": "Jaisalmer",
+        "rishikesh": "Rishikesh", "haridwar": "Haridwar",
+        "puri": "Puri", "alleppey": "Alleppey", "kumarakom": "Kumarakom"
+    }
+
+    input_lower = user_input.lower()
+    for keyword, standard_name in destination_keywords.items():
+        if keyword in input_lower and standard_name not in destinations:
+            destinations.append(standard_name)
+
+    duration_match = re.search(r'(\d+)\s*days?', input_lower)
+    duration = int(duration_match.group(1)) if duration_match else None
+
+    themes = []
+    if any(word in input_lower for word in ["spiritual", "yoga", "meditation", "temple"]):
+        themes.append("spiritual")
+    if any(word in input_lower for word in ["heritage", "history", "unesco", "monument"]):
+        themes.append("heritage")
+    if any(word in input_lower for word in ["desert", "camel", "sand", "fort"]):
+        themes.append("desert")
+    if any(word in input_lower for word in ["beach", "coastal", "backwater"]):
+        themes.append("coastal")
+    if any(word in input_lower for word in ["mountain", "hill", "tea", "himalaya"]):
+        themes.append("mountain")
+
+    return {
+        "destinations": destinations,
+        "duration": duration,
+        "themes": themes,
+        "raw_input": user_input
+    }
+
+
+def legacy_find_matching_itineraries(itinerary_library, destinations, duration=None):
+    """Original full-library Jaccard scan, kept as the benchmark baseline"""
+    matches = []
+
+    for itinerary_id, itinerary in itinerary_library.items():
+        itinerary_destinations = set(itinerary["destinations"])
+        user_destinations = set(destinations)
+
+        common = itinerary_destinations & user_destinations
+        total = itinerary_destinations | user_destinations
+
+        if len(total) == 0:
+            continue
+
+        destination_score = len(common) / len(total)
+
+        duration_score = 1.0
+        if duration:
+            duration_diff = abs(itinerary["duration"] - duration)
+            duration_score = max(0, 1 - (duration_diff / 10))
+
+        overall_score = (destination_score * 0.7) + (duration_score * 0.3)
+
+        if overall_score > 0.2:
+            matches.append({
+                "itinerary": itinerary,
+                "match_score": overall_score,
+                "common_destinations": list(common)
+            })
+
+    matches.sort(key=lambda x: x["match_score"], reverse=True)
+    return matches
+
+
+def legacy_region_order_route(destinations):
+    """Original region_order sort used when no route pattern matched"""
+    region_order = {
+        "Delhi": 1, "Agra": 2, "Jaipur": 3, "Jodhpur": 4, "Udaipur": 5, "Jaisalmer": 6,
+        "Mumbai": 7, "Goa": 8, "Hampi": 9, "Bangalore": 10, "Cochin": 11,
+        "Kolkata": 12, "Darjeeling": 13, "Rishikesh": 14, "Haridwar": 15
+    }
+    return sorted(destinations, key=lambda x: region_order.get(x, 999))
+
+
+def legacy_suggest_extensions(regional_extensions, destinations, available_days):
+    """Original per-query walk over every extension followed by a priority sort"""
+    suggestions = []
+    for destination in destinations:
+        if destination in regional_extensions:
+            for ext_key, extension in regional_extensions[destination].items():
+                if extension["additional_days"] <= available_days:
+                    suggestions.append({"from_city": destination, "extension": extension, "fits_duration": True})
+                else:
+                    suggestions.append({
+                        "from_city": destination,
+                        "extension": extension,
+                        "fits_duration": False,
+                        "requires_additional_days": extension["additional_days"] - available_days
+                    })
+    suggestions.sort(key=lambda x: x["extension"].get("priority", 999))
+    return suggestions
+
+
+def legacy_generate_itinerary_id():
+    """Original date prefix plus truncated uuid4"""
+    timestamp = datetime.now().strftime("%Y%m%d")
+    unique_code = str(uuid.uuid4())[:8].upper()
+    return f"T2I-{timestamp}-{unique_code}"
+
+
+def generate_ids_in_worker(worker_id, count):
+    """Draw IDs in a separate process, as one gunicorn worker would"""
+    generator = ItineraryIdGenerator(worker_id=worker_id)
+    return [generator.next_id() for _ in range(count)]
+
+
+def build_synthetic_optimizer(size, seed=11):
+    """Random planar cities with road-speed travel times between every pair"""
+    rng = random.Random(seed)
+    points = [(rng.uniform(0, 2000), rng.uniform(0, 2000)) for _ in range(size)]
+    cities = [f"City{i}" for i in range(size)]
+    travel_minutes = [[int(((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5) for bx, by in points] for ax, ay in points]
+    return RouteOptimizer(cities, travel_minutes), cities
+
+
+def build_synthetic_library(size, seed=7):
+    """Generate a large itinerary library over the known destinations"""
+    rng = random.Random(seed)
+    cities = sorted(set(T2IndiaComprehensiveSystem().destination_keywords.values()))
+    library = {}
+    for i in range(size):
+        destinations = rng.sample(cities, rng.randint(2, 5))
+        library[f"synthetic_{i}"] = {
+            "id": f"SY{i:05d}",
+            "name": f"Synthetic Itinerary {i}",
+            "destinations": destinations,
+            "duration": rng.randint(3, 21),
+            "route": destinations + [destinations[0]]
+        }
+    return library
+
+
+def build_synthetic_extensions(cities, per_city, seed=5):
+    """Generate a large regional extension catalog for the given cities"""
+    rng = random.Random(seed)
+    catalog = {}
+    for city in cities:
+        catalog[city] = {
+            f"extension_{i}": {
+                "destinations": [f"{city} Excursion {i}"],
+                "theme": f"Theme {i % 7}",
+                "description": "Synthetic extension",
+                "additional_days": rng.randint(1, 5),
+                "priority": rng.randint(1, 3),
+                "transport": "Road"
+            }
+            for i in range(per_city)
+        }
+    return catalog
+
+
+def build_synthetic_hub_network(remote_cities, hubs, airports_per_city=3, seed=13):
+    """Random remote cities with a few nearby airports each, and a symmetric flight time table"""
+    rng = random.Random(seed)
+    hub_names = [f"Hub{h}" for h in range(hubs)]
+    intermediate_hubs = {}
+    for c in range(remote_cities):
+        intermediate_hubs[f"Town{c}"] = {"nearest_airports": {
+            hub: {"travel_minutes": rng.randint(30, 360), "distance_km": rng.randint(20, 300)}
+            for hub in rng.sample(hub_names, airports_per_city)
+        }}
+    flights = {}
+    for i, a in enumerate(hub_names):
+        for b in hub_names[i + 1:]:
+            flights[a, b] = flights[b, a] = rng.randint(60, 240)
+    return intermediate_hubs, hub_names, lambda a, b: flights[a, b]
+
+
+def legacy_all_pairs_hub_routing(intermediate_hubs, hubs, flight_minutes, connection_minutes):
+    """Per-pair Python loops over every access and egress hub"""
+    access = {hub: {hub: 0} for hub in hubs}
+    for city, info in intermediate_hubs.items():
+        access[city] = {hub: details["travel_minutes"] for hub, details in info["nearest_airports"].items()}
+    best = {}
+    for origin, origin_hubs in access.items():
+        for destination, destination_hubs in access.items():
+            if origin == destination:
+                continue
+            best[origin, destination] = min(
+                a + (0 if h1 == h2 else flight_minutes(h1, h2) + connection_minutes) + b
+                for h1, a in origin_hubs.items() for h2, b in destination_hubs.items()
+            )
+    return best
+
+
+def legacy_identify_circuit(travel_circuits, destinations):
+    """First subset/superset circuit in catalog order, with sets rebuilt on every call"""
+    dest_set = set([d.lower().replace(" ", "_") for d in destinations])
+    for circuit_name, circuit_data in travel_circuits.items():
+        circuit_destinations = set([d.lower().replace(" ", "_") for d in circuit_data["destinations"]])
+        if dest_set.issubset(circuit_destinations) or circuit_destinations.issubset(dest_set):
+            return circuit_name, circuit_data
+    return None, None
+
+
+def build_synthetic_circuits(size, cities=200, seed=19):
+    """Regional circuits of 2-6 cities drawn from a shared city pool"""
+    rng = random.Random(seed)
+    pool = [f"City {i}" for i in range(cities)]
+    return {
+        f"circuit_{i}": {"destinations": rng.sample(pool, rng.randint(2, 6))}
+        for i in range(size)
+    }
+
+
+def legacy_suggest_route_order(destinations):
+    """Hardcoded region order, every other city at 999"""
+    region_order = {
+        "Delhi": 1, "Agra": 2, "Jaipur": 3,
+        "Mumbai": 4, "Goa": 5, "Bangalore": 6,
+        "Kochi": 7, "Kolkata": 8
+    }
+    sorted_destinations = sorted(destinations, key=lambda x: region_order.get(x, 999))
+    return sorted_destinations + [sorted_destinations[0]]
+
+
+def legacy_normalize_destination(destination_aliases, destination):
+    """Linear scan over every alias list"""
+    dest_lower = destination.lower().strip()
+    for standard, aliases in destination_aliases.items():
+        if dest_lower in aliases:
+            return standard.title()
+    return destination.title()
+
+
+def legacy_library_matches(existing_itineraries, destination_aliases, user_destinations, duration):
+    """Library matching that re-normalizes every itinerary destination per query"""
+    normalized = [legacy_normalize_destination(destination_aliases, d) for d in user_destinations]
+    matches = []
+    for itinerary in existing_itineraries.values():
+        itinerary_destinations = [legacy_normalize_destination(destination_aliases, d) for d in itinerary["destinations"]]
+        common = set(normalized) & set(itinerary_destinations)
+        match_percentage = len(common) / len(set(normalized) | set(itinerary_destinations))
+        duration_match = max(0, 1 - abs(itinerary["duration"] - duration) / 10) if duration else 1.0
+        score = match_percentage * 0.7 + duration_match * 0.3
+        if score > 0.3:
+            matches.append((itinerary["id"], score, sorted(common)))
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches
+
+
+def build_synthetic_agency_library(size, cities=600, region_size=15, seed=23):
+    """Agency-scale library: itineraries cluster in regions of neighbouring towns, some with a far add-on"""
+    rng = random.Random(seed)
+    towns = [f"Town{i}" for i in range(cities)]
+    library = {}
+    for i in range(size):
+        start = rng.randrange(cities - region_size)
+        destinations = rng.sample(towns[start:start + region_size], rng.randint(2, 6))
+        if rng.random() < 0.2:
+            destinations = list(dict.fromkeys(destinations + [rng.choice(towns)]))
+        library[f"agency_{i}"] = {
+            "id": f"AG{i:05d}",
+            "name": f"Agency Itinerary {i}",
+            "destinations": destinations,
+            "duration": rng.randint(3, 21),
+            "route": destinations + [destinations[0]]
+        }
+    return library
+
+
+COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from itinerary_library_integration import T2IndiaItineraryLibrary
+from t2india_data_registry import LIBRARY_TABLES, REFERENCE_TABLES, DataRegistry
+from t2india_data_store import get_data_store
+from t2india_itinerary_display_system import T2IndiaItineraryDisplaySystem
+reference_path, snapshot_path, source_path, library_size, mode = sys.argv[1:]
+
+class ParsedLibraryRegistry(DataRegistry):
+    # What every worker paid before the snapshot: the whole library parsed into its own heap
+    def reference(self, table):
+        if table in LIBRARY_TABLES:
+            return self.shared("parsed_library", None, lambda: json.load(open(source_path, encoding="utf-8")))[table]
+        return super().reference(table)
+
+registry_class = ParsedLibraryRegistry if mode == "json" else DataRegistry
+registry = registry_class(reference_store=get_data_store(reference_path, REFERENCE_TABLES),
+                          library_snapshot_path=snapshot_path, library_source_path=source_path)
+library = T2IndiaItineraryLibrary(registry)
+display = T2IndiaItineraryDisplaySystem(registry)
+elapsed = time.perf_counter() - started
+assert len(library.existing_itineraries) == int(library_size)
+with open("/proc/self/status") as f:
+    status = dict(line.split(":", 1) for line in f)
+stored_lsh = getattr(library.similarity_index, "keys", None) is getattr(library.existing_itineraries, "keys_column", 0)
+print(json.dumps({"seconds": elapsed, "anon_kib": int(status["RssAnon"].split()[0]),
+                  "file_kib": int(status["RssFile"].split()[0]), "snapshot": "library_snapshot" in registry.derived,
+                  "stored_lsh": stored_lsh}))
+"""
+
+
+def cold_start_worker(reference_path, snapshot_path, source_path, library_size, mode):
+    """Start-up time and resident memory of a fresh worker loading the library"""
+    output = subprocess.run(
+        [sys.executable, "-c", COLD_START_SCRIPT, reference_path, snapshot_path, source_path, str(library_size), mode],
+        check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report_timing(label, seconds, number):
+    """Print per-call timing for a benchmark run"""
+    print(f"  {label:<28} {seconds / number * 1e6:10.2f} µs/call")
+
+
+def benchmark_parse_user_input(number=2000):
+    """Compare the precompiled gazetteer against the original substring parser"""
+    system = T2IndiaComprehensiveSystem()
+
+    print("\n=== parse_user_input ===")
+    legacy_time = timeit.timeit(
+        lambda: [legacy_parse_user_input(q) for q in BENCHMARK_QUERIES], number=number
+    )
+    gazetteer_time = timeit.timeit(
+        lambda: [system.parse_user_input(q) for q in BENCHMARK_QUERIES], number=number
+    )
+    calls = number * len(BENCHMARK_QUERIES)
+    report_timing("legacy substring scan", legacy_time, calls)
+    report_timing("compiled gazetteer", gazetteer_time, calls)
+    print(f"  speedup: {legacy_time / gazetteer_time:.2f}x")
+
+    # Substring false positives the gazetteer no longer reports
+    for query in ["Spurious Kochi trip 4 days", "Jaipur-Udaipur 6 days via Agra"]:
+        legacy = legacy_parse_user_input(query)["destinations"]
+        current = system.parse_user_input(query)["destinations"]
+        if sorted(legacy) != sorted(current):
+            print(f"  {query!r}: legacy={legacy} gazetteer={current}")
+
+
+def benchmark_find_matching_itineraries(library_size=5000, number=20):
+    """Compare the posting-list matcher against the full library scan"""
+    system = T2IndiaComprehensiveSystem()
+    system.reload_itinerary_library(build_synthetic_library(library_size))
+    queries = [system.parse_user_input(q) for q in BENCHMARK_QUERIES]
+
+    print(f"\n=== find_matching_itineraries ({library_size} itineraries) ===")
+    legacy_time = timeit.timeit(
+        lambda: [legacy_find_matching_itineraries(system.itinerary_library, q["destinations"], q["duration"])[:3]
+                 for q in queries],
+        number=number
+    )
+    indexed_time = timeit.timeit(
+        lambda: [system.find_matching_itineraries(q["destinations"], q["duration"], limit=3) for q in queries],
+        number=number
+    )
+    calls = number * len(queries)
+    report_timing("legacy full scan + sort", legacy_time, calls)
+    report_timing("posting lists + heap", indexed_time, calls)
+    print(f"  speedup: {legacy_time / indexed_time:.2f}x")
+
+    # Rankings must match the legacy scan once zero-overlap itineraries are dropped
+    for q in queries:
+        legacy = [m for m in legacy_find_matching_itineraries(system.itinerary_library, q["destinations"], q["duration"])
+                  if m["common_destinations"]]
+        indexed = system.find_matching_itineraries(q["destinations"], q["duration"])
+        assert [m["itinerary"]["id"] for m in legacy] == [m["itinerary"]["id"] for m in indexed]
+        assert [m["match_score"] for m in legacy] == [m["match_score"] for m in indexed]
+    print("  rankings identical to legacy scan")
+
+
+def benchmark_optimize_route(number=20):
+    """Compare route cost and solve time of the optimizer against the region_order heuristic"""
+    system = T2IndiaComprehensiveSystem()
+    optimizer = system.route_optimizer
+    trips = [
+        ["Cochin", "Goa", "Hampi", "Delhi", "Kolkata"],
+        ["Mumbai", "Darjeeling", "Goa", "Rishikesh", "Cochin", "Puri"],
+        ["Delhi", "Mumbai", "Goa", "Kolkata", "Hampi", "Bangalore", "Cochin", "Puri", "Darjeeling", "Agra"]
+    ]
+
+    print("\n=== optimize_route (connectivity_matrix travel times) ===")
+    for trip in trips:
+        heuristic = legacy_region_order_route(trip)
+        solve_time = timeit.timeit(lambda: optimizer.optimize(trip, max_leg_minutes=7 * 60), number=number) / number
+        result = optimizer.optimize(trip, max_leg_minutes=7 * 60)
+        print(f"  {len(trip):2d} cities  heuristic {optimizer.route_minutes(heuristic) / 60:6.1f}h"
+              f"  optimized {result['total_minutes'] / 60:6.1f}h  ({result['method']}, {solve_time * 1000:.2f} ms)")
+        print(f"            {' → '.join(result['route'])}")
+
+    print("\n=== optimize_route (synthetic cities, input order as baseline) ===")
+    for size in (8, 12, 16, 24):
+        synthetic, cities = build_synthetic_optimizer(size)
+        runs = 1 if size >= 12 else number
+        solve_time = timeit.timeit(lambda: synthetic.optimize(cities), number=runs) / runs
+        result = synthetic.optimize(cities)
+        print(f"  {size:2d} cities  input order {synthetic.route_minutes(cities) / 60:6.1f}h"
+              f"  optimized {result['total_minutes'] / 60:6.1f}h  ({result['method']}, {solve_time * 1000:.2f} ms)")
+
+
+def benchmark_route_cost_evaluation(permutations=20000):
+    """Compare vectorized route costing on the connectivity graph against per-leg string parsing"""
+    system = T2IndiaComprehensiveSystem()
+    graph = system.connectivity_graph
+    rng = random.Random(5)
+    cities = [city for city in graph.cities if city in system.connectivity_matrix]
+    routes = [rng.sample(cities, len(cities)) for _ in range(permutations)]
+    route_ids = [[graph.city_ids[city] for city in route] for route in routes]
+
+    def parsed_route_hours(route):
+        total = 0.0
+        for a, b in zip(route, route[1:]):
+            options = system.connectivity_matrix.get(a, {}).get(b) or system.connectivity_matrix.get(b, {}).get(a) or {}
+            hours = [float(o["duration"].replace("h", "")) for o in options.values() if "duration" in o]
+            total += min(hours) if hours else 0
+        return total
+
+    print(f"\n=== route cost evaluation ({permutations} routes of {len(cities)} cities) ===")
+    parse_time = timeit.timeit(lambda: [parsed_route_hours(route) for route in routes], number=1)
+    array_time = timeit.timeit(lambda: graph.route_minutes(route_ids), number=1)
+    report_timing("string parsing per leg", parse_time, permutations)
+    report_timing("vectorized graph arrays", array_time, permutations)
+    print(f"  speedup: {parse_time / array_time:.2f}x")
+
+
+def benchmark_routing_engine(number=2000):
+    """Compare cold Dijkstra runs against cached shortest-path trees"""
+    engine = T2IndiaComprehensiveSystem().routing_engine
+    pairs = [("Hampi", "Mumbai"), ("Darjeeling", "Kolkata"), ("Hampi", "Darjeeling"), ("Puri", "Goa")]
+
+    print("\n=== multimodal routing engine ===")
+
+    def cold():
+        engine.clear_cache()
+        return [engine.shortest_path(a, b) for a, b in pairs]
+
+    cold_time = timeit.timeit(cold, number=number)
+    warm_time = timeit.timeit(lambda: [engine.shortest_path(a, b) for a, b in pairs], number=number)
+    k_best_time = timeit.timeit(lambda: engine.k_shortest_paths("Hampi", "Mumbai", k=3), number=number // 10)
+    calls = number * len(pairs)
+    report_timing("shortest path, cold tree", cold_time, calls)
+    report_timing("shortest path, cached tree", warm_time, calls)
+    report_timing("3-best paths (Yen)", k_best_time, number // 10)
+    for a, b in pairs:
+        path = engine.shortest_path(a, b)
+        print(f"  {a} → {b}: {' → '.join(path['path'])} ({path['minutes'] / 60:g}h)")
+
+
+def benchmark_query_cache(number=200):
+    """Compare cold processing against intent-cache hits for near-identical queries"""
+    system = T2IndiaComprehensiveSystem()
+    variants = ["Golden Triangle Delhi Agra Jaipur 6 days", "golden triangle delhi, agra and jaipur for 6 days",
+                "Cochin Goa Hampi Delhi Kolkata 18 days", "Kolkata, Delhi, Hampi, Goa, Cochin for 18 days"]
+
+    print("\n=== process_comprehensive_query intent cache ===")
+
+    def cold():
+        system.query_cache.clear()
+        return [system.process_comprehensive_query(q) for q in variants]
+
+    cold_time = timeit.timeit(cold, number=number)
+    system.query_cache.clear()
+    system.query_cache.hits = system.query_cache.misses = 0
+    warm_time = timeit.timeit(lambda: [system.process_comprehensive_query(q) for q in variants],
+                              number=number)
+    calls = number * len(variants)
+    report_timing("cache cleared per round", cold_time, calls)
+    report_timing("cache warm", warm_time, calls)
+    print(f"  stats: {system.query_cache.stats()}")
+
+
+def benchmark_process_batch(library_size=5000, unique_queries=300, repeats=20):
+    """Compare process_batch against looping process_comprehensive_query over a mixed batch"""
+    system = T2IndiaComprehensiveSystem()
+    system.reload_itinerary_library(build_synthetic_library(library_size))
+    rng = random.Random(3)
+    cities = sorted(set(system.destination_keywords.values()))
+    unique = [f"{' '.join(rng.sample(cities, rng.randint(2, 5)))} {rng.randint(3, 21)} days" for _ in range(unique_queries)]
+    batch = unique + BENCHMARK_QUERIES * repeats
+
+    print(f"\n=== process_batch ({len(batch)} queries, {library_size} itineraries) ===")
+
+    def looped():
+        system.query_cache.clear()
+        return [system.process_comprehensive_query(q) for q in batch]
+
+    def batched():
+        system.query_cache.clear()
+        return system.process_batch(batch)
+
+    # Batch scoring must agree with the scalar path
+    for single, grouped in zip(looped(), batched()):
+        assert single["library_matches"] == grouped["library_matches"]
+        assert single["recommendation"] == grouped["recommendation"]
+
+    loop_time = timeit.timeit(looped, number=3)
+    batch_time = timeit.timeit(batched, number=3)
+    report_timing("per-query loop", loop_time, 3 * len(batch))
+    report_timing("process_batch", batch_time, 3 * len(batch))
+    print(f"  speedup: {loop_time / batch_time:.2f}x")
+
+    # Pool workers route on the caller's bundle, so an in-process reload reaches them as well
+    connectivity = json.loads(json.dumps(system.connectivity_matrix))
+    connectivity["Delhi"]["Agra"]["road"]["duration"] = "30h"
+    system.reload_connectivity(connectivity)
+
+    def routed(max_workers):
+        system.query_cache.clear()
+        return [{key: value for key, value in result.items() if key not in ("query_id", "timestamp", "timing")}
+                for result in system.process_batch(unique, max_workers=max_workers)]
+
+    serial = routed(1)
+    assert routed(2) == serial and "\"minutes\": 1800" in json.dumps(serial)
+    system.close()
+
+
+def benchmark_lazy_result(number=200):
+    """Compare the route-only field selection against serializing the full result"""
+    system = T2IndiaComprehensiveSystem()
+
+    print("\n=== lazy comprehensive result (cache cleared per round) ===")
+
+    # The default result stays a plain, JSON-serializable dict
+    for query in BENCHMARK_QUERIES:
+        result = system.process_comprehensive_query(query)
+        assert type(result) is dict and json.loads(json.dumps(result))["user_input"] == query
+
+    def full():
+        system.query_cache.clear()
+        return [system.process_comprehensive_query(q) for q in BENCHMARK_QUERIES]
+
+    def route_only():
+        system.query_cache.clear()
+        return [system.process_comprehensive_query(q, lazy=True).to_dict(["recommendation.optimized_route"])
+                for q in BENCHMARK_QUERIES]
+
+    full_time = timeit.timeit(full, number=number)
+    route_time = timeit.timeit(route_only, number=number)
+    calls = number * len(BENCHMARK_QUERIES)
+    report_timing("full result", full_time, calls)
+    report_timing("route only", route_time, calls)
+    print(f"  speedup: {full_time / route_time:.2f}x")
+
+
+def benchmark_query_api(number=50):
+    """Malformed /query bodies are answered with a 400; a valid field-limited request end to end"""
+    from flask import Flask
+
+    from itinerary_api import itinerary_bp  # builds the blueprint's system on import
+
+    app = Flask(__name__)
+    app.register_blueprint(itinerary_bp)
+    client = app.test_client()
+    print("\n=== query API ===")
+
+    for path in ("/query", "/query/stream", "/query/stream.jsonl"):
+        for body in ({"query": 123}, {"query": ["Delhi"]}, {"query": {"city": "Delhi"}}, {}, ["Delhi"]):
+            response = client.post(path, json=body)
+            assert response.status_code == 400 and "error" in response.get_json(), (path, body)
+    assert client.post("/query", json={"query": "Delhi Agra", "fields": [1]}).status_code == 400
+
+    def limited():
+        return client.post("/query", json={"query": "Delhi Agra Jaipur 6 days", "fields": "recommendation.type"})
+
+    assert limited().get_json() == {"recommendation": {"type": "use_existing"}}
+    report_timing("POST /query, one field", timeit.timeit(limited, number=number), number)
+
+    # Hub routes are served from the precomputed table
+    route = client.get("/hub-route?origin=Hampi&destination=Darjeeling").get_json()
+    assert route == IntermediateConnectivitySystem().lookup_hub_route("Hampi", "Darjeeling")
+    assert client.post("/hub-route", json={"origin": "Hampi", "destination": 1}).status_code == 400
+    assert client.get("/hub-route?origin=Hampi&destination=Atlantis").status_code == 404
+    report_timing("GET /hub-route", timeit.timeit(
+        lambda: client.get("/hub-route?origin=Hampi&destination=Darjeeling"), number=number), number)
+
+
+def benchmark_id_generator(processes=4, per_process=50000, threads=8):
+    """Check uniqueness and ordering across processes and threads, and compare throughput with uuid4"""
+    print("\n=== itinerary ID generator ===")
+    id_format = re.compile(r"T2I-\d{8}-[0-9A-HJKMNP-TV-Z]{8}$")
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        batches = list(pool.map(generate_ids_in_worker, range(processes), [per_process] * processes))
+    all_ids = [itinerary_id for batch in batches for itinerary_id in batch]
+    assert len(set(all_ids)) == len(all_ids), "duplicate IDs across processes"
+    assert all(batch == sorted(batch) for batch in batches), "IDs not monotonic within a process"
+    assert all(id_format.match(itinerary_id) for itinerary_id in all_ids)
+    print(f"  {len(all_ids)} IDs from {processes} processes: unique, monotonic per process")
+
+    shared = ItineraryIdGenerator(worker_id=0)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        threaded = list(pool.map(lambda _: [shared.next_id() for _ in range(per_process // threads)], range(threads)))
+    threaded_ids = [itinerary_id for batch in threaded for itinerary_id in batch]
+    assert len(set(threaded_ids)) == len(threaded_ids), "duplicate IDs across threads"
+    print(f"  {len(threaded_ids)} IDs from {threads} threads sharing one generator: unique")
+
+    # Truncated uuid4 has 32 random bits; birthday collisions become likely within a single day's prefix
+    legacy_codes = [legacy_generate_itinerary_id() for _ in range(processes * per_process)]
+    print(f"  legacy uuid4[:8] duplicates in {len(legacy_codes)} IDs: {len(legacy_codes) - len(set(legacy_codes))}")
+
+    number = 100000
+    generator = ItineraryIdGenerator(worker_id=1)
+    legacy_time = timeit.timeit(legacy_generate_itinerary_id, number=number)
+    generator_time = timeit.timeit(generator.next_id, number=number)
+    report_timing("legacy uuid4 slice", legacy_time, number)
+    report_timing("snowflake generator", generator_time, number)
+    print(f"  speedup: {legacy_time / generator_time:.2f}x")
+
+
+def benchmark_extension_selection(per_city=200, number=200):
+    """Compare the legacy extension loop with the city index and knapsack selection on a large catalog"""
+    system = T2IndiaComprehensiveSystem()
+    cities = sorted(set(system.destination_keywords.values()))
+    system.reload_regional_extensions(build_synthetic_extensions(cities, per_city))
+    destinations = ["Cochin", "Goa", "Hampi", "Delhi", "Kolkata"]
+    available_days = 8
+
+    print(f"\n=== extension selection ({len(cities) * per_city} extensions, {available_days} free days) ===")
+
+    # The index must reproduce the legacy ordering exactly
+    legacy = legacy_suggest_extensions(system.regional_extensions, destinations, available_days)
+    assert legacy == system.suggest_extensions(destinations, available_days)
+
+    legacy_time = timeit.timeit(
+        lambda: legacy_suggest_extensions(system.regional_extensions, destinations, available_days)[:5],
+        number=number
+    )
+    index_time = timeit.timeit(lambda: system.suggest_extensions(destinations, available_days, limit=5), number=number)
+    knapsack_time = timeit.timeit(lambda: system.select_extensions(destinations, available_days), number=number)
+    report_timing("legacy loop + sort, top 5", legacy_time, number)
+    report_timing("city index merge, top 5", index_time, number)
+    report_timing("index + knapsack", knapsack_time, number)
+
+    legacy_top = [s for s in legacy[:5] if s["fits_duration"]]
+    selected = system.select_extensions(destinations, available_days)
+    for label, chosen in (("legacy top 5 (fitting)", legacy_top), ("knapsack", selected)):
+        days = sum(s["extension"]["additional_days"] for s in chosen)
+        score = sum(1 / s["extension"]["priority"] for s in chosen)
+        print(f"  {label:<24} {len(chosen)} extensions, {days} days, score {score:.2f}")
+
+    # An extension with an unusable priority is skipped; the rest of the data still loads
+    extensions = json.loads(json.dumps(system.regional_extensions))
+    broken = next(iter(extensions["Goa"]))
+    extensions["Goa"][broken]["priority"] = 0
+    system.reload_regional_extensions(extensions)
+    assert all(entry[2] is not extensions["Goa"][broken] for entry in system.extension_index["Goa"])
+    assert len(system.extension_index["Goa"]) == len(extensions["Goa"]) - 1
+    system.select_extensions(destinations, available_days)
+
+
+def benchmark_data_registry(instances=20):
+    """Per-instance construction time and retained memory with the shared data registry"""
+    print("\n=== engine construction with the shared data registry ===")
+    for engine in (T2IndiaIntegratedSystem, T2IndiaFinalSystem, T2IndiaItineraryDisplaySystem):
+        engine()  # the first instance loads the registry and builds the shared indexes
+        gc.collect()
+        tracemalloc.start()
+        started = timeit.default_timer()
+        kept = [engine() for _ in range(instances)]
+        elapsed = timeit.default_timer() - started
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {engine.__name__:<30} {elapsed / instances * 1000:7.2f} ms {retained / instances / 1024:8.1f} KiB per instance")
+        del kept
+    print(f"  worker max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+def benchmark_hot_reload(library_size=2000, reloads=20, readers=4):
+    """Serve queries from several threads while the itinerary library is reloaded underneath them"""
+    system = T2IndiaComprehensiveSystem()
+    libraries = [build_synthetic_library(library_size, seed=seed) for seed in (7, 8)]
+    print(f"\n=== hot reload under load ({reloads} reloads of {library_size} itineraries, {readers} readers) ===")
+
+    # Identity of every itinerary per library, to check matches against the bundle a request captured
+    members = {id(library): {id(itinerary) for itinerary in library.values()}
+               for library in libraries + [system.data.itinerary_library]}
+    stop = threading.Event()
+    errors = []
+    served = [0] * readers
+
+    def reader(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            try:
+                result = system.process_comprehensive_query(rng.choice(BENCHMARK_QUERIES), lazy=True)
+                library = members[id(result.data.itinerary_library)]
+                assert all(id(match["itinerary"]) in library for match in result["library_matches"])
+                result.to_dict()
+            except Exception as e:  # surfaced after the run
+                errors.append(e)
+            served[slot] += 1
+
+    threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(readers)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    for i in range(reloads):
+        system.reload_itinerary_library(libraries[i % 2])
+    reload_time = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, f"{len(errors)} requests failed during reloads, first: {errors[0]!r}"
+    report_timing("reload_itinerary_library", reload_time, reloads)
+    print(f"  {sum(served)} queries served during reloads, none failed")
+
+    # A pushed snapshot that passes the store's checks but breaks an index keeps the previous bundle
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.json")
+        tables = {table: getattr(system.data, table) for table in SNAPSHOT_TABLES}
+        write_snapshot(tables, "good", path)
+        store = DataStore(path, check_interval=0)
+        registry = DataRegistry(data_store=store)
+        pushed = T2IndiaComprehensiveSystem(registry)
+        extensions = json.loads(json.dumps(tables["regional_extensions"]))
+        next(iter(extensions["Delhi"].values())).pop("additional_days")
+        write_snapshot(dict(tables, regional_extensions=extensions), "broken", path)
+
+        builds = []
+        shared = registry.shared
+        registry.shared = lambda name, generation, builder: builds.append(name) or shared(name, generation, builder)
+        for query in BENCHMARK_QUERIES:
+            assert pushed.process_comprehensive_query(query)["user_input"] == query
+        assert store.current().version == "broken" and pushed.data.version == "good"
+        assert builds.count("comprehensive_data") == 1  # tried once, not on every request
+
+
+def benchmark_hub_routing_table(remote_cities=400, hubs=60, lookups=100000):
+    """Build the all-pairs hub table with min-plus products against per-pair loops, then time lookups"""
+    intermediate_hubs, hub_names, flight_minutes = build_synthetic_hub_network(remote_cities, hubs)
+    cities = remote_cities + hubs
+    print(f"\n=== all-pairs hub routing ({cities} cities, {hubs} hubs) ===")
+
+    started = timeit.default_timer()
+    legacy = legacy_all_pairs_hub_routing(intermediate_hubs, hub_names, flight_minutes, 120)
+    legacy_time = timeit.default_timer() - started
+    started = timeit.default_timer()
+    table = HubRoutingTable.build(intermediate_hubs, hub_names, flight_minutes, lambda hub: 120)
+    table_time = timeit.default_timer() - started
+    report_timing("per-pair loops", legacy_time, 1)
+    report_timing("min-plus products", table_time, 1)
+
+    # The vectorized table must agree with the loops on every pair
+    for (origin, destination), minutes in legacy.items():
+        assert table.lookup(origin, destination)["minutes"] == minutes
+
+    rng = random.Random(3)
+    pairs = [(rng.choice(table.cities), rng.choice(table.cities)) for _ in range(lookups)]
+    lookup_time = timeit.timeit(lambda: [table.lookup(o, d) for o, d in pairs], number=1)
+    report_timing("table lookup", lookup_time, lookups)
+    size = sum(a.nbytes for a in (table.minutes, table.ground_km, table.access_hub, table.egress_hub))
+    print(f"  table size: {size / 1024:.1f} KiB")
+
+    # The online path loads the nightly table while it matches the reference data, and rebuilds otherwise
+    system = IntermediateConnectivitySystem()
+    built = system.build_hub_routing_table()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "hub_routing_table.npz")
+        built.save(path)
+        system.build_hub_routing_table = lambda fingerprint=None: None
+        started = timeit.default_timer()
+        loaded = system.load_hub_routing_table(path)
+        report_timing("load nightly table", timeit.default_timer() - started, 1)
+        assert loaded.fingerprint == built.fingerprint and (loaded.minutes == built.minutes).all()
+        assert loaded.lookup("Hampi", "Darjeeling") == built.lookup("Hampi", "Darjeeling")
+        stale = HubRoutingTable(built.cities, built.hubs, built.minutes, built.ground_km,
+                                built.access_hub, built.egress_hub, "older reference data")
+        stale.save(path)
+        assert system.load_hub_routing_table(path) is None  # not served: falls back to a build
+
+
+def benchmark_flight_time_model(number=200000, tolerance_minutes=45):
+    """Flight estimates against the connectivity matrix durations, and lookup cost against the old constant"""
+    system = IntermediateConnectivitySystem()
+    graph = T2IndiaComprehensiveSystem().connectivity_graph
+    flight = graph.mode_ids["flight"]
+    print("\n=== flight time model vs connectivity matrix ===")
+
+    errors, constant_errors = [], []
+    for (i, j) in graph.pair_modes:
+        listed = int(graph.minutes[flight, i, j])
+        if listed == MISSING:
+            continue
+        origin, destination = graph.cities[i], graph.cities[j]
+        estimate = system.estimate_flight_minutes(origin, destination)
+        print(f"  {origin + ' → ' + destination:<22} listed {listed:4d} min, estimated {estimate:4d} min")
+        assert abs(estimate - listed) <= tolerance_minutes, (origin, destination, estimate, listed)
+        errors.append(abs(estimate - listed))
+        constant_errors.append(abs(FLIGHT_ESTIMATES["medium"] - listed))
+    print(f"  mean absolute error: model {sum(errors) / len(errors):.1f} min, "
+          f"constant {sum(constant_errors) / len(constant_errors):.1f} min over {len(errors)} flights")
+
+    model = system.current_flight_model()
+    assert type(model.flight_minutes("Bagdogra", "Mumbai")) is int
+    constant_time = timeit.timeit(lambda: FLIGHT_ESTIMATES["medium"], number=number)
+    pair_minutes = model.pair_minutes
+    probe_time = timeit.timeit(lambda: pair_minutes.get(("Bagdogra", "Mumbai"), 150), number=number)
+    lookup_time = timeit.timeit(lambda: model.flight_minutes("Bagdogra", "Mumbai"), number=number)
+    model_time = timeit.timeit(lambda: system.estimate_flight_minutes("Bagdogra", "Mumbai"), number=number)
+    passed_time = timeit.timeit(lambda: system.estimate_flight_minutes("Bagdogra", "Mumbai", model), number=number)
+    report_timing("constant estimate", constant_time, number)
+    report_timing("pair_minutes probe (inline)", probe_time, number)
+    report_timing("model.flight_minutes", lookup_time, number)
+    report_timing("estimate_flight_minutes", model_time, number)
+    report_timing("estimate, model passed in", passed_time, number)
+
+    # Routes carry their flight minutes from the build, so a journey total reads them like the constant
+    route = system.find_intermediate_hub("Darjeeling", "Mumbai")
+    flight_leg = next(leg for leg in system.route_legs(route) if leg["transport"] == "flight")
+    assert flight_leg["minutes"] == model.flight_minutes(flight_leg["from"], flight_leg["to"])
+    leg_time = timeit.timeit(lambda: flight_leg["minutes"], number=number)
+    total_time = timeit.timeit(lambda: system.calculate_total_journey_time(route, model), number=number)
+    report_timing("precomputed leg minutes", leg_time, number)
+    report_timing(f"journey total, {len(system.route_legs(route))} legs", total_time, number)
+
+
+def benchmark_hub_selection(number=200):
+    """Ranking every access/egress hub option for all city pairs, cold and from the pair cache"""
+    system = IntermediateConnectivitySystem()
+    table = system.hub_routing_table()
+    pairs = [(o, d) for o in table.cities for d in table.cities if o != d]
+    print(f"\n=== hub selection ({len(pairs)} city pairs) ===")
+
+    def rank_cold():
+        system.route_cache().clear()
+        return [system.find_intermediate_hub(o, d) for o, d in pairs]
+
+    routes = rank_cold()
+    for (origin, destination), route in zip(pairs, routes):
+        if route.get("direct_connection"):
+            continue
+        # The chosen hub beats every alternative, and no option is faster than the all-pairs table allows
+        scores = [system.route_score(r) for r in system.get_all_possible_routes(origin, destination)]
+        assert scores[0] == min(scores)
+        assert system.calculate_total_journey_time(route)["total_minutes"] >= table.lookup(origin, destination)["minutes"]
+        # No flight from an airport to itself, and no endpoint reported as the hub
+        assert all(leg["from"] != leg["to"] for leg in system.route_legs(route))
+        assert route.get("intermediate_hub") not in (origin, destination)
+    assert system.find_intermediate_hub("Hampi", "Darjeeling")["route_type"] == "A→C→C'→B"
+    # Road-only options cost the same both ways
+    by_road = {
+        (origin, destination): next(r for r in system.get_all_possible_routes(origin, destination)
+                                    if r["route_type"].startswith("A→B (road)"))
+        for origin, destination in (("Hampi", "Bangalore"), ("Bangalore", "Hampi"))
+    }
+    assert all("intermediate_hub" not in r and system.calculate_total_journey_time(r)["total_minutes"] == 360
+               for r in by_road.values())
+    assert system.find_intermediate_hub("Hampi", "Hubli")["route_type"] == "A→B (road)"
+    # Annotating a returned route must not reach the shared cache
+    annotated = system.find_intermediate_hub("Hampi", "Darjeeling")
+    annotated["route_type"] = "annotated"
+    annotated["leg1"]["minutes"] = -1
+    fresh = system.get_all_possible_routes("Hampi", "Darjeeling")[0]
+    assert fresh["route_type"] == "A→C→C'→B" and fresh["leg1"]["minutes"] != -1
+
+    cold_time = timeit.timeit(rank_cold, number=number // 10)
+    cached_time = timeit.timeit(lambda: [system.find_intermediate_hub(o, d) for o, d in pairs], number=number)
+    report_timing("rank all pairs, cold", cold_time, number // 10)
+    report_timing("rank all pairs, cached", cached_time, number)
+
+
+def benchmark_day_scheduler(cities=10, days=18, number=50, budget_ms=50):
+    """Schedule an 18-day, 10-city route into clock-timed days"""
+    rng = random.Random(17)
+    route = [f"City{i}" for i in range(cities)]
+    scheduler = DayScheduler()
+    print(f"\n=== day scheduler ({cities} cities, {days} days) ===")
+
+    worst = 0
+    for _ in range(number):
+        leg_minutes = [rng.choice([None, rng.randint(30, 540)]) for _ in range(cities - 1)]
+        started = timeit.default_timer()
+        schedule = scheduler.schedule(route, leg_minutes, days)
+        worst = max(worst, timeit.default_timer() - started)
+
+        assert schedule["scheduled_days"] >= days
+        assert [day["day"] for day in schedule["days"]] == list(range(1, schedule["scheduled_days"] + 1))
+        legs = [(a["from"], a["to"]) for day in schedule["days"] for a in day["activities"] if a["type"] == "travel"]
+        assert legs == list(zip(route, route[1:]))
+        for day in schedule["days"]:
+            assert day["sightseeing_minutes"] <= 180
+            assert day["feasible"] == (day["day"] not in schedule["infeasible_days"])
+            if day["travel_minutes"] > 420:
+                assert not day["feasible"]
+
+    print(f"  worst case: {worst * 1000:.2f} ms over {number} random routes")
+    assert worst * 1000 < budget_ms
+
+
+def stand_in_flight_service(origin, destination, latency=0.02):
+    """Remote fare lookup stand-in: fixed network latency, deterministic answer"""
+    time.sleep(latency)
+    return {"origin": origin, "destination": destination, "seats": len(origin) + len(destination)}
+
+
+def benchmark_segment_analysis(number=5):
+    """Serial per-segment analysis against deduplicated, pooled analysis with a slow per-segment service"""
+    route = ["Delhi", "Agra", "Jaipur", "Delhi", "Hampi", "Goa", "Hampi", "Goa", "Cochin", "Delhi",
+             "Agra", "Jaipur", "Delhi", "Darjeeling"]
+    segments = list(zip(route, route[1:]))
+    system = T2IndiaIntegratedSystem(segment_lookups={"flights": stand_in_flight_service})
+    connectivity = system.connectivity_system
+    print(f"\n=== segment analysis ({len(segments)} segments, {len(set(segments))} distinct, 20 ms lookup) ===")
+
+    def legacy():
+        analysis = {}
+        for origin, destination in segments:
+            routing_options = connectivity.get_all_possible_routes(origin, destination)
+            stand_in_flight_service(origin, destination)
+            analysis[f"{origin}→{destination}"] = routing_options
+        # Formatting recalculated every non-direct segment's timing
+        for routing_options in analysis.values():
+            if not routing_options[0].get("direct_connection"):
+                connectivity.calculate_total_journey_time(routing_options[0])
+        return analysis
+
+    expected = legacy()
+    analyses = system.analyze_segments(segments)
+    assert {f"{o}→{d}": a["routing_options"] for (o, d), a in analyses.items()} == expected
+    assert all(a["lookups"]["flights"] == stand_in_flight_service(o, d, 0) for (o, d), a in analyses.items())
+    # A connectivity reload swaps the routing engine, so analyses from the old one are not served
+    comprehensive = system.comprehensive_system
+    stale = system.segment_cache(comprehensive.data)
+    comprehensive.reload_connectivity(dict(comprehensive.connectivity_matrix))
+    assert system.segment_cache(comprehensive.data) is not stale
+    assert system.analyze_segments(segments) == analyses
+
+    report_timing("serial, every segment", timeit.timeit(legacy, number=number), number)
+    report_timing("deduplicated, thread pool", timeit.timeit(lambda: system.analyze_segments(segments), number=number), number)
+    system.close()
+    assert system.segment_pool is None
+
+    # Concurrent first requests share one pool
+    fresh = T2IndiaIntegratedSystem(segment_lookups={"flights": stand_in_flight_service})
+    with ThreadPoolExecutor(max_workers=8) as callers:
+        pools = set(callers.map(lambda _: fresh.segment_thread_pool(), range(32)))
+    assert len(pools) == 1
+    fresh.close()
+
+
+def benchmark_circuit_index(size=500, queries=300, number=5):
+    """Legacy first-match circuit scan against the bitset index on a large catalog"""
+    circuits = build_synthetic_circuits(size)
+    index = CircuitIndex(circuits)
+    rng = random.Random(23)
+    names = list(circuits)
+    requests = []
+    for _ in range(queries):
+        cities = list(circuits[rng.choice(names)]["destinations"])
+        roll = rng.random()
+        if roll < 0.4:
+            cities = cities[:rng.randint(1, len(cities))]  # part of a circuit
+        elif roll < 0.8:
+            cities += list(circuits[rng.choice(names)]["destinations"]) + ["Nowhere"]  # more than a circuit
+        requests.append(cities)
+    print(f"\n=== circuit detection ({size} circuits, {queries} requests) ===")
+
+    for cities in requests:
+        legacy_name, _ = legacy_identify_circuit(circuits, cities)
+        ranked = index.rank(cities)
+        assert (legacy_name is None) == (not ranked)
+        if ranked:
+            # Best Jaccard overlap among every circuit the legacy check accepts
+            wanted = {c.lower().replace(" ", "_") for c in cities}
+            best = max(
+                len(wanted & members) / len(wanted | members)
+                for members in ({c.lower().replace(" ", "_") for c in data["destinations"]} for data in circuits.values())
+                if wanted <= members or members <= wanted
+            )
+            assert abs(ranked[0][0] - best) < 1e-12
+
+    legacy_time = timeit.timeit(lambda: [legacy_identify_circuit(circuits, c) for c in requests], number=number)
+    index_time = timeit.timeit(lambda: [index.best(c) for c in requests], number=number)
+    report_timing("legacy first match", legacy_time, number * queries)
+    report_timing("bitset index, best match", index_time, number * queries)
+
+
+def benchmark_route_ordering(sizes=(5, 10, 20), trips=30, exact_limit=10):
+    """Geo nearest-neighbour + 2-opt ordering against the region sort and, up to 10 cities, the exact tour"""
+    engine = ItinerarySuggestionEngine()
+    geo = engine.geo_index
+    rng = random.Random(29)
+    print("\n=== route ordering by coordinates ===")
+
+    # Destinations keep the order they are named in, so a custom route starts at the first one
+    named = engine.extract_destinations("Mumbai Kolkata Puri Hampi trip")
+    assert named == ["Mumbai", "Kolkata", "Puri", "Hampi"] and engine.suggest_route_order(named)[0] == "Mumbai"
+
+    def tour_km(route):
+        return sum(geo.distance(a, b) for a, b in zip(route, route[1:]))
+
+    for size in sizes:
+        requests = [rng.sample(geo.cities, size) for _ in range(trips)]
+        legacy_km = new_km = exact_km = 0
+        for cities in requests:
+            closed = engine.suggest_route_order(cities)
+            opened = engine.suggest_route_order(cities, exit_point=cities[-1])
+            assert closed[0] == closed[-1] == cities[0] and sorted(closed[:-1]) == sorted(cities)
+            assert opened[0] == cities[0] and opened[-1] == cities[-1] and sorted(opened) == sorted(cities)
+            legacy_km += tour_km(legacy_suggest_route_order(cities))
+            new_km += tour_km(closed)
+            if size <= exact_limit:
+                exact = RouteOptimizer(cities, geo.submatrix(cities).round().astype(int), exact_limit=exact_limit)
+                exact_km += tour_km(exact.optimize(cities, entry_point=cities[0], exit_point=cities[0])["route"])
+
+        closed_time = timeit.timeit(lambda: [engine.suggest_route_order(c) for c in requests], number=5)
+        open_time = timeit.timeit(lambda: [engine.suggest_route_order(c, exit_point=c[-1]) for c in requests], number=5)
+        legacy_time = timeit.timeit(lambda: [legacy_suggest_route_order(c) for c in requests], number=5)
+        print(f"  {size} cities:")
+        report_timing("  region sort", legacy_time, 5 * trips)
+        report_timing("  closed tour", closed_time, 5 * trips)
+        report_timing("  open tour", open_time, 5 * trips)
+        gap = f", exact {exact_km / trips:,.0f} km" if exact_km else ""
+        print(f"    mean closed tour: region sort {legacy_km / trips:,.0f} km, geo {new_km / trips:,.0f} km{gap}")
+
+
+def benchmark_destination_normalization(library_size=5000, number=10):
+    """Per-query alias scans against the alias map with load-time library normalization"""
+    library = T2IndiaItineraryLibrary()
+    library.existing_itineraries = build_synthetic_library(library_size)
+    library.normalized_destinations = library.normalize_library()
+    aliases = library.destination_aliases
+    queries = [(["Delhi", "Agra", "Jaipur"], 6), (["Cochin", "Goa", "Hampi", "Delhi", "Kolkata"], 18),
+               (["Calcutta", "Darjeeling"], 7), (["Pink City", "Blue City", "Udaipur"], 9)]
+    print(f"\n=== destination normalization ({library_size} itineraries) ===")
+
+    for destinations, duration in queries:
+        legacy = legacy_library_matches(library.existing_itineraries, aliases, destinations, duration)
+        current = [(m["itinerary"]["id"], m["match_score"], sorted(m["common_destinations"]))
+                   for m in library.find_matching_itineraries(destinations, duration)]
+        assert legacy == current
+
+    legacy_time = timeit.timeit(
+        lambda: [legacy_library_matches(library.existing_itineraries, aliases, d, n) for d, n in queries], number=number)
+    index_time = timeit.timeit(lambda: [library.find_matching_itineraries(d, n) for d, n in queries], number=number)
+    report_timing("per-query alias scans", legacy_time, number * len(queries))
+    report_timing("alias map, prenormalized", index_time, number * len(queries))
+
+    # Typos resolve through the trigram index; repeats come from its cache
+    typos = {"Jaipure": "Jaipur", "Cochi": "Kochi", "Calcuta": "Kolkata", "Udaipr": "Udaipur", "Darjeling": "Darjeeling"}
+    index = library.alias_index
+    for typo, expected in typos.items():
+        assert library.normalize_destination(typo) == expected
+    assert library.normalize_destination("Mumbai") == "Mumbai"  # unknown names pass through
+    # Canonical keys resolve, and take typos, even when their alias list leaves them out
+    keyed = DestinationAliasIndex({"kochi": ["cochin"], "kolkata": ["calcutta"]})
+    assert keyed.normalize("KOCHI") == keyed.normalize("kochy") == keyed.normalize("cochin") == "Kochi"
+    cold_time = timeit.timeit(lambda: [index.find_fuzzy_match(t.lower()) for t in typos], number=200)
+    cached_time = timeit.timeit(lambda: [index.normalize(t) for t in typos], number=200)
+    report_timing("typo, trigram lookup", cold_time, 200 * len(typos))
+    report_timing("typo, cached", cached_time, 200 * len(typos))
+
+
+def benchmark_minhash_matching(library_size=50000, queries=200, k=3, thresholds=(0.2, 0.3, 0.5), min_recall=0.9):
+    """Top-k library matches through MinHash/LSH candidates against the exact full scan"""
+    library = T2IndiaItineraryLibrary()
+    assert library.similarity_index is None  # the shipped library is small enough to scan
+    assert library.find_similar_itineraries(["Delhi", "Agra", "Jaipur"], 6) == \
+        library.find_matching_itineraries(["Delhi", "Agra", "Jaipur"], 6)[:3]
+
+    library.existing_itineraries = build_synthetic_agency_library(library_size)
+    library.normalized_destinations = library.normalize_library()
+    rng = random.Random(3)
+    itineraries = list(library.existing_itineraries.values())
+    requests = []
+    for _ in range(queries):
+        # Requests resemble past trips: a city dropped or an extra one wanted
+        destinations = list(rng.choice(itineraries)["destinations"])
+        if len(destinations) > 2 and rng.random() < 0.5:
+            destinations.pop(rng.randrange(len(destinations)))
+        if rng.random() < 0.5:
+            destinations.append(f"Town{rng.randrange(600)}")
+        requests.append((destinations, rng.randint(3, 21)))
+    print(f"\n=== MinHash/LSH top-{k} matching ({library_size} itineraries, {queries} queries) ===")
+
+    start = time.perf_counter()
+    exact = [library.find_matching_itineraries(d, n, limit=k) for d, n in requests]
+    report_timing("full scan", time.perf_counter() - start, queries)
+
+    for threshold in thresholds:
+        library.lsh_threshold = threshold
+        start = time.perf_counter()
+        library.similarity_index = library.build_similarity_index()
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = [library.find_similar_itineraries(d, n, k=k) for d, n in requests]
+        seconds = time.perf_counter() - start
+
+        # A returned match counts when it scores at least the k-th exact score (ties are interchangeable)
+        hits = total = 0
+        for exact_matches, matches in zip(exact, found):
+            scores = [m["match_score"] for m in matches]
+            assert scores == sorted(scores, reverse=True) and len(matches) <= len(exact_matches)
+            if exact_matches:
+                floor = exact_matches[-1]["match_score"]
+                hits += sum(score >= floor for score in scores)
+                total += len(exact_matches)
+        recall = hits / total
+        candidates = sum(len(library.similarity_index.candidates(set(d))) for d, _ in requests) / queries
+        index = library.similarity_index
+        report_timing(f"LSH t={threshold} ({index.bands}x{index.rows})", seconds, queries)
+        print(f"    recall@{k} {recall:.3f}, {candidates:.0f} candidates/query, index built in {build_seconds:.2f}s")
+        if threshold == LSH_THRESHOLD:
+            assert recall >= min_recall
+
+
+def benchmark_library_snapshot(library_size=50000, small_library_size=5000):
+    """Fresh-worker start-up parsing the library JSON against mapping the library snapshot, at two library sizes"""
+    if not os.path.exists("/proc/self/status"):
+        print("\n=== library snapshot: skipped (needs /proc) ===")
+        return
+    registry = get_data_registry()
+    destination_aliases = registry.reference("destination_aliases")
+    # Workers' reference data carries no library tables; only the snapshot build reads the source
+    assert not set(LIBRARY_TABLES) & set(registry.reference_store.current().tables)
+    with open(DEFAULT_LIBRARY_SOURCE_PATH, encoding="utf-8") as f:
+        source = json.load(f)
+    library = {
+        key: dict(itinerary, bookings=i % 500, rating=round(3.5 + (i % 15) / 10, 1), price_range="₹20,000",
+                  highlights=itinerary["destinations"][:2], tags=["heritage"])
+        for i, (key, itinerary) in enumerate(build_synthetic_agency_library(library_size).items())
+    }
+    print(f"\n=== library snapshot cold start ({small_library_size} and {library_size} itineraries) ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        reference_path = registry.reference_store.path
+        startup = {}
+        for size in (small_library_size, library_size):
+            source["existing_itineraries"] = dict(list(library.items())[:size])
+            source_path = os.path.join(directory, f"library_source_{size}.json")
+            snapshot_path = os.path.join(directory, f"library_{size}.snapshot")
+            with open(source_path, "w", encoding="utf-8") as f:
+                json.dump(source, f, ensure_ascii=False)
+            started = time.perf_counter()
+            build_library_snapshot(source_path, snapshot_path, destination_aliases)
+            print(f"  {size} snapshot built in {time.perf_counter() - started:.2f}s: "
+                  f"{os.path.getsize(snapshot_path) / 2 ** 20:.1f} MiB "
+                  f"(library JSON {os.path.getsize(source_path) / 2 ** 20:.1f} MiB)")
+
+            modes = (("snapshot mapped", "snapshot"),) if size == small_library_size else \
+                (("library JSON parsed", "json"), ("snapshot mapped", "snapshot"))
+            for label, mode in modes:
+                result = cold_start_worker(reference_path, snapshot_path, source_path, size, mode)
+                assert result["snapshot"] == (mode == "snapshot") and result["stored_lsh"] == (mode == "snapshot")
+                startup[size, mode] = result["seconds"]
+                print(f"  {f'{size}, {label}':<31} {result['seconds'] * 1000:8.0f} ms start-up, "
+                      f"{result['anon_kib'] / 1024:6.1f} MiB private + {result['file_kib'] / 1024:5.1f} MiB shared RSS")
+
+        snapshot = LibrarySnapshot(snapshot_path)
+        stat = os.stat(source_path)
+        assert snapshot.source_sha256 == file_sha256(source_path)
+        assert snapshot.source_signature == (stat.st_mtime_ns, stat.st_size)
+        mapped = snapshot.tables["existing_itineraries"]
+        assert list(mapped) == list(library) and len(mapped) == library_size
+        for key in random.Random(5).sample(list(library), 200):
+            assert key in mapped and mapped[key] == library[key]
+        assert "missing" not in mapped and mapped.get(7) is None
+        assert dict(snapshot.tables["itinerary_database"]) == source["itinerary_database"]
+
+        # Destination sets and LSH buckets from the mapping agree with building them in the worker
+        mapped_library = T2IndiaItineraryLibrary(DataRegistry(
+            reference_store=registry.reference_store, library_snapshot_path=snapshot_path,
+            library_source_path=source_path
+        ))
+        built_library = T2IndiaItineraryLibrary()
+        built_library.existing_itineraries = library
+        built_library.normalized_destinations = built_library.normalize_library()
+        built_library.similarity_index = built_library.build_similarity_index()
+        assert mapped_library.similarity_index.keys is mapped_library.existing_itineraries.keys_column
+        for itinerary in random.Random(6).sample(list(library.values()), 200):
+            itinerary_id = itinerary["id"]
+            assert mapped_library.normalized_destinations[itinerary_id] == built_library.normalized_destinations[itinerary_id]
+        for destinations, days in (("Delhi Agra Jaipur".split(), 6), (["Goa", "Hampi"], 5), (["Leh", "Manali"], 9)):
+            assert mapped_library.find_similar_itineraries(destinations, days) == \
+                built_library.find_similar_itineraries(destinations, days)
+        lookup_time = timeit.timeit(lambda: mapped[key], number=20000)
+        report_timing("mapped key lookup", lookup_time, 20000)
+        # Start-up maps the library instead of indexing it: ten times the itineraries costs well under ten times
+        growth = startup[library_size, "snapshot"] - startup[small_library_size, "snapshot"]
+        print(f"  start-up growth from {small_library_size} to {library_size} itineraries: {growth * 1000:.0f} ms")
+        assert growth < 0.5 * startup[small_library_size, "snapshot"], startup
+
+    # An edited source is caught by its (mtime, size) signature, even with the version left alone, and rebuilt
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "library_source.json")
+        snapshot_path = os.path.join(directory, "library.snapshot")
+        with open(DEFAULT_LIBRARY_SOURCE_PATH, encoding="utf-8") as f:
+            source = json.load(f)
+        with open(source_path, "w", encoding="utf-8") as f:
+            json.dump(source, f, ensure_ascii=False)
+        build_library_snapshot(source_path, snapshot_path)
+        key = next(iter(source["itinerary_database"]))
+        source["itinerary_database"][key]["name"] = "Renamed Itinerary"
+        with open(source_path, "w", encoding="utf-8") as f:
+            json.dump(source, f, ensure_ascii=False)
+        assert LibrarySnapshot(snapshot_path).version == source["version"]
+        edited = DataRegistry(reference_store=registry.reference_store,
+                              library_snapshot_path=snapshot_path, library_source_path=source_path)
+        assert edited.reference("itinerary_database")[key]["name"] == "Renamed Itinerary"
+
+
+def benchmark_itinerary_fitting(library_size=5000, queries=200, number=3):
+    """Fit every top-10 library match to a request and pick the base needing the least rework"""
+    library = T2IndiaItineraryLibrary()
+    library.existing_itineraries = build_synthetic_library(library_size)
+    library.normalized_destinations = library.normalize_library()
+    library.similarity_index = library.build_similarity_index()
+    cities = sorted(library.fitter.city_ids)
+    rng = random.Random(29)
+    requests = [(rng.sample(cities, rng.randint(2, 6)), rng.randint(3, 16)) for _ in range(queries)]
+    print(f"\n=== itinerary fitting (top {FIT_CANDIDATES} of {library_size} itineraries, {queries} requests) ===")
+
+    fits = 0
+    for destinations, days in requests:
+        matches = library.find_similar_itineraries(destinations, days, k=FIT_CANDIDATES)
+        fitted = [library.fit_itinerary(match["itinerary"], destinations, days) for match in matches]
+        fits += len(fitted)
+        for plan in fitted:
+            assert {library.normalize_destination(d) for d in destinations} <= set(plan["route"])
+            if plan["feasible"]:
+                assert plan["duration"] == days
+                assert all(stay["days"] >= stay["min_days"] for stay in plan["stays"])
+        result = library.generate_hybrid_itinerary("", destinations, days)
+        if matches:
+            chosen = result["existing_match"]["modified_itinerary"]["modification_cost"]
+            assert chosen == min(plan["modification_cost"] for plan in fitted)
+
+    def fit_all():
+        for destinations, days in requests:
+            for match in library.find_similar_itineraries(destinations, days, k=FIT_CANDIDATES):
+                library.fit_itinerary(match["itinerary"], destinations, days)
+
+    fit_time = timeit.timeit(fit_all, number=number)
+    hybrid_time = timeit.timeit(lambda: [library.generate_hybrid_itinerary("", d, n) for d, n in requests], number=number)
+    report_timing("match + fit top 10", fit_time, number * queries)
+    report_timing("generate_hybrid_itinerary", hybrid_time, number * queries)
+    print(f"    {fits / queries:.1f} fits per request")
+
+
+def legacy_process_user_query(system, user_input, out):
+    """process_user_query before the single-parse pipeline: every stage re-parses, and every call prints"""
+    print(f"Processing: {user_input}", file=out)
+    destinations = system.routing_engine.extract_destinations(user_input)
+    duration = system.extract_duration(user_input)
+    library_result = system.itinerary_library.generate_hybrid_itinerary(user_input, destinations, duration)
+    routing_result = system.routing_engine.suggest_itinerary(user_input)
+    return {
+        "user_query": user_input,
+        "parsed_destinations": destinations,
+        "parsed_duration": duration,
+        "library_check": library_result,
+        "routing_suggestions": routing_result,
+        "handicraft_options": system.get_handicraft_options(destinations),
+        "final_recommendation": system.generate_final_recommendation(
+            library_result, routing_result, destinations, duration
+        )
+    }
+
+
+def benchmark_final_pipeline(number=200):
+    """Single-parse process_user_query against re-parsing in every stage
+
+    Parsing is a small share of a request (library fitting dominates), so
+    removing the repeated parse barely moves the total; see the stage breakdown.
+    """
+    system = T2IndiaFinalSystem()
+    print(f"\n=== final system pipeline ({len(BENCHMARK_QUERIES)} queries) ===")
+
+    with open(os.devnull, "w") as out:
+        for query in BENCHMARK_QUERIES:
+            result = system.process_user_query(query, debug=True)
+            debug = result.pop("debug")
+            assert result == legacy_process_user_query(system, query, out)
+            assert debug["parsed_query"]["destinations"] == result["parsed_destinations"]
+
+        # Best of several repeats: single calls are short enough for scheduler noise to dominate
+        legacy_time = min(timeit.repeat(
+            lambda: [legacy_process_user_query(system, q, out) for q in BENCHMARK_QUERIES], number=number, repeat=5
+        ))
+    single_time = min(timeit.repeat(
+        lambda: [system.process_user_query(q) for q in BENCHMARK_QUERIES], number=number, repeat=5
+    ))
+    debug_time = min(timeit.repeat(
+        lambda: [system.process_user_query(q, debug=True) for q in BENCHMARK_QUERIES], number=number, repeat=5
+    ))
+    calls = number * len(BENCHMARK_QUERIES)
+    report_timing("re-parse per stage + print", legacy_time, calls)
+    report_timing("single parse", single_time, calls)
+    report_timing("single parse, debug", debug_time, calls)
+
+    totals = {}
+    for _ in range(number):
+        for query in BENCHMARK_QUERIES:
+            for stage, ms in system.process_user_query(query, debug=True)["debug"]["stage_timings_ms"].items():
+                totals[stage] = totals.get(stage, 0) + ms
+    for stage, ms in totals.items():
+        print(f"    {stage:<26} {ms / calls * 1000:10.2f} µs/call ({ms / sum(totals.values()):.0%})")
+
+
+def run_benchmarks():
+    """Run all benchmarks"""
+    print("=" * 80)
+    print("T2INDIA PERFORMANCE BENCHMARKS")
+    print("=" * 80)
+
+    benchmark_parse_user_input()
+    benchmark_find_matching_itineraries()
+    benchmark_optimize_route()
+    benchmark_route_cost_evaluation()
+    benchmark_routing_engine()
+    benchmark_query_cache()
+    benchmark_process_batch()
+    benchmark_lazy_result()
+    benchmark_query_api()
+    benchmark_id_generator()
+    benchmark_extension_selection()
+    benchmark_data_registry()
+    benchmark_hot_reload()
+    benchmark_hub_routing_table()
+    benchmark_flight_time_model()
+    benchmark_hub_selection()
+    benchmark_day_scheduler()
+    benchmark_segment_analysis()
+    benchmark_circuit_index()
+    benchmark_route_ordering()
+    benchmark_destination_normalization()
+    benchmark_minhash_matching()
+    benchmark_library_snapshot()
+    benchmark_itinerary_fitting()
+    benchmark_final_pipeline()
+
+    print("\n" + "=" * 80)
+    print("BENCHMARKS COMPLETED")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    run_benchmarks()
@@ -0,0 +1,91 @@
+"""
+T2India Circuit Index
+Travel circuits as integer bitsets over a city-id universe, with best-match ranking
+"""
+
+
+def normalize_city(name):
+    """Key used to compare destination names"""
+    return name.lower().replace(" ", "_")
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+class CircuitIndex:
+    def __init__(self, travel_circuits):
+        self.circuit_names = list(travel_circuits)
+        self.circuits = travel_circuits
+        self.city_bits = {}  # normalized city -> bit
+        self.masks = []  # per circuit: bitset of its cities
+        self.sizes = []
+        self.city_circuits = []  # per city bit: bitset of the circuits containing it
+        for position, name in enumerate(self.circuit_names):
+            mask = 0
+            for city in travel_circuits[name]["destinations"]:
+                key = normalize_city(city)
+                bit = self.city_bits.get(key)
+                if bit is None:
+                    bit = self.city_bits[key] = len(self.city_bits)
+                    self.city_circuits.append(0)
+                mask |= 1 << bit
+                self.city_circuits[bit] |= 1 << position
+            self.masks.append(mask)
+            self.sizes.append(popcount(mask))
+
+    def query_mask(self, destinations):
+        """(bitset of known cities, number of cities outside every circuit)"""
+        mask = 0
+        unknown = set()
+        for destination in destinations:
+            key = normalize_city(destination)
+            bit = self.city_bits.get(key)
+            if bit is None:
+                unknown.add(key)
+            else:
+                mask |= 1 << bit
+        return mask, len(unknown)
+
+    def rank(self, destinations):
+        """Circuits that contain, or are contained in, the destinations; best overlap first
+
+        Ranked by Jaccard similarity, then by fewer cities outside the
+        request, then by catalog order.
+        """
+        mask, unknown = self.query_mask(destinations)
+        if not mask and not unknown:
+            # An empty request is contained in every circuit
+            return [(0.0, name) for name in self.circuit_names]
+
+        # Any qualifying circuit shares at least one city with the request
+        candidates = 0
+        remaining = mask
+        while remaining:
+            low = remaining & -remaining
+            candidates |= self.city_circuits[low.bit_length() - 1]
+            remaining ^= low
+        query_size = popcount(mask) + unknown
+
+        ranked = []
+        while candidates:
+            low = candidates & -candidates
+            position = low.bit_length() - 1
+            candidates ^= low
+            circuit = self.masks[position]
+            within = not unknown and not mask & ~circuit  # request ⊆ circuit
+            covers = not circuit & ~mask  # circuit ⊆ request
+            if within or covers:
+                shared = popcount(mask & circuit)
+                union = query_size + self.sizes[position] - shared
+                ranked.append((-shared / union, self.sizes[position] - shared, position))
+        ranked.sort()
+        return [(-score, self.circuit_names[position]) for score, _, position in ranked]
+
+    def best(self, destinations):
+        """Best matching (circuit name, circuit data), or (None, None)"""
+        ranked = self.rank(destinations)
+        if not ranked:
+            return None, None
+        name = ranked[0][1]
+        return name, self.circuits[name]
@@ -0,0 +1,158 @@
+"""
+T2India Comprehensive Result
+Lazy mapping over a processed query: each section is built on first access and cached
+"""
+
+from collections.abc import MutableMapping
+
+# Serialized key order of a full comprehensive result
+RESULT_FIELDS = (
+    "query_id",
+    "timestamp",
+    "user_input",
+    "parsed_input",
+    "recommendation",
+    "library_matches",
+    "extensions",
+    "handicrafts",
+    "transport_connectivity",
+    "themes_detected",
+    "service_notes"
+)
+
+# Nested fields that can be answered without building their whole parent section
+SHORTCUT_FIELDS = {
+    "recommendation.optimized_route": "optimized_route"
+}
+
+
+class LazyComprehensiveResult(MutableMapping):
+    def __init__(self, system, parsed, data, matches=None, routing=None, sections=None):
+        self.system = system
+        self.parsed = parsed
+        self.data = data  # the system's data bundle when the query arrived; every section is built from it
+        # Computed sections are shared by every copy of the same intent
+        self.sections = sections if sections is not None else {}
+        if matches is not None:
+            self.sections.setdefault("matches", matches)
+        if routing is not None:
+            self.sections.setdefault("optimized_route", routing[0])
+            self.sections.setdefault("transport_connectivity", routing[1])
+        # Per-request values such as query_id and anything callers assign
+        self.values = {
+            "query_id": None,
+            "timestamp": None,
+            "user_input": parsed["raw_input"],
+            "parsed_input": parsed
+        }
+        self.removed = set()
+
+    def section(self, name):
+        """Build a section once; later lookups and copies reuse it"""
+        if name not in self.sections:
+            self.sections[name] = getattr(self, f"build_{name}")()
+        return self.sections[name]
+
+    def build_matches(self):
+        return self.system.find_matching_itineraries(self.parsed["destinations"], self.parsed["duration"], limit=3,
+                                                    data=self.data)
+
+    def build_optimized_route(self):
+        return self.system.optimize_route(self.parsed["destinations"], max_leg_hours=self.system.max_travel_hours,
+                                          data=self.data)
+
+    def build_recommendation(self):
+        return self.system.build_recommendation(self.parsed, self.section("matches"), self.section("optimized_route"))
+
+    def build_library_matches(self):
+        return self.section("matches")[:3]  # Top 3 matches
+
+    def build_extensions(self):
+        return self.system.build_extensions(self.parsed, self.data)
+
+    def build_handicrafts(self):
+        return self.system.build_handicrafts(self.parsed, self.data)
+
+    def build_transport_connectivity(self):
+        return self.system.build_transport_matrix(self.section("optimized_route"), self.data)
+
+    def build_themes_detected(self):
+        return self.parsed["themes"]
+
+    def build_service_notes(self):
+        return self.system.build_service_notes()
+
+    def __getitem__(self, key):
+        if key in self.removed:
+            raise KeyError(key)
+        if key in self.values:
+            return self.values[key]
+        if key in RESULT_FIELDS:
+            return self.section(key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self.removed.discard(key)
+        self.values[key] = value
+
+    def __delitem__(self, key):
+        if key in self.removed or (key not in self.values and key not in RESULT_FIELDS):
+            raise KeyError(key)
+        self.values.pop(key, None)
+        self.removed.add(key)
+
+    def __contains__(self, key):
+        # Membership must not trigger section builds
+        return key not in self.removed and (key in self.values or key in RESULT_FIELDS)
+
+    def __iter__(self):
+        for key in RESULT_FIELDS:
+            if key not in self.removed:
+                yield key
+        for key in self.values:
+            if key not in RESULT_FIELDS:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        computed = [key for key in RESULT_FIELDS if key in self.sections]
+        return f"<LazyComprehensiveResult {self.values.get('query_id')} computed={computed}>"
+
+    def copy(self):
+        """Shallow copy sharing computed sections but with its own per-request values"""
+        duplicate = LazyComprehensiveResult(self.system, self.parsed, self.data, sections=self.sections)
+        duplicate.values = dict(self.values)
+        duplicate.removed = set(self.removed)
+        return duplicate
+
+    def to_dict(self, fields=None):
+        """Plain dict for serialization, limited to the requested fields
+
+        Fields are top-level keys or dotted paths into a section, e.g.
+        "recommendation.optimized_route"; dotted paths come back nested.
+        """
+        if fields is None:
+            return {key: self[key] for key in self}
+
+        unknown = [field for field in fields if field.split(".")[0] not in self]
+        if unknown:
+            raise KeyError(f"Unknown result fields: {', '.join(unknown)}")
+
+        selected = {}
+        for field in fields:
+            path = field.split(".")
+            if field in SHORTCUT_FIELDS:
+                value = self.section(SHORTCUT_FIELDS[field])
+            else:
+                value = self[path[0]]
+                for part in path[1:]:
+                    if not isinstance(value, dict) or part not in value:
+                        raise KeyError(f"Unknown result fields: {field}")
+                    value = value[part]
+            target = selected
+            for part in path[:-1]:
+                target = target.setdefault(part, {})
+            target[path[-1]] = value
+        return selected
@@ -4,409 +4,139 @@ Full implementation with real connectivity data, extensive testing, and complete
 """
 
 import json
+import logging
+import os
 import re
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-import uuid
 
-class T2IndiaComprehensiveSystem:
-    def __init__(self):
-        # Real connectivity matrix with updated data
-        self.connectivity_matrix = {
-            "Delhi": {
-                "Agra": {
-                    "road": {"duration": "3h", "cost": "₹2,500-4,000", "distance": "230km"},
-                    "train": {"duration": "2h", "cost": "₹500-2,000", "service": "Gatimaan Express"},
-                    "flight": {"duration": "1h", "cost": "₹3,000-8,000", "frequency": "Limited"}
-                },
-                "Jaipur": {
-                    "road": {"duration": "5h", "cost": "₹3,000-5,000", "distance": "280km"},
-                    "train": {"duration": "4.5h", "cost": "₹400-1,500", "service": "Shatabdi Express"},
-                    "flight": {"duration": "1.5h", "cost": "₹3,500-9,000", "frequency": "Multiple daily"}
-                },
-                "Goa": {
-                    "flight": {"duration": "2.5h", "cost": "₹4,000-12,000", "frequency": "Multiple daily"},
-                    "train": {"duration": "24h", "cost": "₹1,000-8,000", "service": "Rajdhani Express"}
-                },
-                "Kolkata": {
-                    "flight": {"duration": "2.5h", "cost": "₹4,000-10,000", "frequency": "Multiple daily"},
-                    "train": {"duration": "17h", "cost": "₹800-6,000", "service": "Rajdhani Express"}
-                },
-                "Mumbai": {
-                    "flight": {"duration": "2h", "cost": "₹4,000-15,000", "frequency": "Hourly"},
-                    "train": {"duration": "16h", "cost": "₹1,000-8,000", "service": "Rajdhani Express"}
-                },
-                "Rishikesh": {
-                    "road": {"duration": "6h", "cost": "₹4,000-7,000", "distance": "240km"},
-                    "train": {"duration": "8h", "cost": "₹300-1,200", "service": "Via Haridwar"}
-                }
-            },
-            "Hampi": {
-                "Delhi": {
-                    "flight_via_hubli": {"duration": "9h", "cost": "₹8,000-15,000", "route": "Hampi→Hubli(cab)→Delhi(flight)"},
-                    "flight_via_bangalore": {"duration": "8h", "cost": "₹7,000-14,000", "route": "Hampi→Bangalore(cab)→Delhi(flight)"},
-                    "train": {"duration": "32h", "cost": "₹850-26,000", "service": "Via Hospet Junction"}
-                },
-                "Goa": {
-                    "road": {"duration": "5h", "cost": "₹3,000-4,500", "distance": "350km"},
-                    "bus": {"duration": "6h", "cost": "₹350-500", "service": "Regular buses"}
-                },
-                "Bangalore": {
-                    "road": {"duration": "6h", "cost": "₹4,000-6,000", "distance": "350km"},
-                    "bus": {"duration": "7h", "cost": "₹400-800", "service": "Overnight buses"}
-                }
-            },
-            "Goa": {
-                "Hampi": {
-                    "road": {"duration": "5h", "cost": "₹3,000-4,500", "distance": "350km"},
-                    "bus": {"duration": "6h", "cost": "₹350-500", "service": "Regular buses"}
-                },
-                "Mumbai": {
-                    "flight": {"duration": "1.5h", "cost": "₹3,000-8,000", "frequency": "Multiple daily"},
-                    "road": {"duration": "8h", "cost": "₹5,000-8,000", "distance": "600km"},
-                    "train": {"duration": "12h", "cost": "₹500-3,000", "service": "Konkan Railway"}
-                },
-                "Delhi": {
-                    "flight": {"duration": "2.5h", "cost": "₹4,000-12,000", "frequency": "Multiple daily"},
-                    "train": {"duration": "24h", "cost": "₹1,000-8,000", "service": "Rajdhani Express"}
-                }
-            },
-            "Kolkata": {
-                "Darjeeling": {
-                    "road": {"duration": "12h", "cost": "₹4,000-6,000", "distance": "650km"},
-                    "train": {"duration": "11h", "cost": "₹3,000-11,000", "service": "Via New Jalpaiguri"},
-                    "flight_to_bagdogra": {"duration": "4h", "cost": "₹5,000-12,000", "route": "Kolkata→Bagdogra→Darjeeling(cab)"}
-                },
-                "Delhi": {
-                    "flight": {"duration": "2.5h", "cost": "₹4,000-10,000", "frequency": "Multiple daily"},
-                    "train": {"duration": "17h", "cost": "₹800-6,000", "service": "Rajdhani Express"}
-                },
-                "Puri": {
-                    "road": {"duration": "6h", "cost": "₹4,000-6,000", "distance": "500km"},
-                    "train": {"duration": "8h", "cost": "₹800-2,000", "service": "Puri Express"}
-                }
-            },
-            "Darjeeling": {
-                "Mumbai": {
-                    "flight_via_siliguri": {"duration": "7h", "cost": "₹8,000-15,000", "route": "Darjeeling→Siliguri/Bagdogra(cab)→Mumbai(flight)"},
-                    "train": {"duration": "40h", "cost": "₹3,500-30,000", "service": "Via New Jalpaiguri"}
-                },
-                "Delhi": {
-                    "flight_via_bagdogra": {"duration": "5h", "cost": "₹6,000-12,000", "route": "Darjeeling→Bagdogra(cab)→Delhi(flight)"},
-                    "train": {"duration": "24h", "cost": "₹2,000-15,000", "service": "Via New Jalpaiguri"}
-                }
-            },
-            "Cochin": {
-                "Goa": {
-                    "flight": {"duration": "1.5h", "cost": "₹4,000-8,000", "frequency": "Multiple daily"},
-                    "road": {"duration": "12h", "cost": "₹6,000-10,000", "distance": "600km"}
-                },
-                "Delhi": {
-                    "flight": {"duration": "3h", "cost": "₹5,000-15,000", "frequency": "Multiple daily"}
-                },
-                "Mumbai": {
-                    "flight": {"duration": "2h", "cost": "₹4,000-10,000", "frequency": "Multiple daily"},
-                    "train": {"duration": "26h", "cost": "₹1,000-8,000", "service": "Netravati Express"}
-                }
-            }
-        }
-        
-        # Comprehensive itinerary library with real T2India data
-        self.itinerary_library = {
-            "golden_triangle_6d": {
-                "id": "GT001",
-                "name": "Classic Golden Triangle",
-                "destinations": ["Delhi", "Agra", "Jaipur"],
-                "duration": 6,
-                "route": ["Delhi", "Agra", "Jaipur", "Delhi"],
-                "bookings": 156,
-                "rating": 4.8,
-                "price_range": "₹15,000-45,000",
-                "transport_included": True,
-                "day_wise": {
-                    "Day 1": "Delhi arrival, Red Fort, India Gate",
-                    "Day 2": "Delhi to Agra (3h road), Taj Mahal sunset",
-                    "Day 3": "Taj Mahal sunrise, Agra Fort, drive to Jaipur (4h)",
-                    "Day 4": "Amber Fort, City Palace, Hawa Mahal",
-                    "Day 5": "Jaipur local sightseeing, drive to Delhi (5h)",
-                    "Day 6": "Delhi departure"
-                },
-                "unique_id": "T2I-GT-001"
-            },
-            "kerala_backwaters_5d": {
-                "id": "KB001",
-                "name": "Kerala Backwater Bliss", 
-                "destinations": ["Cochin", "Alleppey", "Kumarakom"],
-                "duration": 5,
-                "route": ["Cochin", "Alleppey", "Kumarakom", "Cochin"],
-                "bookings": 89,
-                "rating": 4.9,
-                "price_range": "₹18,000-55,000",
-                "transport_included": True,
-                "day_wise": {
-                    "Day 1": "Cochin arrival, Fort Kochi exploration",
-                    "Day 2": "Cochin to Alleppey, houseboat check-in",
-                    "Day 3": "Backwater cruise, Kumarakom bird sanctuary",
-                    "Day 4": "Ayurveda spa, local village visits",
-                    "Day 5": "Return to Cochin, departure"
-                },
-                "unique_id": "T2I-KB-001"
-            },
-            "rajasthan_royal_8d": {
-                "id": "RR001",
-                "name": "Rajasthan Royal Heritage",
-                "destinations": ["Jodhpur", "Udaipur", "Jaisalmer"],
-                "duration": 8,
-                "route": ["Jodhpur", "Udaipur", "Jaisalmer", "Jodhpur"],
-                "bookings": 134,
-                "rating": 4.7,
-                "price_range": "₹22,000-75,000",
-                "transport_included": True,
-                "day_wise": {
-                    "Day 1": "Jodhpur arrival, Mehrangarh Fort",
-                    "Day 2": "Jodhpur to Udaipur (4h road), City Palace",
-                    "Day 3": "Lake Pichola, Jagdish Temple, sunset boat ride",
-                    "Day 4": "Udaipur to Jaisalmer (5h road)",
-                    "Day 5": "Jaisalmer Fort, Patwon Ki Haveli",
-                    "Day 6": "Desert safari, camel ride, cultural evening",
-                    "Day 7": "Sam Sand Dunes, return to Jodhpur (5h)",
-                    "Day 8": "Jodhpur departure"
-                },
-                "unique_id": "T2I-RR-001"
-            },
-            "goa_hampi_heritage_6d": {
-                "id": "GH001",
-                "name": "Goa Hampi Heritage Circuit",
-                "destinations": ["Goa", "Hampi"],
-                "duration": 6,
-                "route": ["Goa", "Hampi", "Goa"],
-                "bookings": 45,
-                "rating": 4.6,
-                "price_range": "₹16,000-48,000",
-                "transport_included": True,
-                "day_wise": {
-                    "Day 1": "Goa arrival, beach relaxation",
-                    "Day 2": "Old Goa churches, spice plantation",
-                    "Day 3": "Goa to Hampi (5h road)",
-                    "Day 4": "Hampi ruins, Virupaksha Temple, sunset at Hemakuta",
-                    "Day 5": "Vittala Temple, Stone Chariot, return to Goa (5h)",
-                    "Day 6": "Goa departure"
-                },
-                "unique_id": "T2I-GH-001"
-            },
-            "kolkata_darjeeling_hills_8d": {
-                "id": "KD001",
-                "name": "Kolkata Darjeeling Hills",
-                "destinations": ["Kolkata", "Darjeeling"],
-                "duration": 8,
-                "route": ["Kolkata", "Darjeeling", "Kolkata"],
-                "bookings": 78,
-                "rating": 4.5,
-                "price_range": "₹19,000-58,000",
-                "transport_included": True,
-                "day_wise": {
-                    "Day 1": "Kolkata arrival, Victoria Memorial",
-                    "Day 2": "Howrah Bridge, Dakshineswar Temple, cultural tour",
-                    "Day 3": "Kolkata to Darjeeling (flight to Bagdogra + 3h road)",
-                    "Day 4": "Tiger Hill sunrise, tea garden visit, Toy Train",
-                    "Day 5": "Darjeeling monastery visits, local markets",
-                    "Day 6": "Peace Pagoda, Himalayan views",
-                    "Day 7": "Return to Kolkata (flight from Bagdogra)",
-                    "Day 8": "Kolkata departure"
-                },
-                "unique_id": "T2I-KD-001"
-            },
-            "south_india_grand_12d": {
-                "id": "SI001",
-                "name": "South India Grand Circuit",
-                "destinations": ["Cochin", "Goa", "Hampi", "Bangalore"],
-                "duration": 12,
-                "route": ["Cochin", "Goa", "Hampi", "Bangalore", "Cochin"],
-                "bookings": 67,
-                "rating": 4.7,
-                "price_range": "₹35,000-95,000",
-                "transport_included": True,
-                "day_wise": {
-                    "Day 1-2": "Cochin - Fort Kochi, backwaters introduction",
-                    "Day 3-4": "Cochin to Goa, beaches and Portuguese heritage",
-                    "Day 5-6": "Goa to Hampi, UNESCO World Heritage exploration",
-                    "Day 7-8": "Hampi to Bangalore, modern India experience",
-                    "Day 9-10": "Bangalore sightseeing, tech city tour",
-                    "Day 11-12": "Bangalore to Cochin, departure"
-                },
-                "unique_id": "T2I-SI-001"
-            }
-        }
-        
-        # Comprehensive handicraft database
-        self.handicrafts_database = {
-            "Delhi": [
-                {
-                    "id": "DEL001",
-                    "name": "Traditional Pottery",
-                    "artisan": "Master Ramesh Kumar",
-                    "workshop_duration": "3 hours",
-                    "price": "₹1,200",
-                    "difficulty": "Beginner",
-                    "description": "Learn traditional pottery techniques passed down through generations",
-                    "photo_required": "300x300mm, 500 DPI",
-                    "introduction_words": 240
-                },
-                {
-                    "id": "DEL002", 
-                    "name": "Block Printing",
-                    "artisan": "Sita Devi",
-                    "workshop_duration": "4 hours",
-                    "price": "₹1,500",
-                    "difficulty": "Intermediate",
-                    "description": "Traditional textile block printing with natural dyes",
-                    "photo_required": "300x300mm, 500 DPI",
-                    "introduction_words": 240
-                }
-            ],
-            "Jaipur": [
-                {
-                    "id": "JAI001",
-                    "name": "Blue Pottery",
-                    "artisan": "Master Krishan Kant",
-                    "workshop_duration": "4 hours",
-                    "price": "₹2,000",
-                    "difficulty": "Intermediate",
-                    "description": "Famous Jaipur blue pottery making with traditional techniques",
-                    "photo_required": "300x300mm, 500 DPI",
-                    "introduction_words": 240
-                },
-                {
-                    "id": "JAI002",
-                    "name": "Gem Cutting",
-                    "artisan": "Rajesh Soni",
-                    "workshop_duration": "6 hours",
-                    "price": "₹5,000",
-                    "difficulty": "Advanced",
-                    "description": "Traditional gem cutting and polishing techniques",
-                    "photo_required": "300x300mm, 500 DPI",
-                    "introduction_words": 240
-                }
-            ],
-            "Goa": [
-                {
-                    "id": "GOA001",
-                    "name": "Azulejo Tile Painting",
-                    "artisan": "Maria Fernandes",
-                    "workshop_duration": "3 hours",
-                    "price": "₹1,800",
-                    "difficulty": "Beginner",
-                    "description": "Portuguese-style tile painting with traditional motifs",
-                    "photo_required": "300x300mm, 500 DPI",
-                    "introduction_words": 240
-                }
-            ],
-            "Kolkata": [
-                {
-                    "id": "KOL001",
-                    "name": "Kantha Embroidery",
-                    "artisan": "Malati Ghosh",
-                    "workshop_duration": "5 hours",
-                    "price": "₹2,500",
-                    "difficulty": "Intermediate",
-                    "description": "Traditional Bengali embroidery with storytelling patterns",
-                    "photo_required": "300x300mm, 500 DPI",
-                    "introduction_words": 240
-                }
-            ],
-            "Cochin": [
-                {
-                    "id": "COC001",
-                    "name": "Kathakali Mask Making",
-                    "artisan": "Guru Nandakumar",
-                    "workshop_duration": "4 hours",
-                    "price": "₹2,200",
-                    "difficulty": "Intermediate",
-                    "description": "Traditional Kerala Kathakali mask creation",
-                    "photo_required": "300x300mm, 500 DPI",
-                    "introduction_words": 240
-                }
-            ]
-        }
-        
-        # Regional extensions with priorities
-        self.regional_extensions = {
-            "Delhi": {
-                "golden_triangle": {
-                    "destinations": ["Agra", "Jaipur"],
-                    "theme": "Golden Triangle - Essential India",
-                    "description": "Complete the iconic Golden Triangle with Taj Mahal and royal palaces",
-                    "additional_days": 3,
-                    "priority": 1,
-                    "transport": "Road connectivity, 3-5 hours between cities"
-                },
-                "spiritual": {
-                    "destinations": ["Rishikesh", "Haridwar"],
-                    "theme": "Yoga & Spirituality",
-                    "description": "Sacred Ganges and yoga capital of the world",
-                    "additional_days": 3,
-                    "priority": 2,
-                    "transport": "6 hours road journey to Rishikesh"
-                }
-            },
-            "Kolkata": {
-                "hills": {
-                    "destinations": ["Darjeeling"],
-                    "theme": "Mountain & Tea Gardens",
-                    "description": "Explore hill stations, tea plantations, and Himalayan views",
-                    "additional_days": 3,
-                    "priority": 1,
-                    "transport": "Flight to Bagdogra + 3h road OR 12h direct road"
-                },
-                "religious": {
-                    "destinations": ["Puri"],
-                    "theme": "Religious & Spiritual",
-                    "description": "Visit the sacred Jagannath Temple and spiritual sites",
-                    "additional_days": 2,
-                    "priority": 2,
-                    "transport": "6 hours road journey"
-                }
-            },
-            "Goa": {
-                "heritage": {
-                    "destinations": ["Hampi"],
-                    "theme": "UNESCO Heritage",
-                    "description": "Explore ancient Vijayanagara Empire ruins and temples",
-                    "additional_days": 2,
-                    "priority": 1,
-                    "transport": "5 hours road journey"
-                },
-                "modern": {
-                    "destinations": ["Bangalore"],
-                    "theme": "Modern Culture",
-                    "description": "Experience India's Silicon Valley and modern culture",
-                    "additional_days": 2,
-                    "priority": 2,
-                    "transport": "8 hours road OR 1.5h flight"
-                }
-            },
-            "Jaipur": {
-                "desert": {
-                    "destinations": ["Jodhpur", "Jaisalmer"],
-                    "theme": "Desert & Forts",
-                    "description": "Explore the Thar Desert and magnificent forts",
-                    "additional_days": 4,
-                    "priority": 1,
-                    "transport": "4-6 hours road between cities"
-                }
-            }
-        }
+import numpy as np
 
-    def generate_unique_itinerary_id(self):
-        """Generate unique itinerary ID"""
-        timestamp = datetime.now().strftime("%Y%m%d")
-        unique_code = str(uuid.uuid4())[:8].upper()
-        return f"T2I-{timestamp}-{unique_code}"
+from t2india_connectivity_graph import ConnectivityGraph, format_cost, format_duration
+from t2india_route_optimizer import RouteOptimizer
+from t2india_routing_engine import MultimodalRoutingEngine, COST_WEIGHT, TIME_WEIGHT
+from t2india_query_cache import QueryCache
+from t2india_comprehensive_result import LazyComprehensiveResult
+from t2india_id_generator import next_itinerary_id
+from t2india_data_registry import get_data_registry
 
-    def parse_user_input(self, user_input):
-        """Enhanced parsing of user input"""
-        # Extract destinations
-        destinations = []
-        destination_keywords = {
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTENSION_PRIORITY = 999  # Extensions without a priority sort last
+BATCH_WORKERS = os.cpu_count() or 1  # routing processes per system for large batches
+
+# Indexes derived from each data table: (table, index names, builder returning them in order)
+ITINERARY_INDEXES = (
+    "indexed_itineraries", "destination_index",
+    "library_vocabulary", "library_matrix", "library_sizes", "library_durations"
+)
+EXTENSION_INDEXES = ("extension_index", "extension_days_index")
+CONNECTIVITY_INDEXES = ("connectivity_graph", "route_optimizer", "routing_engine")
+DATA_TABLES = ("connectivity_matrix", "itinerary_library", "handicrafts_database", "regional_extensions")
+
+
+def build_itinerary_index(data):
+    """Destination → itinerary posting lists plus the one-hot matrix used for batch scoring"""
+    indexed_itineraries = []
+    destination_index = {}
+    
+    for itinerary in data.itinerary_library.values():
+        position = len(indexed_itineraries)
+        itinerary_destinations = set(itinerary["destinations"])
+        indexed_itineraries.append((itinerary, itinerary_destinations))
+        for destination in itinerary_destinations:
+            destination_index.setdefault(destination, []).append(position)
+    
+    # One-hot destination matrix and durations for batch scoring
+    library_vocabulary = {destination: column for column, destination in enumerate(destination_index)}
+    library_matrix = np.zeros((len(indexed_itineraries), len(library_vocabulary)))
+    for destination, positions in destination_index.items():
+        library_matrix[positions, library_vocabulary[destination]] = 1.0
+    library_sizes = library_matrix.sum(axis=1)
+    library_durations = np.array([itinerary["duration"] for itinerary, _ in indexed_itineraries], dtype=float)
+    return (indexed_itineraries, destination_index,
+            library_vocabulary, library_matrix, library_sizes, library_durations)
+
+
+def build_extension_index(data):
+    """City → [(priority, listing position, extension)] sorted by priority, also split by length"""
+    extension_index = {}
+    extension_days_index = {}  # city → additional_days → entries sorted by priority
+    for city, extensions in data.regional_extensions.items():
+        entries = []
+        for position, (name, extension) in enumerate(extensions.items()):
+            priority = extension.get("priority", DEFAULT_EXTENSION_PRIORITY)
+            # select_extensions scores each extension 1/priority; a bad row is dropped, not the whole data push
+            if isinstance(priority, bool) or not isinstance(priority, (int, float)) or priority < 1:
+                logger.warning("Skipping extension %r from %s: priority must be at least 1, got %r", name, city, priority)
+                continue
+            entries.append((priority, position, extension))
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        extension_index[city] = entries
+        by_days = {}
+        for entry in entries:
+            by_days.setdefault(entry[2]["additional_days"], []).append(entry)
+        extension_days_index[city] = by_days
+    return extension_index, extension_days_index
+
+
+def build_connectivity_index(data):
+    """Numeric graph, route optimizer and multi-hop routing engine from connectivity_matrix"""
+    # Numeric connectivity graph parsed once; display strings are rebuilt at output time
+    connectivity_graph = ConnectivityGraph.from_matrix(data.connectivity_matrix)
+    
+    # Travel-time route optimizer over the connectivity graph
+    route_optimizer = RouteOptimizer.from_connectivity_graph(connectivity_graph)
+    
+    # Multi-hop routing over connectivity edges plus intermediate hub legs
+    routing_engine = MultimodalRoutingEngine(connectivity_graph, data.intermediate_hubs)
+    return connectivity_graph, route_optimizer, routing_engine
+
+
+INDEX_GROUPS = (
+    ("itinerary_library", ITINERARY_INDEXES, build_itinerary_index),
+    ("regional_extensions", EXTENSION_INDEXES, build_extension_index),
+    ("connectivity_matrix", CONNECTIVITY_INDEXES, build_connectivity_index)
+)
+
+
+class ComprehensiveData:
+    """The data tables and every index derived from them, never modified once built
+
+    Reloads build a new bundle off to the side and publish it with a single
+    assignment, so a request that captured one bundle sees matching tables
+    and indexes from start to finish.
+    """
+
+    def __init__(self, tables, intermediate_hubs, version=None, generation=None, previous=None):
+        for table in DATA_TABLES:
+            setattr(self, table, tables[table])
+        self.intermediate_hubs = intermediate_hubs
+        self.version = version
+        self.generation = generation
+        
+        # Indexes of a table that did not change are taken over from the previous bundle
+        for table, names, builder in INDEX_GROUPS:
+            if previous is not None and getattr(previous, table) is getattr(self, table):
+                values = [getattr(previous, name) for name in names]
+            else:
+                values = builder(self)
+            for name, value in zip(names, values):
+                setattr(self, name, value)
+
+    def replace(self, **tables):
+        """New bundle with some tables swapped and only their indexes rebuilt"""
+        merged = {table: tables.get(table, getattr(self, table)) for table in DATA_TABLES}
+        return ComprehensiveData(merged, self.intermediate_hubs, self.version, self.generation, previous=self)
+
+class T2IndiaComprehensiveSystem:
+    def __init__(self, registry=None):
+        # Destination aliases and theme words recognised in user queries
+        self.destination_keywords = {
             "delhi": "Delhi", "new delhi": "Delhi",
             "agra": "Agra", "taj mahal": "Agra",
             "jaipur": "Jaipur", "pink city": "Jaipur",
@@ -423,28 +153,128 @@ class T2IndiaComprehensiveSystem:
             "rishikesh": "Rishikesh", "haridwar": "Haridwar",
             "puri": "Puri", "alleppey": "Alleppey", "kumarakom": "Kumarakom"
         }
+        self.theme_keywords = {
+            "spiritual": ["spiritual", "yoga", "meditation", "temple"],
+            "heritage": ["heritage", "history", "unesco", "monument"],
+            "desert": ["desert", "camel", "sand", "fort"],
+            "coastal": ["beach", "coastal", "backwater"],
+            "mountain": ["mountain", "hill", "tea", "himalaya"]
+        }
+        
+        # Gazetteer compiled once so parsing is a single scan of the input
+        self.query_matcher = self.compile_query_matcher()
+        
+        self.max_travel_hours = 7  # Service standard between destinations
+        self.max_sightseeing_hours = 3  # Service standard per vehicle per day
+        
+        # Results keyed on normalized intent, invalidated whenever data is reloaded
+        self.query_cache = QueryCache(maxsize=1024, ttl_seconds=3600)
         
-        input_lower = user_input.lower()
-        for keyword, standard_name in destination_keywords.items():
-            if keyword in input_lower and standard_name not in destinations:
-                destinations.append(standard_name)
-        
-        # Extract duration
-        duration_match = re.search(r'(\d+)\s*days?', input_lower)
-        duration = int(duration_match.group(1)) if duration_match else None
-        
-        # Extract themes/preferences
-        themes = []
-        if any(word in input_lower for word in ["spiritual", "yoga", "meditation", "temple"]):
-            themes.append("spiritual")
-        if any(word in input_lower for word in ["heritage", "history", "unesco", "monument"]):
-            themes.append("heritage")
-        if any(word in input_lower for word in ["desert", "camel", "sand", "fort"]):
-            themes.append("desert")
-        if any(word in input_lower for word in ["beach", "coastal", "backwater"]):
-            themes.append("coastal")
-        if any(word in input_lower for word in ["mountain", "hill", "tea", "himalaya"]):
-            themes.append("mountain")
+        # Connectivity, itinerary library, handicrafts and extensions come from the
+        # process-wide on-disk snapshot and are re-applied whenever it is swapped
+        self.registry = registry or get_data_registry()
+        self.data_store = self.registry.data_store
+        self.data_lock = threading.Lock()  # serializes writers; readers capture self.data once per request
+        self.failed_generation = None  # snapshot generation whose bundle failed to build
+        self.apply_snapshot(self.data_store.current())
+        
+        # Routing processes for process_batch, kept across batches and started from the bundle they serve
+        self.batch_pool = None
+        self.batch_pool_key = None  # (bundle, max_workers) the pool was started for
+        self.batch_pool_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Tables and indexes of the current bundle, for callers outside a request
+        if name in DATA_TABLES or any(name in names for _, names, _ in INDEX_GROUPS):
+            return getattr(self.data, name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def apply_snapshot(self, snapshot):
+        """Publish the bundle for a snapshot, built by the first system to see it and shared by the rest"""
+        data = self.registry.shared("comprehensive_data", snapshot.generation, lambda: ComprehensiveData(
+            snapshot, self.registry.reference("intermediate_hubs"), snapshot.version, snapshot.generation
+        ))
+        self.publish(data)
+
+    def publish(self, data):
+        """Make a fully built bundle current with one assignment; requests in flight keep theirs"""
+        self.data = data
+        self.query_cache.clear()
+
+    def refresh_data(self):
+        """Pick up a newer snapshot if the data file has been replaced; one that fails to index is skipped"""
+        snapshot = self.data_store.current()
+        if snapshot.generation not in (self.data.generation, self.failed_generation):
+            with self.data_lock:
+                if snapshot.generation not in (self.data.generation, self.failed_generation):
+                    try:
+                        self.apply_snapshot(snapshot)
+                    except Exception as e:  # any index builder may choke on data that passed the store's checks
+                        # Keep serving the current bundle, and do not retry this snapshot on every request
+                        self.failed_generation = snapshot.generation
+                        logger.warning("Data snapshot version %s could not be indexed, keeping version %s: %r",
+                                       snapshot.version, self.data.version, e)
+
+    def reload_regional_extensions(self, regional_extensions):
+        """Swap in new regional extensions and invalidate cached results"""
+        with self.data_lock:
+            self.publish(self.data.replace(regional_extensions=regional_extensions))
+
+    def reload_itinerary_library(self, itinerary_library):
+        """Swap in a new itinerary library and invalidate cached results"""
+        with self.data_lock:
+            self.publish(self.data.replace(itinerary_library=itinerary_library))
+
+    def reload_connectivity(self, connectivity_matrix):
+        """Swap in new connectivity data and invalidate cached results"""
+        with self.data_lock:
+            self.publish(self.data.replace(connectivity_matrix=connectivity_matrix))
+
+    def compile_query_matcher(self):
+        """Compile destination aliases, theme words and duration into one regex"""
+        self.theme_lookup = {}
+        for theme, words in self.theme_keywords.items():
+            for word in words:
+                self.theme_lookup[word] = theme
+        
+        # Longest aliases first so "new delhi" wins over "delhi"
+        aliases = sorted(self.destination_keywords, key=len, reverse=True)
+        alias_pattern = "|".join(re.escape(alias).replace(r"\ ", r"\s+") for alias in aliases)
+        theme_pattern = "|".join(re.escape(word) for word in sorted(self.theme_lookup, key=len, reverse=True))
+        
+        # Destinations need whole-word matches ("puri" must not hit "purity");
+        # theme words keep matching plurals such as "hills" or "temples"
+        return re.compile(
+            r"(?P<days>\d+)\s*days?"
+            r"|\b(?P<destination>" + alias_pattern + r")\b"
+            r"|\b(?P<theme>" + theme_pattern + r")\w*"
+        )
+
+    def generate_unique_itinerary_id(self):
+        """Generate unique itinerary ID"""
+        return next_itinerary_id()
+
+    def parse_user_input(self, user_input):
+        """Enhanced parsing of user input"""
+        destinations = []
+        duration = None
+        found_themes = set()
+        
+        # Single pass over the input collects destinations, duration and themes
+        for match in self.query_matcher.finditer(user_input.lower()):
+            kind = match.lastgroup
+            if kind == "destination":
+                alias = " ".join(match.group(kind).split())
+                standard_name = self.destination_keywords[alias]
+                if standard_name not in destinations:
+                    destinations.append(standard_name)
+            elif kind == "theme":
+                found_themes.add(self.theme_lookup[match.group(kind)])
+            elif duration is None:
+                duration = int(match.group(kind))
+        
+        # Report themes in their canonical order
+        themes = [theme for theme in self.theme_keywords if theme in found_themes]
         
         return {
             "destinations": destinations,
@@ -453,22 +283,22 @@ class T2IndiaComprehensiveSystem:
             "raw_input": user_input
         }
 
-    def find_matching_itineraries(self, destinations, duration=None):
+    def find_matching_itineraries(self, destinations, duration=None, limit=None, data=None):
         """Find matching itineraries from library"""
-        matches = []
-        
-        for itinerary_id, itinerary in self.itinerary_library.items():
-            # Calculate destination overlap
-            itinerary_destinations = set(itinerary["destinations"])
-            user_destinations = set(destinations)
-            
-            common = itinerary_destinations & user_destinations
-            total = itinerary_destinations | user_destinations
-            
-            if len(total) == 0:
-                continue
-                
-            destination_score = len(common) / len(total)
+        data = data or self.data
+        user_destinations = set(destinations)
+        
+        # Count shared destinations only for itineraries in the posting lists
+        common_counts = {}
+        for destination in user_destinations:
+            for position in data.destination_index.get(destination, ()):
+                common_counts[position] = common_counts.get(position, 0) + 1
+        
+        scored = []
+        for position, common_count in common_counts.items():
+            itinerary, itinerary_destinations = data.indexed_itineraries[position]
+            total_count = len(user_destinations) + len(itinerary_destinations) - common_count
+            destination_score = common_count / total_count
             
             # Calculate duration score
             duration_score = 1.0
@@ -480,22 +310,78 @@ class T2IndiaComprehensiveSystem:
             overall_score = (destination_score * 0.7) + (duration_score * 0.3)
             
             if overall_score > 0.2:  # Minimum threshold
-                matches.append({
-                    "itinerary": itinerary,
-                    "match_score": overall_score,
-                    "destination_score": destination_score,
-                    "duration_score": duration_score,
-                    "common_destinations": list(common),
-                    "missing_destinations": list(user_destinations - itinerary_destinations),
-                    "extra_destinations": list(itinerary_destinations - user_destinations)
-                })
+                scored.append((overall_score, position, destination_score, duration_score))
+        
+        # Library order breaks ties, as the stable sort over the full library did
+        rank_key = lambda entry: (entry[0], -entry[1])
+        if limit is None:
+            top = sorted(scored, key=rank_key, reverse=True)
+        else:
+            top = heapq.nlargest(limit, scored, key=rank_key)
         
-        # Sort by match score
-        matches.sort(key=lambda x: x["match_score"], reverse=True)
-        return matches
+        return [self.describe_match(entry, user_destinations, data) for entry in top]
 
-    def optimize_route(self, destinations):
-        """Optimize route based on geographical logic"""
+    def describe_match(self, scored_entry, user_destinations, data=None):
+        """Expand a (score, position, destination score, duration score) entry into a match"""
+        data = data or self.data
+        overall_score, position, destination_score, duration_score = scored_entry
+        itinerary, itinerary_destinations = data.indexed_itineraries[position]
+        return {
+            "itinerary": itinerary,
+            "match_score": overall_score,
+            "destination_score": destination_score,
+            "duration_score": duration_score,
+            "common_destinations": list(itinerary_destinations & user_destinations),
+            "missing_destinations": list(user_destinations - itinerary_destinations),
+            "extra_destinations": list(itinerary_destinations - user_destinations)
+        }
+
+    def find_matching_itineraries_batch(self, parsed_queries, limit=3, data=None):
+        """Score many parsed queries against the library with one matrix product"""
+        data = data or self.data
+        if not parsed_queries:
+            return []
+        
+        # One-hot encode query destinations over the library vocabulary
+        query_matrix = np.zeros((len(parsed_queries), len(data.library_vocabulary)))
+        query_sizes = np.zeros(len(parsed_queries))
+        query_durations = np.zeros(len(parsed_queries))
+        has_duration = np.zeros(len(parsed_queries), dtype=bool)
+        for row, parsed in enumerate(parsed_queries):
+            user_destinations = set(parsed["destinations"])
+            query_sizes[row] = len(user_destinations)
+            for destination in user_destinations:
+                column = data.library_vocabulary.get(destination)
+                if column is not None:
+                    query_matrix[row, column] = 1.0
+            if parsed["duration"]:
+                query_durations[row] = parsed["duration"]
+                has_duration[row] = True
+        
+        # Same 0.7 destination Jaccard + 0.3 duration score as find_matching_itineraries
+        common = query_matrix @ data.library_matrix.T
+        union = query_sizes[:, None] + data.library_sizes[None, :] - common
+        destination_scores = np.divide(common, union, out=np.zeros_like(common), where=union > 0)
+        duration_scores = np.maximum(0, 1 - (np.abs(data.library_durations[None, :] - query_durations[:, None]) / 10))
+        duration_scores[~has_duration] = 1.0
+        overall_scores = (destination_scores * 0.7) + (duration_scores * 0.3)
+        eligible = (common > 0) & (overall_scores > 0.2)
+        
+        results = []
+        for row, parsed in enumerate(parsed_queries):
+            positions = np.flatnonzero(eligible[row])
+            scored = [
+                (float(overall_scores[row, p]), int(p), float(destination_scores[row, p]), float(duration_scores[row, p]))
+                for p in positions
+            ]
+            top = heapq.nlargest(limit, scored, key=lambda entry: (entry[0], -entry[1]))
+            user_destinations = set(parsed["destinations"])
+            results.append([self.describe_match(entry, user_destinations, data) for entry in top])
+        return results
+
+    def optimize_route(self, destinations, entry_point=None, exit_point=None, max_leg_hours=None, data=None):
+        """Optimize route based on travel times between destinations"""
+        data = data or self.data
         if not destinations:
             return []
         
@@ -510,16 +396,26 @@ class T2IndiaComprehensiveSystem:
         
         dest_set = frozenset(destinations)
         
-        # Check for exact matches
-        if dest_set in route_patterns:
-            return route_patterns[dest_set]
-        
-        # Check for subset matches
-        for pattern_set, route in route_patterns.items():
-            if dest_set.issubset(pattern_set):
-                # Filter route to include only requested destinations
-                filtered_route = [dest for dest in route if dest in destinations]
-                return filtered_route
+        # Curated sequences only apply when the traveller has not fixed entry/exit
+        if entry_point is None and exit_point is None:
+            # Check for exact matches
+            if dest_set in route_patterns:
+                return route_patterns[dest_set]
+            
+            # Check for subset matches
+            for pattern_set, route in route_patterns.items():
+                if dest_set.issubset(pattern_set):
+                    # Filter route to include only requested destinations
+                    filtered_route = [dest for dest in route if dest in destinations]
+                    return filtered_route
+        
+        # Travel-time optimization when every city is in the connectivity data
+        endpoints = [city for city in (entry_point, exit_point) if city]
+        if all(data.route_optimizer.knows(city) for city in list(destinations) + endpoints):
+            max_leg_minutes = max_leg_hours * 60 if max_leg_hours else None
+            return data.route_optimizer.optimize(
+                destinations, entry_point, exit_point, max_leg_minutes
+            )["route"]
         
         # Default geographical optimization
         # North to South or East to West logic
@@ -530,41 +426,148 @@ class T2IndiaComprehensiveSystem:
         }
         
         sorted_destinations = sorted(destinations, key=lambda x: region_order.get(x, 999))
+        if entry_point:
+            sorted_destinations = [entry_point] + [d for d in sorted_destinations if d != entry_point]
+        if exit_point:
+            if exit_point != entry_point:
+                sorted_destinations = [d for d in sorted_destinations if d != exit_point]
+            sorted_destinations.append(exit_point)
         return sorted_destinations
 
-    def get_transport_options(self, from_city, to_city):
+    def get_transport_options(self, from_city, to_city, data=None):
         """Get transport options between cities"""
-        if from_city in self.connectivity_matrix and to_city in self.connectivity_matrix[from_city]:
-            return self.connectivity_matrix[from_city][to_city]
-        return {"road": {"duration": "Unknown", "cost": "Contact for pricing"}}
+        data = data or self.data
+        if data.connectivity_graph.has_connection(from_city, to_city):
+            return data.connectivity_graph.transport_options(from_city, to_city)
+        
+        # Connections are listed one way; the reverse leg uses the same modes, turned around
+        if data.connectivity_graph.has_connection(to_city, from_city):
+            return data.connectivity_graph.reverse_transport_options(from_city, to_city)
+        
+        # Fastest and cheapest multi-hop paths through other cities or hubs
+        options = {}
+        for weight in (TIME_WEIGHT, COST_WEIGHT):
+            path = data.routing_engine.shortest_path(from_city, to_city, weight)
+            if path is None:
+                continue
+            via = ", ".join(path["path"][1:-1])
+            options.setdefault(f"multi-leg via {via}", {
+                "minutes": path["minutes"],
+                "cost_min_paise": path["cost_min_paise"],
+                "cost_max_paise": path["cost_max_paise"],
+                "route": "→".join(
+                    [path["path"][0]] + [f"{leg['to']}({leg['mode']})" for leg in path["legs"]]
+                )
+            })
+        if options:
+            return options
+        return {"road": {"minutes": None, "cost_min_paise": None, "cost_max_paise": None}}
 
-    def suggest_extensions(self, destinations, available_days):
+    def suggest_extensions(self, destinations, available_days, limit=None, data=None):
         """Suggest regional extensions based on destinations"""
+        data = data or self.data
+        # Merging the pre-sorted city lists keeps the old stable priority order
+        per_city = [
+            tag_extensions(data.extension_index[destination], order, destination)
+            for order, destination in enumerate(destinations) if destination in data.extension_index
+        ]
         suggestions = []
-        
-        for destination in destinations:
-            if destination in self.regional_extensions:
-                for ext_key, extension in self.regional_extensions[destination].items():
-                    if extension["additional_days"] <= available_days:
-                        suggestions.append({
-                            "from_city": destination,
-                            "extension": extension,
-                            "fits_duration": True
-                        })
-                    else:
-                        suggestions.append({
-                            "from_city": destination,
-                            "extension": extension,
-                            "fits_duration": False,
-                            "requires_additional_days": extension["additional_days"] - available_days
-                        })
-        
-        # Sort by priority
-        suggestions.sort(key=lambda x: x["extension"].get("priority", 999))
+        for _, _, _, destination, extension in itertools.islice(heapq.merge(*per_city), limit):
+            if extension["additional_days"] <= available_days:
+                suggestions.append({
+                    "from_city": destination,
+                    "extension": extension,
+                    "fits_duration": True
+                })
+            else:
+                suggestions.append({
+                    "from_city": destination,
+                    "extension": extension,
+                    "fits_duration": False,
+                    "requires_additional_days": extension["additional_days"] - available_days
+                })
         return suggestions
 
-    def process_comprehensive_query(self, user_input):
-        """Main comprehensive processing function"""
+    def select_extensions(self, destinations, available_days, data=None):
+        """Best combination of extensions that fits in the free days (0/1 knapsack)
+
+        Each extension scores 1/priority; ties prefer fewer days. Extensions
+        that only revisit planned destinations, or repeat another city's
+        offer of the same places, are skipped.
+        """
+        data = data or self.data
+        planned = set(destinations)
+        lengths = set()
+        for destination in destinations:
+            lengths.update(data.extension_days_index.get(destination, {}))
+        
+        # At most available_days // days extensions of one length fit, so only the best that many can matter
+        items = []
+        offered = set()
+        for days in sorted(length for length in lengths if length <= available_days):
+            limit = available_days // days if days else len(data.regional_extensions)
+            per_city = [
+                tag_extensions(data.extension_days_index[destination].get(days, []), order, destination)
+                for order, destination in enumerate(destinations) if destination in data.extension_days_index
+            ]
+            kept = 0
+            for priority, _, _, destination, extension in heapq.merge(*per_city):
+                places = tuple(extension["destinations"])
+                if places in offered or planned.issuperset(places):
+                    continue
+                offered.add(places)
+                items.append((priority, destination, extension))
+                kept += 1
+                if kept == limit:
+                    break
+        
+        # best[days] = (total score, -days used); keep[i][days] marks item i as taken
+        best = [(0.0, 0)] * (available_days + 1)
+        keep = []
+        for priority, _, extension in items:
+            days = extension["additional_days"]
+            score = 1 / priority
+            taken = [False] * (available_days + 1)
+            for capacity in range(available_days, days - 1, -1):
+                base_score, base_days = best[capacity - days]
+                candidate = (base_score + score, base_days - days)
+                if candidate > best[capacity]:
+                    best[capacity] = candidate
+                    taken[capacity] = True
+            keep.append(taken)
+        
+        selected = []
+        capacity = available_days
+        for i in range(len(items) - 1, -1, -1):
+            if keep[i][capacity]:
+                priority, destination, extension = items[i]
+                selected.append({
+                    "from_city": destination,
+                    "extension": extension,
+                    "fits_duration": True
+                })
+                capacity -= extension["additional_days"]
+        selected.sort(key=lambda x: x["extension"].get("priority", DEFAULT_EXTENSION_PRIORITY))
+        return selected
+
+    def intent_key(self, parsed):
+        """Normalized intent used as the query cache key"""
+        return (
+            tuple(sorted(parsed["destinations"])),
+            parsed["duration"],
+            tuple(sorted(parsed["themes"]))
+        )
+
+    def process_comprehensive_query(self, user_input, lazy=False):
+        """Main comprehensive processing function
+        
+        Returns a plain dict. With lazy=True it returns the
+        LazyComprehensiveResult instead, whose sections are built only when
+        read; callers serialize it with to_dict(fields).
+        """
+        
+        self.refresh_data()
+        data = self.data  # one bundle for the whole request, even if a reload lands meanwhile
         
         # Generate unique ID for this query
         query_id = self.generate_unique_itinerary_id()
@@ -572,30 +575,132 @@ class T2IndiaComprehensiveSystem:
         # Parse input
         parsed = self.parse_user_input(user_input)
         
-        # Find matching itineraries
-        matches = self.find_matching_itineraries(parsed["destinations"], parsed["duration"])
+        # Near-identical queries share everything except the per-request fields
+        intent_key = self.intent_key(parsed)
+        cached = self.query_cache.get(intent_key)
+        if cached is None or cached.data is not data:
+            cached = self.build_comprehensive_result(parsed, data)
+            self.query_cache.put(intent_key, cached)
+        
+        result = cached.copy()
+        result["query_id"] = query_id
+        result["timestamp"] = datetime.now().isoformat()
+        result["user_input"] = user_input
+        result["parsed_input"] = parsed
+        return result if lazy else result.to_dict()
+
+    def plan_routing(self, destinations, data=None):
+        """Optimized route plus transport options for each consecutive leg"""
+        data = data or self.data
+        optimized_route = self.optimize_route(destinations, max_leg_hours=self.max_travel_hours, data=data)
+        return optimized_route, self.build_transport_matrix(optimized_route, data)
+
+    def process_batch(self, queries, max_workers=BATCH_WORKERS, min_parallel_intents=32, lazy=False):
+        """Process many queries at once, returning results in input order with per-query timing
+        
+        Results are plain dicts, or LazyComprehensiveResult with lazy=True.
+        """
+        
+        self.refresh_data()
+        data = self.data  # one bundle for the whole batch
+        
+        # Parse everything up front and collapse identical intents
+        parsed_queries = []
+        parse_ms = []
+        intents = {}
+        for user_input in queries:
+            started = time.perf_counter()
+            parsed = self.parse_user_input(user_input)
+            parse_ms.append((time.perf_counter() - started) * 1000)
+            parsed_queries.append(parsed)
+            intents.setdefault(self.intent_key(parsed), parsed)
+        
+        bodies = {}
+        compute_ms = {}
+        pending = []
+        for key, parsed in intents.items():
+            cached = self.query_cache.get(key)
+            if cached is not None and cached.data is data:
+                bodies[key] = cached
+                compute_ms[key] = 0.0
+            else:
+                pending.append((key, parsed))
+        
+        if pending:
+            started = time.perf_counter()
+            
+            # Library scoring for every new intent as one matrix operation
+            all_matches = self.find_matching_itineraries_batch([parsed for _, parsed in pending], data=data)
+            
+            # Routing fans out to worker processes when the batch is large enough
+            destination_lists = [parsed["destinations"] for _, parsed in pending]
+            if max_workers and max_workers > 1 and len(pending) >= min_parallel_intents:
+                with self.batch_pool_lock:
+                    pool = self.batch_routing_pool(data, max_workers)
+                    # map submits every chunk before returning, so the pool may be replaced afterwards
+                    routed = pool.map(plan_routing_in_worker, destination_lists, chunksize=8)
+                all_routing = list(routed)
+            else:
+                all_routing = [self.plan_routing(destinations, data) for destinations in destination_lists]
+            
+            shared_ms = (time.perf_counter() - started) * 1000 / len(pending)
+            for (key, parsed), matches, routing in zip(pending, all_matches, all_routing):
+                started = time.perf_counter()
+                bodies[key] = self.build_comprehensive_result(parsed, data, matches, routing)
+                self.query_cache.put(key, bodies[key])
+                compute_ms[key] = shared_ms + (time.perf_counter() - started) * 1000
+        
+        results = []
+        first_seen = set()
+        for user_input, parsed, parse_time in zip(queries, parsed_queries, parse_ms):
+            key = self.intent_key(parsed)
+            result = bodies[key].copy()
+            result["query_id"] = self.generate_unique_itinerary_id()
+            result["timestamp"] = datetime.now().isoformat()
+            result["user_input"] = user_input
+            result["parsed_input"] = parsed
+            
+            # Repeated intents reuse the first occurrence's work
+            duplicate = key in first_seen
+            first_seen.add(key)
+            result["timing"] = {
+                "parse_ms": round(parse_time, 3),
+                "compute_ms": 0.0 if duplicate else round(compute_ms[key], 3),
+                "deduplicated": duplicate
+            }
+            results.append(result if lazy else result.to_dict())
         
-        # Optimize route
-        optimized_route = self.optimize_route(parsed["destinations"])
+        return results
+
+    def batch_routing_pool(self, data, max_workers):
+        """Worker pool routing on this bundle; a new bundle or size starts a new pool. Call under batch_pool_lock"""
+        if self.batch_pool is None or self.batch_pool_key[0] is not data or self.batch_pool_key[1] != max_workers:
+            if self.batch_pool is not None:
+                self.batch_pool.shutdown(wait=False)  # batches already submitted still finish
+            tables = {table: getattr(data, table) for table in DATA_TABLES}
+            self.batch_pool = ProcessPoolExecutor(
+                max_workers=max_workers, initializer=init_batch_worker,
+                initargs=(tables, data.intermediate_hubs, data.version, data.generation)
+            )
+            self.batch_pool_key = (data, max_workers)
+        return self.batch_pool
+
+    def close(self):
+        """Stop the batch routing processes"""
+        with self.batch_pool_lock:
+            if self.batch_pool is not None:
+                self.batch_pool.shutdown()
+                self.batch_pool = self.batch_pool_key = None
+
+    def build_comprehensive_result(self, parsed, data, matches=None, routing=None):
+        """Lazy result for a parsed query; sections are built on first access, all from the same data"""
+        return LazyComprehensiveResult(self, parsed, data, matches, routing)
+
+    def build_recommendation(self, parsed, matches, optimized_route):
+        """Recommendation section from the library matches and optimized route"""
         
         # Calculate base duration needed
         base_days_needed = len(parsed["destinations"]) * 2  # Rough estimate
-        available_for_extensions = max(0, (parsed["duration"] or 0) - base_days_needed)
-        
-        # Get extension suggestions
-        extensions = self.suggest_extensions(parsed["destinations"], available_for_extensions)
-        
-        # Get handicraft options
-        handicrafts = {}
-        for destination in parsed["destinations"]:
-            if destination in self.handicrafts_database:
-                handicrafts[destination] = self.handicrafts_database[destination]
-        
-        # Get transport connectivity
-        transport_matrix = {}
-        for i, from_city in enumerate(optimized_route[:-1]):
-            to_city = optimized_route[i + 1]
-            transport_matrix[f"{from_city}-{to_city}"] = self.get_transport_options(from_city, to_city)
         
         # Determine recommendation approach
         recommendation_type = "create_new"
@@ -613,38 +718,61 @@ class T2IndiaComprehensiveSystem:
                 base_itinerary = best_match["itinerary"]
                 confidence = "medium"
         
-        # Compile comprehensive result
-        result = {
-            "query_id": query_id,
-            "timestamp": datetime.now().isoformat(),
-            "user_input": user_input,
-            "parsed_input": parsed,
-            "recommendation": {
-                "type": recommendation_type,
-                "confidence": confidence,
-                "base_itinerary": base_itinerary,
-                "optimized_route": optimized_route,
-                "estimated_duration": base_days_needed
-            },
-            "library_matches": matches[:3],  # Top 3 matches
-            "extensions": extensions[:5],  # Top 5 extensions
-            "handicrafts": handicrafts,
-            "transport_connectivity": transport_matrix,
-            "themes_detected": parsed["themes"],
-            "service_notes": {
-                "travel_time_limit": "7 hours max between destinations",
-                "sightseeing_limit": "3 hours per vehicle per day",
-                "modification_fee": "Mandatory service fee for any changes",
-                "photo_requirements": "300x300mm, 500 DPI for all supplier photos"
-            }
+        return {
+            "type": recommendation_type,
+            "confidence": confidence,
+            "base_itinerary": base_itinerary,
+            "optimized_route": optimized_route,
+            "estimated_duration": base_days_needed
+        }
+
+    def build_extensions(self, parsed, data=None):
+        """Best feasible set of extensions for the days left after the core destinations"""
+        data = data or self.data
+        base_days_needed = len(parsed["destinations"]) * 2  # Rough estimate
+        available_for_extensions = max(0, (parsed["duration"] or 0) - base_days_needed)
+        selected = self.select_extensions(parsed["destinations"], available_for_extensions, data)
+        if selected:
+            return selected
+        # Nothing fits: show what extra days would unlock
+        return self.suggest_extensions(parsed["destinations"], available_for_extensions, limit=5, data=data)
+
+    def build_handicrafts(self, parsed, data=None):
+        """Handicraft options at the requested destinations"""
+        data = data or self.data
+        handicrafts = {}
+        for destination in parsed["destinations"]:
+            if destination in data.handicrafts_database:
+                handicrafts[destination] = data.handicrafts_database[destination]
+        return handicrafts
+
+    def build_transport_matrix(self, optimized_route, data=None):
+        """Transport options for each consecutive leg of a route"""
+        data = data or self.data
+        transport_matrix = {}
+        for i, from_city in enumerate(optimized_route[:-1]):
+            to_city = optimized_route[i + 1]
+            transport_matrix[f"{from_city}-{to_city}"] = self.get_transport_options(from_city, to_city, data)
+        return transport_matrix
+
+    def build_service_notes(self):
+        """Service standards attached to every result"""
+        return {
+            "travel_time_limit": f"{self.max_travel_hours} hours max between destinations",
+            "sightseeing_limit": f"{self.max_sightseeing_hours} hours per vehicle per day",
+            "modification_fee": "Mandatory service fee for any changes",
+            "photo_requirements": "300x300mm, 500 DPI for all supplier photos"
         }
-        
-        return result
 
     def format_comprehensive_output(self, result):
         """Format comprehensive result for client presentation"""
+        return "".join(self.iter_comprehensive_output(result))
+
+    def iter_comprehensive_output(self, result):
+        """Yield the formatted client presentation one section at a time"""
         
-        output = f"""
+        # Route summary first so streaming clients can show it straight away
+        yield f"""
 === T2INDIA COMPREHENSIVE ITINERARY ANALYSIS ===
 Query ID: {result['query_id']}
 Processed: {result['timestamp'][:19]}
@@ -667,7 +795,7 @@ Estimated Duration: {result['recommendation']['estimated_duration']} days minimu
         # Add base itinerary info if available
         if result['recommendation']['base_itinerary']:
             base = result['recommendation']['base_itinerary']
-            output += f"""
+            yield f"""
 BASE ITINERARY REFERENCE:
 Name: {base['name']} ({base['unique_id']})
 Rating: {base['rating']}★ ({base['bookings']} successful bookings)
@@ -677,58 +805,62 @@ Transport: {'Included' if base.get('transport_included') else 'Not included'}
         
         # Add library matches
         if result['library_matches']:
-            output += "\n=== SIMILAR PROVEN ITINERARIES ===\n"
+            parts = ["\n=== SIMILAR PROVEN ITINERARIES ===\n"]
             for i, match in enumerate(result['library_matches'][:2], 1):
                 itinerary = match['itinerary']
-                output += f"""
+                parts.append(f"""
 {i}. {itinerary['name']} (Match: {match['match_score']:.1%})
    Duration: {itinerary['duration']} days | Rating: {itinerary['rating']}★
    Route: {' → '.join(itinerary['route'])}
    Price: {itinerary['price_range']} | Bookings: {itinerary['bookings']}
-"""
+""")
+            yield "".join(parts)
         
         # Add transport connectivity
         if result['transport_connectivity']:
-            output += "\n=== TRANSPORT CONNECTIVITY ===\n"
+            parts = ["\n=== TRANSPORT CONNECTIVITY ===\n"]
             for route, options in result['transport_connectivity'].items():
-                output += f"\n{route.replace('-', ' → ')}:\n"
+                parts.append(f"\n{route.replace('-', ' → ')}:\n")
                 for mode, details in options.items():
                     if isinstance(details, dict):
-                        duration = details.get('duration', 'Unknown')
-                        cost = details.get('cost', 'Contact for pricing')
-                        output += f"  • {mode.title()}: {duration}, {cost}\n"
+                        duration = format_duration(details.get('minutes'))
+                        cost = format_cost(details.get('cost_min_paise'), details.get('cost_max_paise'))
+                        parts.append(f"  • {mode.title()}: {duration}, {cost}\n")
+            yield "".join(parts)
         
         # Add extension options
         if result['extensions']:
-            output += "\n=== EXTENSION OPTIONS ===\n"
+            parts = ["\n=== EXTENSION OPTIONS ===\n"]
             for ext in result['extensions'][:3]:
                 extension = ext['extension']
                 fits = "✓" if ext['fits_duration'] else "⚠"
-                output += f"""
+                parts.append(f"""
 {fits} From {ext['from_city']}: {extension['theme']}
    Destinations: {', '.join(extension['destinations'])}
    Additional Days: {extension['additional_days']}
    Transport: {extension.get('transport', 'Contact for details')}
    Priority: {extension.get('priority', 'Standard')}
-"""
+""")
+            yield "".join(parts)
         
         # Add handicraft experiences
         if result['handicrafts']:
-            output += "\n=== HANDICRAFT EXPERIENCES ===\n"
+            parts = ["\n=== HANDICRAFT EXPERIENCES ===\n"]
             total_handicraft_cost = 0
             for city, crafts in result['handicrafts'].items():
-                output += f"\nIn {city}:\n"
+                parts.append(f"\nIn {city}:\n")
                 for craft in crafts:
                     price_num = int(re.search(r'₹([\d,]+)', craft['price']).group(1).replace(',', ''))
                     total_handicraft_cost += price_num
-                    output += f"""  • {craft['name']} with {craft['artisan']}
+                    parts.append(f"""  • {craft['name']} with {craft['artisan']}
     Duration: {craft['workshop_duration']} | Price: {craft['price']} | Level: {craft['difficulty']}
     Description: {craft['description']}
-"""
-            output += f"\nTotal Handicraft Investment: ₹{total_handicraft_cost:,}\n"
+""")
+            parts.append(f"\nTotal Handicraft Investment: ₹{total_handicraft_cost:,}\n")
+            yield "".join(parts)
         
         # Add service notes
-        output += f"""
+        yield f"""
 === T2INDIA SERVICE STANDARDS ===
 • Travel Time Limit: {result['service_notes']['travel_time_limit']}
 • Sightseeing Limit: {result['service_notes']['sightseeing_limit']}
@@ -750,8 +882,44 @@ All options available in two categories:
 
 Contact T2India for detailed pricing based on group size and travel dates.
 """
-        
-        return output
+
+    def iter_comprehensive_jsonl(self, result):
+        """Yield the result as JSON lines, one section per line in presentation order"""
+        sections = [
+            ("summary", {
+                "query_id": result["query_id"],
+                "timestamp": result["timestamp"],
+                "user_input": result["user_input"],
+                "parsed_input": result["parsed_input"],
+                "recommendation": result["recommendation"]
+            }),
+            ("library_matches", result["library_matches"]),
+            ("transport_connectivity", result["transport_connectivity"]),
+            ("extensions", result["extensions"]),
+            ("handicrafts", result["handicrafts"]),
+            ("themes_detected", result["themes_detected"]),
+            ("service_notes", result["service_notes"])
+        ]
+        for section, data in sections:
+            yield json.dumps({"section": section, "data": data}, ensure_ascii=False) + "\n"
+
+def tag_extensions(entries, order, destination):
+    """Lazily key a city's sorted extension entries for merging across destinations"""
+    for priority, position, extension in entries:
+        yield priority, order, position, destination, extension
+
+# Per-process system used by process_batch worker processes
+batch_worker_system = None
+
+def init_batch_worker(tables, intermediate_hubs, version, generation):
+    """Build one system per worker process, serving the parent's bundle rather than the data on disk"""
+    global batch_worker_system
+    batch_worker_system = T2IndiaComprehensiveSystem()
+    batch_worker_system.publish(ComprehensiveData(tables, intermediate_hubs, version, generation))
+
+def plan_routing_in_worker(destinations):
+    """Route one intent inside a batch worker process"""
+    return batch_worker_system.plan_routing(destinations)
 
 # Test scenarios for comprehensive testing
 def run_comprehensive_tests():
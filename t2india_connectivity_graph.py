@@ -0,0 +1,184 @@
+"""
+T2India Connectivity Graph
+Typed, array-backed view of the connectivity matrix: integer city ids, per-mode minutes and paise
+"""
+
+import re
+
+import numpy as np
+
+MISSING = -1  # marks a mode that does not serve a city pair
+UNREACHABLE = 10 ** 7  # minutes, used where no mode serves a city pair
+
+# Descriptive fields carried through to the output as-is
+TEXT_FIELDS = ("service", "frequency", "route")
+
+
+class ConnectivityGraph:
+    def __init__(self, cities, modes):
+        self.cities = list(cities)
+        self.city_ids = {city: i for i, city in enumerate(self.cities)}
+        self.modes = list(modes)
+        self.mode_ids = {mode: i for i, mode in enumerate(self.modes)}
+
+        shape = (len(self.modes), len(self.cities), len(self.cities))
+        self.minutes = np.full(shape, MISSING, dtype=np.int32)
+        self.cost_min_paise = np.full(shape, MISSING, dtype=np.int64)
+        self.cost_max_paise = np.full(shape, MISSING, dtype=np.int64)
+        self.distance_km = np.full(shape, MISSING, dtype=np.int32)
+        self.text = {}  # (mode_id, from_id, to_id) -> descriptive fields
+        self.pair_modes = {}  # (from_id, to_id) -> mode ids in listed order
+
+        self.best_minutes = None
+
+    @classmethod
+    def from_matrix(cls, connectivity_matrix):
+        """Parse the display-string connectivity matrix once into numeric arrays"""
+        cities = []
+        modes = []
+        for from_city, connections in connectivity_matrix.items():
+            for city in [from_city] + list(connections):
+                if city not in cities:
+                    cities.append(city)
+            for options in connections.values():
+                for mode in options:
+                    if mode not in modes:
+                        modes.append(mode)
+
+        graph = cls(cities, modes)
+        for from_city, connections in connectivity_matrix.items():
+            for to_city, options in connections.items():
+                i, j = graph.city_ids[from_city], graph.city_ids[to_city]
+                graph.pair_modes[(i, j)] = [graph.mode_ids[mode] for mode in options]
+                for mode, details in options.items():
+                    m = graph.mode_ids[mode]
+                    minutes = parse_duration_minutes(details.get("duration"))
+                    cost = parse_cost_paise(details.get("cost"))
+                    distance = parse_distance_km(details.get("distance"))
+                    if minutes is not None:
+                        graph.minutes[m, i, j] = minutes
+                    if cost is not None:
+                        graph.cost_min_paise[m, i, j], graph.cost_max_paise[m, i, j] = cost
+                    if distance is not None:
+                        graph.distance_km[m, i, j] = distance
+                    text = {field: details[field] for field in TEXT_FIELDS if field in details}
+                    if text:
+                        graph.text[(m, i, j)] = text
+
+        graph.compute_best_minutes()
+        return graph
+
+    def compute_best_minutes(self):
+        """Fastest mode per directed city pair, UNREACHABLE where no mode exists"""
+        served = np.where(self.minutes == MISSING, UNREACHABLE, self.minutes)
+        self.best_minutes = served.min(axis=0) if len(self.modes) else np.full(
+            (len(self.cities), len(self.cities)), UNREACHABLE, dtype=np.int32)
+        np.fill_diagonal(self.best_minutes, 0)
+
+    def undirected_best_minutes(self):
+        """Fastest time in either direction, for data listed one way only"""
+        return np.minimum(self.best_minutes, self.best_minutes.T)
+
+    def has_connection(self, from_city, to_city):
+        """Whether any mode directly serves from_city → to_city"""
+        return (self.city_ids.get(from_city), self.city_ids.get(to_city)) in self.pair_modes
+
+    def transport_options(self, from_city, to_city):
+        """Numeric per-mode records for a directly served city pair"""
+        i, j = self.city_ids[from_city], self.city_ids[to_city]
+        options = {}
+        for m in self.pair_modes[(i, j)]:
+            minutes = int(self.minutes[m, i, j])
+            cost_min = int(self.cost_min_paise[m, i, j])
+            record = {
+                "minutes": minutes if minutes != MISSING else None,
+                "cost_min_paise": cost_min if cost_min != MISSING else None,
+                "cost_max_paise": int(self.cost_max_paise[m, i, j]) if cost_min != MISSING else None
+            }
+            distance = int(self.distance_km[m, i, j])
+            if distance != MISSING:
+                record["distance_km"] = distance
+            record.update(self.text.get((m, i, j), {}))
+            options[self.modes[m]] = record
+        return options
+
+    def reverse_transport_options(self, from_city, to_city):
+        """Records for from_city → to_city served by a pair listed only as to_city → from_city
+
+        Directional mode names and route text are turned around so they
+        describe the journey actually being taken.
+        """
+        return {
+            reverse_mode(mode): dict(record, route=reverse_route_text(record["route"])) if "route" in record else record
+            for mode, record in self.transport_options(to_city, from_city).items()
+        }
+
+    def route_minutes(self, routes):
+        """Vectorized travel time of one route or a 2-D array of equal-length routes (city ids)"""
+        routes = np.asarray(routes)
+        times = self.undirected_best_minutes()
+        return times[routes[..., :-1], routes[..., 1:]].sum(axis=-1)
+
+
+def reverse_mode(mode):
+    """Mode name for the opposite direction, such as flight_to_bagdogra → flight_from_bagdogra"""
+    parts = mode.split("_")
+    swap = {"to": "from", "from": "to"}
+    return "_".join(swap.get(part, part) for part in parts)
+
+
+def reverse_route_text(route):
+    """Reverse a "A→B(cab)→C(flight)" route; each "(mode)" tags the leg arriving at its stop"""
+    stops = [re.match(r"(.*?)(\(.*\))?$", stop.strip()).groups("") for stop in route.split("→")]
+    # The leg into stops[i] becomes the leg out of it, arriving at stops[i - 1]
+    reversed_stops = [stops[-1][0]] + [stops[i - 1][0] + stops[i][1] for i in range(len(stops) - 1, 0, -1)]
+    return "→".join(reversed_stops)
+
+
+def parse_duration_minutes(duration):
+    """Convert a display duration such as "4.5h" into minutes"""
+    if not duration:
+        return None
+    match = re.match(r"\s*(\d+(?:\.\d+)?)\s*h", duration)
+    return int(round(float(match.group(1)) * 60)) if match else None
+
+
+def parse_cost_paise(cost):
+    """Convert a display range such as "₹3,000-8,000" into (min, max) paise"""
+    if not cost:
+        return None
+    amounts = [int(amount.replace(",", "")) * 100 for amount in re.findall(r"\d[\d,]*", cost)]
+    if not amounts:
+        return None
+    return min(amounts), max(amounts)
+
+
+def parse_distance_km(distance):
+    """Convert a display distance such as "230km" into kilometres"""
+    if not distance:
+        return None
+    match = re.match(r"\s*(\d+)\s*km", distance)
+    return int(match.group(1)) if match else None
+
+
+def format_duration(minutes):
+    """Render minutes in the "4.5h" display style"""
+    if minutes is None:
+        return "Unknown"
+    hours = round(minutes / 60, 2)
+    return f"{hours:g}h"
+
+
+def format_cost(cost_min_paise, cost_max_paise):
+    """Render a paise range in the "₹3,000-8,000" display style"""
+    if cost_min_paise is None:
+        return "Contact for pricing"
+    low, high = cost_min_paise // 100, cost_max_paise // 100
+    if low == high:
+        return f"₹{low:,}"
+    return f"₹{low:,}-{high:,}"
+
+
+def format_distance(distance_km):
+    """Render kilometres in the "230km" display style"""
+    return f"{distance_km}km"
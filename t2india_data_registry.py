@@ -0,0 +1,149 @@
+"""
+T2India Data Registry
+Process-wide, read-only data layer injected into every engine: the hot-reloadable comprehensive
+snapshot, the reference tables of the other engines, and indexes derived from them
+"""
+
+import fcntl
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+from t2india_data_store import get_data_store
+from t2india_library_snapshot import (
+    BUILD_SCRIPT, DEFAULT_LIBRARY_SNAPSHOT_PATH, DEFAULT_LIBRARY_SOURCE_PATH, LIBRARY_SNAPSHOT_PATH_ENV,
+    LIBRARY_SNAPSHOT_TABLES, LIBRARY_SOURCE_PATH_ENV, LibrarySnapshot
+)
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "t2india_reference_data.json")
+REFERENCE_DATA_PATH_ENV = "T2INDIA_REFERENCE_DATA_PATH"
+
+REFERENCE_TABLES = (
+    "travel_circuits",  # ItinerarySuggestionEngine
+    "city_matrix",
+    "circuit_extensions",
+    "destination_aliases",  # T2IndiaItineraryLibrary
+    "destination_stays",
+    "intermediate_hubs",  # IntermediateConnectivitySystem
+    "major_hubs",
+    "railway_hubs",
+    "city_coordinates",
+    "hub_connection_minutes",
+    "workshop_handicrafts"  # T2IndiaFinalSystem
+)
+# The itinerary tables live in the library source file, which only the snapshot build parses;
+# workers serve them from the memory-mapped snapshot
+LIBRARY_TABLES = tuple(LIBRARY_SNAPSHOT_TABLES)
+
+
+class DataRegistry:
+    def __init__(self, data_store=None, reference_store=None, library_snapshot_path=None, library_source_path=None):
+        self.data_store = data_store or get_data_store()
+        self.reference_store = reference_store or get_data_store(
+            os.environ.get(REFERENCE_DATA_PATH_ENV, REFERENCE_DATA_PATH), REFERENCE_TABLES
+        )
+        self.library_snapshot_path = library_snapshot_path or os.environ.get(
+            LIBRARY_SNAPSHOT_PATH_ENV, DEFAULT_LIBRARY_SNAPSHOT_PATH
+        )
+        self.library_source_path = library_source_path or os.environ.get(
+            LIBRARY_SOURCE_PATH_ENV, DEFAULT_LIBRARY_SOURCE_PATH
+        )
+        self.derived = {}  # name -> (generation, structure)
+        self.derived_lock = threading.RLock()  # builders may depend on other shared structures
+
+    def reference(self, table):
+        """A shared reference table; callers must not mutate it"""
+        if table in LIBRARY_SNAPSHOT_TABLES:
+            snapshot = self.library_snapshot()
+            if snapshot is None:
+                raise KeyError(f"{table}: no usable library snapshot at {self.library_snapshot_path} "
+                               f"and no library source at {self.library_source_path} to build one from")
+            return snapshot.tables[table]
+        return self.reference_store.current()[table]
+
+    def library_snapshot(self):
+        """Memory-mapped library snapshot of the current library source, or None"""
+        # Either file being replaced (new inode) or rewritten starts a new generation
+        generation = (file_signature(self.library_snapshot_path), file_signature(self.library_source_path))
+        return self.shared("library_snapshot", generation, self.load_library_snapshot)
+
+    def load_library_snapshot(self):
+        try:
+            return self.open_library_snapshot()
+        except (OSError, ValueError) as e:
+            if not os.path.exists(self.library_source_path):
+                logger.warning("Library snapshot unusable and no library source to rebuild it from: %s", e)
+                return None
+            # The build step was skipped or the source changed since
+            logger.warning("Rebuilding library snapshot from %s: %s", self.library_source_path, e)
+            return self.rebuild_library_snapshot()
+
+    def open_library_snapshot(self):
+        """The snapshot, checked against the (mtime_ns, size) of the library source when that is present
+
+        The build records the signature of the file it parsed, so a worker
+        stats the source instead of reading it.
+        """
+        snapshot = LibrarySnapshot(self.library_snapshot_path)
+        source_signature = file_signature(self.library_source_path)
+        if source_signature is not None and snapshot.source_signature != source_signature[:2]:
+            # A stale build must not shadow a newer library
+            raise ValueError(f"snapshot was built from a library source with (mtime_ns, size) "
+                             f"{snapshot.source_signature}, the current source has {source_signature[:2]}")
+        return snapshot
+
+    def rebuild_library_snapshot(self):
+        """Build the snapshot in a child process, so this process never parses the library"""
+        # Workers starting together wait for one build instead of each running their own
+        with open(f"{self.library_snapshot_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                return self.open_library_snapshot()  # built by another process while this one waited
+            except (OSError, ValueError):
+                pass
+            subprocess.run(
+                [sys.executable, BUILD_SCRIPT, self.library_snapshot_path, self.library_source_path,
+                 self.reference_store.path],
+                check=True, stdout=subprocess.DEVNULL
+            )
+            return self.open_library_snapshot()
+
+    def shared(self, name, generation, builder):
+        """Structure derived from a data generation, built once and shared by every engine"""
+        entry = self.derived.get(name)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        with self.derived_lock:
+            entry = self.derived.get(name)
+            if entry is None or entry[0] != generation:
+                entry = (generation, builder())
+                self.derived[name] = entry  # older generations are released
+            return entry[1]
+
+
+def file_signature(path):
+    """(mtime_ns, size, inode) of a file, or None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+# Created on first use, after any gunicorn fork
+data_registry = None
+data_registry_lock = threading.Lock()
+
+
+def get_data_registry():
+    """The process-wide registry"""
+    global data_registry
+    if data_registry is None:
+        with data_registry_lock:
+            if data_registry is None:
+                data_registry = DataRegistry()
+    return data_registry
@@ -0,0 +1,129 @@
+"""
+T2India Data Store
+Versioned JSON snapshot of the itinerary library, handicrafts, connectivity and extensions,
+loaded once per process, shared read-only and swapped atomically when the file changes
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "t2india_data.json")
+DATA_PATH_ENV = "T2INDIA_DATA_PATH"
+CHECK_INTERVAL_ENV = "T2INDIA_DATA_CHECK_SECONDS"
+
+SNAPSHOT_TABLES = ("connectivity_matrix", "itinerary_library", "handicrafts_database", "regional_extensions")
+
+
+class DataSnapshot:
+    def __init__(self, version, generation, tables, signature):
+        # Tables are shared by every system in the process and must be treated as read-only
+        self.version = version
+        self.generation = generation  # increments on every swap within this process
+        self.tables = tables
+        self.signature = signature  # (mtime_ns, size, inode) of the file it was read from
+        self.loaded_at = time.time()
+
+    def __getitem__(self, table):
+        return self.tables[table]
+
+
+class DataStore:
+    def __init__(self, path, check_interval=5.0, tables=SNAPSHOT_TABLES):
+        self.path = path
+        self.check_interval = check_interval
+        self.tables = tables
+        self.generation = 0
+        self.next_check = time.monotonic() + check_interval
+        self.check_lock = threading.Lock()
+        self.failed_signature = None  # a broken file is reported once, not on every check
+        self.snapshot = self.load()
+
+    def load(self):
+        """Read and validate the snapshot file"""
+        with open(self.path, encoding="utf-8") as f:
+            stat = os.fstat(f.fileno())
+            data = json.load(f)
+        missing = [table for table in self.tables if table not in data]
+        if missing:
+            raise ValueError(f"Data snapshot {self.path} is missing tables: {', '.join(missing)}")
+        self.generation += 1
+        return DataSnapshot(
+            data.get("version"),
+            self.generation,
+            {table: data[table] for table in self.tables},
+            (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        )
+
+    def current(self):
+        """Latest snapshot; the file is re-checked at most once per check_interval"""
+        now = time.monotonic()
+        if now >= self.next_check:
+            self.check_for_update(now)
+        return self.snapshot
+
+    def check_for_update(self, now=None):
+        """Swap in the file's contents if it changed since the last load"""
+        # One thread checks while the others keep serving the current snapshot
+        if not self.check_lock.acquire(blocking=False):
+            return False
+        try:
+            self.next_check = (now or time.monotonic()) + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                return False
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if signature in (self.snapshot.signature, self.failed_signature):
+                return False
+            try:
+                snapshot = self.load()
+            except (OSError, ValueError) as e:
+                # Keep serving the previous snapshot until a valid file appears
+                self.failed_signature = signature
+                logger.warning("Data snapshot reload failed, keeping version %s: %s", self.snapshot.version, e)
+                return False
+            self.snapshot = snapshot  # single reference swap
+            return True
+        finally:
+            self.check_lock.release()
+
+
+def write_snapshot(tables, version, path=None, table_names=SNAPSHOT_TABLES):
+    """Write a new snapshot atomically so running processes never read a partial file"""
+    path = path or os.environ.get(DATA_PATH_ENV, DEFAULT_DATA_PATH)
+    data = {"version": version}
+    data.update({table: tables[table] for table in table_names})
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".t2india_data.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+# One store per snapshot path per process
+data_stores = {}
+data_stores_lock = threading.Lock()
+
+
+def get_data_store(path=None, tables=SNAPSHOT_TABLES):
+    """Process-wide store for a snapshot path (T2INDIA_DATA_PATH or the bundled data file)"""
+    path = os.path.abspath(path or os.environ.get(DATA_PATH_ENV, DEFAULT_DATA_PATH))
+    store = data_stores.get(path)
+    if store is None:
+        with data_stores_lock:
+            store = data_stores.get(path)
+            if store is None:
+                store = DataStore(path, float(os.environ.get(CHECK_INTERVAL_ENV, 5.0)), tables)
+                data_stores[path] = store
+    return store
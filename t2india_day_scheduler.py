@@ -0,0 +1,209 @@
+"""
+T2India Day Scheduler
+Packs an ordered route's travel legs and sightseeing blocks into clock-timed days under the service rules
+"""
+
+DAY_START_MINUTES = 8 * 60  # Departures from 08:00
+DAY_END_MINUTES = 20 * 60  # Nothing scheduled after 20:00
+SIGHTSEEING_START_MINUTES = 10 * 60  # Sightseeing on stay days
+ARRIVAL_BUFFER_MINUTES = 60  # Hotel check-in before sightseeing on arrival
+TRANSFER_MINUTES = 30  # Between legs taken on the same day
+CLOCK_STEP_MINUTES = 15
+
+# Lexicographic objective packed into one integer: infeasible days, then unvisited cities,
+# then sightseeing blocks (more is better), then the sum of squared blocks per city (balance)
+INFEASIBLE_WEIGHT = 10 ** 9
+UNCOVERED_WEIGHT = 10 ** 6
+BLOCK_WEIGHT = 10 ** 3
+
+
+def format_clock(minutes):
+    """Minutes after midnight as HH:MM, with a day offset past midnight"""
+    days, minutes = divmod(int(minutes), 24 * 60)
+    clock = f"{minutes // 60:02d}:{minutes % 60:02d}"
+    return f"{clock} (+{days}d)" if days else clock
+
+
+def round_up_clock(minutes):
+    return -(-minutes // CLOCK_STEP_MINUTES) * CLOCK_STEP_MINUTES
+
+
+class DayScheduler:
+    def __init__(self, max_travel_minutes=7 * 60, sightseeing_minutes=3 * 60):
+        self.max_travel_minutes = max_travel_minutes
+        self.sightseeing_minutes = sightseeing_minutes
+
+    def schedule(self, route, leg_minutes, days):
+        """Day-by-day timeline for a route
+
+        leg_minutes[i] is the door-to-door time from route[i] to route[i + 1],
+        or None when unknown. A day carries at most one sightseeing block and
+        at most max_travel_minutes of travel; consecutive legs may share a day
+        when they fit. A single leg over the limit gets a day of its own that
+        is reported as infeasible, and a route that cannot fit the requested
+        days is stretched and the extra days are reported.
+        """
+        if not route:
+            return {"requested_days": days, "scheduled_days": 0, "feasible": True, "infeasible_days": [], "days": []}
+        days = max(days or 0, 1)
+        options = self.travel_options(leg_minutes)
+        # Returning to an earlier stop (a round trip) needs no second visit
+        required = [city not in route[:p] for p, city in enumerate(route)]
+
+        planned_days = days
+        plan = self.solve(route, options, required, planned_days)
+        while plan is None:
+            planned_days += 1
+            plan = self.solve(route, options, required, planned_days)
+
+        timeline = self.build_timeline(route, leg_minutes, plan)
+        for day in timeline[days:]:
+            day["feasible"] = False
+            day["issues"].append(f"Beyond the requested {days} days")
+        infeasible_days = [day["day"] for day in timeline if not day["feasible"]]
+        return {
+            "requested_days": days,
+            "scheduled_days": len(timeline),
+            "feasible": not infeasible_days,
+            "infeasible_days": infeasible_days,
+            "days": timeline
+        }
+
+    def travel_options(self, leg_minutes):
+        """Per start position, every run of consecutive legs that can be taken on one day"""
+        options = []
+        for i in range(len(leg_minutes)):
+            runs = []
+            clock = DAY_START_MINUTES
+            travel = 0
+            for j in range(i, len(leg_minutes)):
+                minutes = leg_minutes[j] if leg_minutes[j] is not None else self.max_travel_minutes
+                if j > i:
+                    clock += TRANSFER_MINUTES
+                clock += minutes
+                travel += minutes
+                infeasible = travel > self.max_travel_minutes
+                if infeasible and j > i:
+                    break
+                runs.append((j + 1, int(infeasible), int(self.arrival_block_fits(clock))))
+                if infeasible:
+                    break
+            options.append(runs)
+        return options
+
+    def arrival_block_fits(self, arrival):
+        """Whether a sightseeing block still fits after arriving at this clock time"""
+        return round_up_clock(arrival + ARRIVAL_BUFFER_MINUTES) + self.sightseeing_minutes <= DAY_END_MINUTES
+
+    def city_cost(self, position, blocks, required):
+        return (UNCOVERED_WEIGHT if required[position] and not blocks else 0) - BLOCK_WEIGHT * blocks + blocks * blocks
+
+    def solve(self, route, options, required, days):
+        """Dynamic program over (position, day, arrival block); None when the route needs more days"""
+        last = len(route) - 1
+        # (position, day the stay starts, arrival-day block) -> (cost, previous state, stay days, run end)
+        states = {(0, 0, 0): (0, None, 0, None)}
+        best_final = None
+        for day in range(days):
+            for (position, start, arrived), entry in list(states.items()):
+                if start != day:
+                    continue
+                cost = entry[0]
+                if position == last:
+                    total = cost + self.city_cost(position, arrived + days - start, required)
+                    if best_final is None or total < best_final[0]:
+                        best_final = (total, (position, start, arrived), days - start)
+                    continue
+                runs = [
+                    (end, block, infeasible * INFEASIBLE_WEIGHT
+                     + sum(required[p] for p in range(position + 1, end)) * UNCOVERED_WEIGHT)
+                    for end, infeasible, block in options[position]
+                ]
+                for stay in range(days - start):
+                    stay_cost = cost + self.city_cost(position, arrived + stay, required)
+                    for end, block, run_cost in runs:
+                        next_cost = stay_cost + run_cost
+                        key = (end, start + stay + 1, block)
+                        if key not in states or next_cost < states[key][0]:
+                            states[key] = (next_cost, (position, start, arrived), stay, end)
+        # Arrivals on the last day finish the trip with just the arrival block
+        for (position, start, arrived), entry in states.items():
+            if position == last and start == days:
+                total = entry[0] + self.city_cost(position, arrived, required)
+                if best_final is None or total < best_final[0]:
+                    best_final = (total, (position, start, arrived), 0)
+        if best_final is None:
+            return None
+
+        # Walk back to (position, arrival block, stay days, run end) segments in route order
+        _, state, final_stay = best_final
+        segments = [(state[0], state[2], final_stay, None)]
+        while True:
+            _, previous, stay, end = states[state]
+            if previous is None:
+                break
+            segments.append((previous[0], previous[2], stay, end))
+            state = previous
+        segments.reverse()
+        return segments
+
+    def build_timeline(self, route, leg_minutes, plan):
+        """Clock-timed activities for each planned day"""
+        timeline = []
+
+        def new_day(city):
+            day = {
+                "day": len(timeline) + 1,
+                "city": city,
+                "activities": [],
+                "travel_minutes": 0,
+                "sightseeing_minutes": 0,
+                "feasible": True,
+                "issues": []
+            }
+            timeline.append(day)
+            return day
+
+        def add_sightseeing(day, city, start):
+            day["activities"].append({
+                "type": "sightseeing",
+                "city": city,
+                "start": format_clock(start),
+                "end": format_clock(start + self.sightseeing_minutes)
+            })
+            day["sightseeing_minutes"] += self.sightseeing_minutes
+
+        for position, arrived, stay, end in plan:
+            city = route[position]
+            for _ in range(stay):
+                add_sightseeing(new_day(city), city, SIGHTSEEING_START_MINUTES)
+            if end is None:
+                continue
+
+            day = new_day(route[end])
+            clock = DAY_START_MINUTES
+            for leg in range(position, end):
+                if leg > position:
+                    clock += TRANSFER_MINUTES
+                minutes = leg_minutes[leg]
+                if minutes is None:
+                    day["issues"].append(f"Travel time {route[leg]} → {route[leg + 1]} unknown, "
+                                         f"{self.max_travel_minutes // 60}h assumed")
+                    minutes = self.max_travel_minutes
+                day["activities"].append({
+                    "type": "travel",
+                    "from": route[leg],
+                    "to": route[leg + 1],
+                    "start": format_clock(clock),
+                    "end": format_clock(clock + minutes),
+                    "minutes": minutes
+                })
+                clock += minutes
+                day["travel_minutes"] += minutes
+            if day["travel_minutes"] > self.max_travel_minutes:
+                day["feasible"] = False
+                day["issues"].append(f"{day['travel_minutes'] / 60:g}h of travel exceeds the "
+                                     f"{self.max_travel_minutes / 60:g}h daily limit")
+            if self.arrival_block_fits(clock):
+                add_sightseeing(day, route[end], round_up_clock(clock + ARRIVAL_BUFFER_MINUTES))
+        return timeline
@@ -5,110 +5,90 @@ Consolidates all components: routing, library integration, handicrafts, connecti
 
 from intelligent_itinerary_builder import ItinerarySuggestionEngine
 from itinerary_library_integration import T2IndiaItineraryLibrary
+from t2india_data_registry import get_data_registry
+from t2india_parsed_query import ParsedQuery, StageTimer
 import json
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
+DURATION_PATTERN = re.compile(r'(\d+)\s*days?')
+
 class T2IndiaFinalSystem:
-    def __init__(self):
-        self.routing_engine = ItinerarySuggestionEngine()
-        self.itinerary_library = T2IndiaItineraryLibrary()
+    def __init__(self, registry=None):
+        registry = registry or get_data_registry()
+        self.routing_engine = ItinerarySuggestionEngine(registry)
+        self.itinerary_library = T2IndiaItineraryLibrary(registry)
         
         # Handicraft database (from previous implementation)
-        self.handicrafts_db = {
-            "Delhi": [
-                {
-                    "name": "Traditional Pottery",
-                    "artisan": "Master Ramesh Kumar",
-                    "workshop_duration": "3 hours",
-                    "price": "₹1,200",
-                    "difficulty": "Beginner",
-                    "description": "Learn traditional pottery techniques"
-                },
-                {
-                    "name": "Block Printing",
-                    "artisan": "Sita Devi",
-                    "workshop_duration": "4 hours", 
-                    "price": "₹1,500",
-                    "difficulty": "Intermediate",
-                    "description": "Traditional textile block printing"
-                }
-            ],
-            "Jaipur": [
-                {
-                    "name": "Blue Pottery",
-                    "artisan": "Master Krishan Kant",
-                    "workshop_duration": "4 hours",
-                    "price": "₹2,000",
-                    "difficulty": "Intermediate",
-                    "description": "Famous Jaipur blue pottery making"
-                },
-                {
-                    "name": "Gem Cutting",
-                    "artisan": "Rajesh Soni",
-                    "workshop_duration": "6 hours",
-                    "price": "₹5,000",
-                    "difficulty": "Advanced",
-                    "description": "Traditional gem cutting and polishing"
-                }
-            ],
-            "Goa": [
-                {
-                    "name": "Azulejo Tile Painting",
-                    "artisan": "Maria Fernandes",
-                    "workshop_duration": "3 hours",
-                    "price": "₹1,800",
-                    "difficulty": "Beginner",
-                    "description": "Portuguese-style tile painting"
-                }
-            ],
-            "Kolkata": [
-                {
-                    "name": "Kantha Embroidery",
-                    "artisan": "Malati Ghosh",
-                    "workshop_duration": "5 hours",
-                    "price": "₹2,500",
-                    "difficulty": "Intermediate",
-                    "description": "Traditional Bengali embroidery"
-                }
-            ]
-        }
+        self.handicrafts_db = registry.reference("workshop_handicrafts")
 
-    def process_user_query(self, user_input):
+    def process_user_query(self, user_input, debug=False):
         """
         Main function to process user query and return comprehensive suggestions
+        
+        The query is parsed once and the ParsedQuery is handed to every stage.
+        With debug=True the result also carries the parsed query and the
+        milliseconds spent in each stage under "debug".
         """
-        print(f"Processing: {user_input}")
+        timer = StageTimer(enabled=debug)
         
         # Step 1: Parse user input
-        destinations = self.routing_engine.extract_destinations(user_input)
-        duration = self.extract_duration(user_input)
+        parsed = self.parse_query(user_input)
+        destinations, duration = parsed.destinations, parsed.duration
+        timer.lap("parse")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processing query", extra={"query": parsed.to_dict()})
         
         # Step 2: Check existing itinerary library first
         library_result = self.itinerary_library.generate_hybrid_itinerary(
-            user_input, destinations, duration
+            user_input, destinations, duration, parsed=parsed
         )
+        timer.lap("library")
         
         # Step 3: Generate routing suggestions
-        routing_result = self.routing_engine.suggest_itinerary(user_input)
+        routing_result = self.routing_engine.suggest_itinerary(user_input, parsed=parsed)
+        timer.lap("routing")
         
         # Step 4: Combine results
+        handicraft_options = self.get_handicraft_options(destinations)
+        timer.lap("handicrafts")
+        final_recommendation = self.generate_final_recommendation(
+            library_result, routing_result, destinations, duration
+        )
+        timer.lap("recommendation")
+        
         final_result = {
             "user_query": user_input,
             "parsed_destinations": destinations,
             "parsed_duration": duration,
             "library_check": library_result,
             "routing_suggestions": routing_result,
-            "handicraft_options": self.get_handicraft_options(destinations),
-            "final_recommendation": self.generate_final_recommendation(
-                library_result, routing_result, destinations, duration
-            )
+            "handicraft_options": handicraft_options,
+            "final_recommendation": final_recommendation
         }
+        if debug:
+            final_result["debug"] = {
+                "parsed_query": parsed.to_dict(),
+                "stage_timings_ms": timer.timings
+            }
         
         return final_result
 
+    def parse_query(self, user_input):
+        """Destinations, duration and normalized destinations of a request, extracted once"""
+        destinations = self.routing_engine.extract_destinations(user_input)
+        return ParsedQuery(
+            user_input,
+            destinations,
+            self.extract_duration(user_input),
+            self.itinerary_library.normalize_request(destinations)
+        )
+
     def extract_duration(self, user_input):
         """Extract duration from user input"""
-        duration_match = re.search(r'(\d+)\s*days?', user_input.lower())
+        duration_match = DURATION_PATTERN.search(user_input.lower())
         return int(duration_match.group(1)) if duration_match else None
 
     def get_handicraft_options(self, destinations):
@@ -137,6 +117,7 @@ class T2IndiaFinalSystem:
                 "type": "existing_itinerary",
                 "base": library_result["base_itinerary"],
                 "modifications": library_result["existing_match"]["modifications_needed"],
+                "modified_itinerary": library_result["existing_match"]["modified_itinerary"],
                 "confidence": "high",
                 "reason": f"Perfect match with proven itinerary ({library_result['existing_match']['itinerary']['bookings']} bookings)"
             }
@@ -212,6 +193,11 @@ Modifications Needed:
 """
             for mod in result['final_recommendation']['primary_suggestion']['modifications']:
                 output += f"• {mod}\n"
+            modified = result['final_recommendation']['primary_suggestion']['modified_itinerary']
+            if modified['inserted'] or modified['removed'] or modified['day_changes']:
+                output += f"\nCustomized Route: {' → '.join(modified['route'])}\n"
+                stays = [f"{stay['city']} {stay['days']}d" for stay in modified['stays']]
+                output += f"Stays: {', '.join(stays)}\n"
         else:
             route = result['routing_suggestions']['suggested_route']
             output += f"\nSuggested Route: {' → '.join(route)}\n"
@@ -258,6 +244,7 @@ if __name__ == "__main__":
     
     for query in test_queries:
         print("=" * 80)
+        print(f"Processing: {query}")
         result = system.process_user_query(query)
         formatted_output = system.format_output_for_client(result)
         print(formatted_output)
@@ -0,0 +1,105 @@
+"""
+T2India Geo
+City coordinates as great-circle distance matrices, and the flight time model derived from them
+"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Block time = fixed taxi/climb/descent overhead + cruise; calibrated on the connectivity matrix flights
+FLIGHT_OVERHEAD_MINUTES = 40
+CRUISE_SPEED_KMPH = 800
+FLIGHT_ROUNDING_MINUTES = 5
+
+# Road legs: great-circle km stretched to road km, at a typical intercity average speed
+ROAD_DETOUR_FACTOR = 1.25
+ROAD_SPEED_KMPH = 55
+MIN_FLIGHT_KM = 400  # shorter trips go by road
+
+# Lowest listed economy fares grow slowly with distance
+FLIGHT_BASE_FARE_PAISE = 300000
+FLIGHT_FARE_PAISE_PER_KM = 100
+
+
+def great_circle_km(lat1, lon1, lat2, lon2):
+    """Haversine distance in km; accepts scalars or broadcastable arrays of degrees"""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class GeoIndex:
+    def __init__(self, city_coordinates):
+        # city_coordinates: {city: [latitude, longitude]}
+        self.cities = list(city_coordinates)
+        self.city_ids = {city: i for i, city in enumerate(self.cities)}
+        coordinates = np.array([city_coordinates[city] for city in self.cities], dtype=float).reshape(-1, 2)
+        latitudes, longitudes = coordinates[:, 0], coordinates[:, 1]
+        self.distance_km = great_circle_km(
+            latitudes[:, None], longitudes[:, None], latitudes[None, :], longitudes[None, :]
+        )
+
+    def __contains__(self, city):
+        return city in self.city_ids
+
+    def distance(self, from_city, to_city):
+        """Great-circle km between two cities, or None when either has no coordinates"""
+        i, j = self.city_ids.get(from_city), self.city_ids.get(to_city)
+        if i is None or j is None:
+            return None
+        return self.distance_km.item(i, j)
+
+    def submatrix(self, cities):
+        """Distance matrix for a list of cities, all of which must have coordinates"""
+        ids = [self.city_ids[city] for city in cities]
+        return self.distance_km[np.ix_(ids, ids)]
+
+
+def get_geo_index(registry):
+    """Process-wide index over the reference city coordinates"""
+    generation = registry.reference_store.current().generation
+    return registry.shared("geo_index", generation, lambda: GeoIndex(registry.reference("city_coordinates")))
+
+
+class FlightTimeModel:
+    def __init__(self, geo, connection_minutes, default_connection_minutes):
+        self.geo = geo
+        blocks = FLIGHT_OVERHEAD_MINUTES + geo.distance_km / CRUISE_SPEED_KMPH * 60
+        self.minutes = (np.rint(blocks / FLIGHT_ROUNDING_MINUTES) * FLIGHT_ROUNDING_MINUTES).astype(np.int32)
+        np.fill_diagonal(self.minutes, 0)
+        self.fares_paise = (FLIGHT_BASE_FARE_PAISE + geo.distance_km * FLIGHT_FARE_PAISE_PER_KM).astype(np.int64)
+        self.connection_buffers = connection_minutes  # {hub: minutes}
+        self.default_connection_minutes = default_connection_minutes
+        
+        # Plain-int lookups keyed by airport pair: one dict probe per call, no index or NumPy scalar work.
+        # The located cities are the reference coordinates, so the pair count stays small.
+        self.pair_minutes = self.pair_table(self.minutes)
+        self.pair_fares_paise = self.pair_table(self.fares_paise)
+
+    def pair_table(self, matrix):
+        rows = matrix.tolist()
+        return {(a, b): rows[i][j] for a, i in self.geo.city_ids.items() for b, j in self.geo.city_ids.items()}
+
+    def flight_minutes(self, from_airport, to_airport):
+        """Precomputed block time between two airports, or None when either has no coordinates"""
+        return self.pair_minutes.get((from_airport, to_airport))
+
+    def fare_paise(self, from_airport, to_airport):
+        """Estimated lowest fare between two airports, or None when either has no coordinates"""
+        return self.pair_fares_paise.get((from_airport, to_airport))
+
+    def connection_minutes(self, hub):
+        """Check-in and transfer buffer at a departure airport"""
+        return self.connection_buffers.get(hub, self.default_connection_minutes)
+
+
+def door_to_door_minutes(flight_model):
+    """Minutes between every pair of located cities: by road, or flying after the departure buffer, whichever is faster"""
+    geo = flight_model.geo
+    road = geo.distance_km * ROAD_DETOUR_FACTOR / ROAD_SPEED_KMPH * 60
+    buffers = np.array([flight_model.connection_minutes(city) for city in geo.cities], dtype=float)
+    flying = np.where(geo.distance_km >= MIN_FLIGHT_KM, flight_model.minutes + buffers[:, None], np.inf)
+    minutes = np.rint(np.minimum(road, flying)).astype(np.int32)
+    np.fill_diagonal(minutes, 0)
+    return minutes
@@ -0,0 +1,162 @@
+"""
+T2India Hub Routing Table
+All-pairs A→C→B routing through airport hubs as NumPy min-plus products, stored as a compact lookup table
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from t2india_connectivity_graph import UNREACHABLE
+
+NO_HUB = -1
+DEFAULT_HUB_ROUTING_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "hub_routing_table.npz"
+)
+HUB_ROUTING_TABLE_PATH_ENV = "T2INDIA_HUB_ROUTING_TABLE_PATH"
+
+
+def min_plus(left, right, chunk_rows=256):
+    """(min, +) matrix product and the argmin over the shared axis, in row chunks to bound memory"""
+    rows = left.shape[0]
+    values = np.empty((rows, right.shape[1]), dtype=np.int64)
+    choices = np.empty((rows, right.shape[1]), dtype=np.int32)
+    for start in range(0, rows, chunk_rows):
+        block = left[start:start + chunk_rows, :, None] + right[None, :, :]
+        choices[start:start + chunk_rows] = block.argmin(axis=1)
+        values[start:start + chunk_rows] = block.min(axis=1)
+    return values, choices
+
+
+class HubRoutingTable:
+    def __init__(self, cities, hubs, minutes, ground_km, access_hub, egress_hub, fingerprint=None):
+        self.cities = list(cities)
+        self.city_ids = {city: i for i, city in enumerate(self.cities)}
+        self.hubs = list(hubs)
+        # Door-to-door minutes, ground kilometres and chosen hubs per (origin, destination)
+        self.minutes = minutes
+        self.ground_km = ground_km
+        self.access_hub = access_hub
+        self.egress_hub = egress_hub
+        # Content hash of the reference data the table was built from; see reference_fingerprint
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, intermediate_hubs, hubs, flight_minutes, connection_minutes, fingerprint=None):
+        """Compute every A→C→C'→B option for all city pairs at once
+
+        intermediate_hubs gives the ground legs from remote cities to their
+        airports; hubs are the airports themselves. flight_minutes(from_hub,
+        to_hub) estimates the flight between two hubs, and the departure hub's
+        connection_minutes(hub) buffer is added whenever a flight is taken. Hubs are their own access point,
+        so hub-to-hub pairs are plain flights and remote-to-hub pairs are a
+        single A→C→B transfer.
+        """
+        hubs = list(dict.fromkeys(list(hubs) + [
+            hub for info in intermediate_hubs.values() for hub in info["nearest_airports"]
+        ]))
+        cities = list(dict.fromkeys(list(intermediate_hubs) + hubs))
+        hub_ids = {hub: h for h, hub in enumerate(hubs)}
+        city_ids = {city: i for i, city in enumerate(cities)}
+
+        # Ground access legs: remote city → airport, and each airport to itself
+        access = np.full((len(cities), len(hubs)), UNREACHABLE, dtype=np.int64)
+        access_km = np.zeros((len(cities), len(hubs)), dtype=np.int64)
+        for hub, h in hub_ids.items():
+            access[city_ids[hub], h] = 0
+        for city, info in intermediate_hubs.items():
+            for hub, details in info["nearest_airports"].items():
+                access[city_ids[city], hub_ids[hub]] = details["travel_minutes"]
+                access_km[city_ids[city], hub_ids[hub]] = details["distance_km"]
+
+        # Hub to hub flights including the departure hub's buffer; staying at one hub is free
+        flights = np.array(
+            [[0 if a == b else flight_minutes(a, b) + connection_minutes(a) for b in hubs] for a in hubs],
+            dtype=np.int64
+        )
+
+        # origin → access hub → egress hub, then egress hub → destination by ground
+        to_egress, access_choice = min_plus(access, flights)
+        minutes, egress_choice = min_plus(to_egress, access.T)
+        np.fill_diagonal(minutes, 0)
+
+        rows = np.arange(len(cities))[:, None]
+        access_hub = access_choice[rows, egress_choice]
+        egress_hub = egress_choice
+        unreachable = minutes >= UNREACHABLE
+        minutes = np.minimum(minutes, UNREACHABLE)
+        ground_km = access_km[rows, access_hub] + access_km.T[egress_hub, np.arange(len(cities))[None, :]]
+        for table in (access_hub, egress_hub):
+            table[unreachable] = NO_HUB
+        np.fill_diagonal(access_hub, NO_HUB)
+        np.fill_diagonal(egress_hub, NO_HUB)
+        ground_km[unreachable] = 0
+        np.fill_diagonal(ground_km, 0)
+
+        return cls(
+            cities, hubs,
+            minutes.astype(np.int32), ground_km.astype(np.int32),
+            access_hub.astype(np.int16), egress_hub.astype(np.int16), fingerprint
+        )
+
+    def lookup(self, origin, destination):
+        """O(1) best hub routing for a city pair, or None when either city is unknown or unreachable"""
+        i, j = self.city_ids.get(origin), self.city_ids.get(destination)
+        if i is None or j is None or (i != j and self.access_hub[i, j] == NO_HUB):
+            return None
+        path = [origin]
+        if i != j:
+            for hub in (self.hubs[self.access_hub[i, j]], self.hubs[self.egress_hub[i, j]]):
+                if hub != path[-1]:
+                    path.append(hub)
+            if destination != path[-1]:
+                path.append(destination)
+        return {
+            "origin": origin,
+            "destination": destination,
+            "path": path,
+            "minutes": int(self.minutes[i, j]),
+            "ground_km": int(self.ground_km[i, j])
+        }
+
+    def save(self, path):
+        """Write the table as a compressed .npz for the online path to load; readers never see a partial file"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".hub_routing_table.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    cities=np.array(self.cities), hubs=np.array(self.hubs),
+                    minutes=self.minutes, ground_km=self.ground_km,
+                    access_hub=self.access_hub, egress_hub=self.egress_hub,
+                    fingerprint=np.array(self.fingerprint or "")
+                )
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Read a table written by save()"""
+        with np.load(path) as data:
+            return cls(
+                data["cities"].tolist(), data["hubs"].tolist(),
+                data["minutes"], data["ground_km"], data["access_hub"], data["egress_hub"],
+                str(data["fingerprint"]) or None
+            )
+
+
+if __name__ == "__main__":
+    # Nightly job: precompute the table that IntermediateConnectivitySystem.hub_routing_table loads
+    import sys
+    from intermediate_connectivity_system import IntermediateConnectivitySystem
+
+    output_path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get(
+        HUB_ROUTING_TABLE_PATH_ENV, DEFAULT_HUB_ROUTING_TABLE_PATH
+    )
+    table = IntermediateConnectivitySystem().build_hub_routing_table()
+    table.save(output_path)
+    print(f"Saved {len(table.cities)}x{len(table.cities)} hub routing table over {len(table.hubs)} hubs to {output_path}")
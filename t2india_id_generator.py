@@ -0,0 +1,168 @@
+"""
+T2India Itinerary ID Generator
+Snowflake-style "T2I-YYYYMMDD-XXXXXXXX" IDs: millisecond-of-day, worker id and sequence in Crockford base32
+"""
+
+import fcntl
+import itertools
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# 8 base32 characters carry 40 bits: 27 for the millisecond of the day, 5 for the worker, 8 for the sequence
+TICK_BITS = 27
+WORKER_BITS = 5
+SEQUENCE_BITS = 8
+MAX_WORKERS = 1 << WORKER_BITS
+SEQUENCE_LIMIT = 1 << SEQUENCE_BITS
+CODE_LENGTH = 8
+
+# Crockford base32 digits are in ASCII order, so IDs sort the same as their numeric value
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+DIGITS = {char: value for value, char in enumerate(ALPHABET)}
+
+WORKER_ID_ENV = "T2INDIA_WORKER_ID"
+WORKER_LOCK_DIR_ENV = "T2INDIA_WORKER_LOCK_DIR"
+DEFAULT_WORKER_LOCK_DIR = os.path.join(tempfile.gettempdir(), "t2india-worker-ids")
+
+# Lock files of the slots this process holds; the locks last as long as the files stay open
+claimed_slots = []
+
+
+def claim_worker_slot(lock_dir=None):
+    """Lowest worker id no other process on this host holds, kept until the process exits"""
+    lock_dir = lock_dir or os.environ.get(WORKER_LOCK_DIR_ENV, DEFAULT_WORKER_LOCK_DIR)
+    os.makedirs(lock_dir, exist_ok=True)
+    for slot in range(MAX_WORKERS):
+        lock_file = open(os.path.join(lock_dir, f"{slot}.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            continue
+        claimed_slots.append(lock_file)
+        return slot
+    raise RuntimeError(f"All {MAX_WORKERS} itinerary ID worker slots in {lock_dir} are held by live processes")
+
+
+def resolve_worker_id():
+    """Worker id from T2INDIA_WORKER_ID (set per gunicorn worker), else a slot claimed through a lock file"""
+    configured = os.environ.get(WORKER_ID_ENV)
+    if not configured:
+        return claim_worker_slot()
+    worker_id = int(configured)
+    if not 0 <= worker_id < MAX_WORKERS:
+        raise ValueError(f"{WORKER_ID_ENV} must be between 0 and {MAX_WORKERS - 1}, got {worker_id}")
+    return worker_id
+
+
+def current_tick():
+    """Milliseconds since the epoch"""
+    return time.time_ns() // 1_000_000
+
+
+class ItineraryIdGenerator:
+    def __init__(self, prefix="T2I", worker_id=None):
+        self.prefix = prefix
+        self.worker_id = resolve_worker_id() if worker_id is None else worker_id
+        if not 0 <= self.worker_id < MAX_WORKERS:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKERS - 1}, got {self.worker_id}")
+        # (tick, sequence counter) is replaced as a whole, never mutated, so readers need no lock
+        self.state = (current_tick(), itertools.count())
+        self.day = (0, 0, "")  # (day start tick, next day start tick, "YYYYMMDD")
+        self.advance_lock = threading.Lock()
+
+    def next_value(self):
+        """Next (tick, sequence) pair; only a clock advance or exhausted sequence takes the lock"""
+        while True:
+            tick, counter = self.state
+            if tick >= current_tick():
+                sequence = next(counter)  # atomic under the GIL
+                if sequence < SEQUENCE_LIMIT:
+                    return tick, sequence
+            self.advance(tick)
+
+    def advance(self, seen_tick):
+        """Move to the current millisecond, or borrow the next one when this one is used up"""
+        with self.advance_lock:
+            if self.state[0] == seen_tick:
+                self.state = (max(current_tick(), seen_tick + 1), itertools.count())
+
+    def day_for(self, tick):
+        """Local calendar day containing a tick, cached until midnight"""
+        day = self.day
+        if not day[0] <= tick < day[1]:
+            moment = datetime.fromtimestamp(tick / 1000)
+            midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+            start = int(midnight.timestamp() * 1000)
+            day = (start, start + 86_400_000, midnight.strftime("%Y%m%d"))
+            self.day = day
+        return day
+
+    def next_id(self):
+        """Next ID, e.g. "T2I-20240315-0KX4R20A"; sortable within a date prefix"""
+        tick, sequence = self.next_value()
+        day_start, _, date = self.day_for(tick)
+        value = (((tick - day_start) << WORKER_BITS | self.worker_id) << SEQUENCE_BITS) | sequence
+        return f"{self.prefix}-{date}-{encode_base32(value)}"
+
+
+def encode_base32(value, length=CODE_LENGTH):
+    """Fixed-width Crockford base32 encoding"""
+    chars = []
+    for _ in range(length):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def decode_id(itinerary_id):
+    """Split an ID into its date, millisecond of the day, worker id and sequence"""
+    _, date, code = itinerary_id.split("-")
+    value = 0
+    for char in code:
+        value = (value << 5) | DIGITS[char]
+    return {
+        "date": date,
+        "millisecond_of_day": value >> (WORKER_BITS + SEQUENCE_BITS),
+        "worker_id": (value >> SEQUENCE_BITS) & (MAX_WORKERS - 1),
+        "sequence": value & (SEQUENCE_LIMIT - 1)
+    }
+
+
+# One generator per process so every system instance draws from the same sequence. It is
+# created on first use, never at import: gunicorn's master imports this module through
+# gunicorn.conf.py, and workers must resolve their own id after the fork.
+itinerary_ids = None
+itinerary_ids_lock = threading.Lock()
+
+
+def process_generator():
+    """The process-wide generator, created on first use"""
+    global itinerary_ids
+    if itinerary_ids is None:
+        with itinerary_ids_lock:
+            if itinerary_ids is None:
+                itinerary_ids = ItineraryIdGenerator()
+    return itinerary_ids
+
+
+def forget_parent_generator():
+    """A forked child shares its parent's worker id; drop it so the child resolves its own"""
+    global itinerary_ids, itinerary_ids_lock
+    itinerary_ids = None
+    itinerary_ids_lock = threading.Lock()
+    # Closing the inherited descriptors leaves the parent's slot locks in place
+    for lock_file in claimed_slots:
+        lock_file.close()
+    claimed_slots.clear()
+
+
+os.register_at_fork(after_in_child=forget_parent_generator)
+
+
+def next_itinerary_id():
+    """Next ID from the process-wide generator"""
+    return process_generator().next_id()
@@ -0,0 +1,171 @@
+"""
+T2India Itinerary Fitting
+Turns a library itinerary into a concrete plan for a request: missing destinations are inserted where
+they add the least travel time, and days are trimmed or padded per city against minimum/optimal stays
+"""
+
+UNKNOWN_LEG_MINUTES = 8 * 60  # legs touching a city without coordinates
+TRAVEL_DAY_MINUTES = 6 * 60  # a longer leg takes a day of its own
+DEFAULT_STAY = {"min": 1, "optimal": 2}
+
+# Modification cost: how much of the base itinerary a planner would have to rework
+INSERT_WEIGHT = 3.0  # per destination added
+REMOVE_WEIGHT = 1.0  # per destination dropped
+DAY_WEIGHT = 0.5  # per day added to or taken from a base city
+TRAVEL_HOUR_WEIGHT = 0.25  # per extra hour of travel
+INFEASIBLE_WEIGHT = 100.0  # the minimum stays do not fit the requested days
+
+
+class ItineraryFitter:
+    def __init__(self, city_ids, travel_minutes, destination_stays):
+        # travel_minutes[i][j]: door-to-door minutes between the cities with ids i and j
+        self.city_ids = city_ids
+        self.travel_minutes = travel_minutes.tolist()  # plain lists keep the scalar lookups cheap
+        self.destination_stays = destination_stays
+
+    def leg_minutes(self, from_city, to_city):
+        if from_city == to_city:
+            return 0
+        i, j = self.city_ids.get(from_city), self.city_ids.get(to_city)
+        if i is None or j is None:
+            return UNKNOWN_LEG_MINUTES
+        return self.travel_minutes[i][j]
+
+    def stay_limits(self, city):
+        """(minimum, optimal) days in a city"""
+        stay = self.destination_stays.get(city, DEFAULT_STAY)
+        return stay["min"], stay["optimal"]
+
+    def path(self, stops, closed):
+        return stops + stops[:1] if closed else stops
+
+    def legs(self, stops, closed):
+        path = self.path(stops, closed)
+        return [(path[i], path[i + 1], self.leg_minutes(path[i], path[i + 1])) for i in range(len(path) - 1)]
+
+    def travel_days(self, legs):
+        return sum(minutes > TRAVEL_DAY_MINUTES for _, _, minutes in legs)
+
+    def proportional_stays(self, stops, days):
+        """Days shared out in proportion to the optimal stays, largest remainder first"""
+        if not stops:
+            return {}
+        weights = [self.stay_limits(city)[1] for city in stops]
+        shares = [days * weight / sum(weights) for weight in weights]
+        stays = {city: int(share) for city, share in zip(stops, shares)}
+        by_remainder = sorted(range(len(stops)), key=lambda i: -(shares[i] - int(shares[i])))
+        for i in by_remainder[:days - sum(stays.values())]:
+            stays[stops[i]] += 1
+        return stays
+
+    def cheapest_insertion(self, stops, closed, cities):
+        """Insert each city where it adds the least travel time; the first stop stays the entry point"""
+        stops = list(stops)
+        remaining = list(cities)
+        while remaining:
+            path = self.path(stops, closed)
+            best = None
+            for city in remaining:
+                # Between path[p - 1] and path[p], or after the last stop of an open route
+                for position in range(1, len(path) + (0 if closed else 1)):
+                    before = path[position - 1]
+                    if position < len(path):
+                        after = path[position]
+                        added = (self.leg_minutes(before, city) + self.leg_minutes(city, after)
+                                 - self.leg_minutes(before, after))
+                    else:
+                        added = self.leg_minutes(before, city)
+                    if best is None or added < best[0]:
+                        best = (added, city, position)
+            _, city, position = best
+            stops.insert(min(position, len(stops)), city)
+            remaining.remove(city)
+        return stops
+
+    def fit(self, route, duration, requested, target_days=None):
+        """Concrete plan turning a base route of duration days into one covering the requested cities
+
+        route is the base itinerary's ordered stops, closed when it returns to
+        its first stop. Without target_days the base stays are kept (at least
+        each city's minimum) and new cities get their optimal stay.
+        """
+        closed = len(route) > 1 and route[0] == route[-1]
+        base_stops = list(dict.fromkeys(route[:-1] if closed else route))
+        base_legs = self.legs(base_stops, closed)
+        base_stays = self.proportional_stays(base_stops, max(duration - self.travel_days(base_legs), 0))
+
+        requested = list(dict.fromkeys(requested))
+        inserted = [city for city in requested if city not in base_stops]
+        stops = self.cheapest_insertion(base_stops, closed, inserted)
+        stays = dict(base_stays)
+        for city in inserted:
+            stays[city] = self.stay_limits(city)[1]
+        for city in stops:
+            # Short base itineraries may give a city less than its minimum
+            stays[city] = max(stays[city], self.stay_limits(city)[0])
+
+        removed = []
+        issues = []
+        if target_days is not None:
+            self.trim_and_pad(stops, stays, closed, set(requested), target_days, removed, issues)
+        stops = [city for city in stops if city not in removed]
+        legs = self.legs(stops, closed)
+        days = sum(stays[city] for city in stops) + self.travel_days(legs)
+
+        travel_minutes = sum(minutes for _, _, minutes in legs)
+        base_travel_minutes = sum(minutes for _, _, minutes in base_legs)
+        day_changes = {city: stays[city] - base_stays[city]
+                       for city in base_stops if city not in removed and stays[city] != base_stays[city]}
+        cost = (INSERT_WEIGHT * len(inserted) + REMOVE_WEIGHT * len(removed)
+                + DAY_WEIGHT * sum(abs(change) for change in day_changes.values())
+                + TRAVEL_HOUR_WEIGHT * max(travel_minutes - base_travel_minutes, 0) / 60
+                + (INFEASIBLE_WEIGHT if issues else 0))
+        return {
+            "route": self.path(stops, closed),
+            "duration": days,
+            "stays": [{"city": city, "days": stays[city], "min_days": self.stay_limits(city)[0],
+                       "optimal_days": self.stay_limits(city)[1]} for city in stops],
+            "legs": [{"from": a, "to": b, "minutes": minutes} for a, b, minutes in legs],
+            "travel_minutes": travel_minutes,
+            "inserted": inserted,
+            "removed": removed,
+            "optional": [city for city in stops if city not in requested],
+            "day_changes": day_changes,
+            "feasible": not issues,
+            "issues": issues,
+            "modification_cost": cost
+        }
+
+    def trim_and_pad(self, stops, stays, closed, requested, target_days, removed, issues):
+        """Move stays towards target_days: trim to optimal, then to minimum, then drop unrequested cities; pad below-optimal cities first"""
+        kept = list(stops)
+        limits = {city: self.stay_limits(city) for city in kept}
+        available = target_days - self.travel_days(self.legs(kept, closed))
+        total = sum(stays[city] for city in kept)
+
+        while total > available:
+            # Unrequested cities give up days first, then the city furthest above its floor
+            for floor in (1, 0):
+                candidates = [p for p, city in enumerate(kept) if stays[city] > limits[city][floor]]
+                if candidates:
+                    break
+            if candidates:
+                city = kept[max(candidates, key=lambda p: (kept[p] not in requested,
+                                                          stays[kept[p]] - limits[kept[p]][floor], -p))]
+                stays[city] -= 1
+                total -= 1
+                continue
+            droppable = [p for p in range(1, len(kept)) if kept[p] not in requested]
+            if not droppable:
+                issues.append(f"Minimum stays need {total - available} more days than the requested {target_days}")
+                return
+            city = kept.pop(max(droppable, key=lambda p: (stays[kept[p]], -p)))
+            removed.append(city)
+            total -= stays[city]
+            available = target_days - self.travel_days(self.legs(kept, closed))
+
+        for _ in range(available - total):
+            # Below-optimal cities first, then the lowest share of its optimal stay
+            position = min(range(len(kept)), key=lambda p: (stays[kept[p]] >= limits[kept[p]][1],
+                                                            stays[kept[p]] / limits[kept[p]][1], p))
+            stays[kept[position]] += 1
@@ -0,0 +1,364 @@
+"""
+T2India Library Snapshot
+Columnar, memory-mapped file of the itinerary library and display tables, built offline from the
+library source file and mapped read-only by every worker so that start-up and RSS do not grow with the library.
+Key lookups, destination sets and the library's LSH buckets all come from the mapping; nothing is indexed per worker
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from collections.abc import Mapping
+from functools import lru_cache
+
+import numpy as np
+
+from t2india_alias_index import DestinationAliasIndex
+from t2india_minhash_index import LSH_MIN_LIBRARY_SIZE, LSH_NUM_PERM, LSH_THRESHOLD, MinHashLSHIndex, token_hash
+
+DEFAULT_LIBRARY_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "t2india_library.snapshot")
+LIBRARY_SNAPSHOT_PATH_ENV = "T2INDIA_LIBRARY_SNAPSHOT_PATH"
+# Build input only: workers map the snapshot and at most stat this file, never parse it
+DEFAULT_LIBRARY_SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "t2india_library_source.json")
+LIBRARY_SOURCE_PATH_ENV = "T2INDIA_LIBRARY_SOURCE_PATH"
+BUILD_SCRIPT = os.path.abspath(__file__)  # run with [snapshot path] [source path] [reference data path]
+
+MAGIC = b"T2ILIB02"
+ALIGNMENT = 8
+ROW_CACHE_SIZE = 1024  # decoded rows kept per table; the columns themselves stay in the page cache
+
+# Table -> field holding its itinerary id
+LIBRARY_SNAPSHOT_TABLES = {
+    "existing_itineraries": "id",  # T2IndiaItineraryLibrary
+    "itinerary_database": "unique_id"  # T2IndiaItineraryDisplaySystem
+}
+STRING_FIELDS = ("name", "price_range")
+NUMERIC_FIELDS = {"duration": "<i4", "rating": "<f8", "bookings": "<i4"}
+SIMILARITY_TABLE = "existing_itineraries"  # the table T2IndiaItineraryLibrary retrieves candidates from
+
+
+def encode_strings(values):
+    """(offsets, utf-8 bytes) of a string column; row i is bytes[offsets[i]:offsets[i + 1]]"""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def hash_order(values):
+    """(sorted hashes, rows in that order) of a string column, for finding a row by binary search"""
+    hashes = np.array([token_hash(value) for value in values], dtype="<u4")
+    rows = np.argsort(hashes, kind="stable").astype("<i4")
+    return hashes[rows], rows
+
+
+def table_columns(rows, id_field, city_ids):
+    """Columns of one itinerary table; fields without a column are kept as per-row JSON"""
+    columns = {}
+    columns["key_offsets"], columns["key_bytes"] = encode_strings(list(rows))
+    columns["key_hashes"], columns["key_rows"] = hash_order(rows)
+    for field in (id_field,) + STRING_FIELDS:
+        columns[f"{field}_offsets"], columns[f"{field}_bytes"] = encode_strings([row[field] for row in rows.values()])
+    columns[f"{id_field}_hashes"], columns[f"{id_field}_rows"] = hash_order([row[id_field] for row in rows.values()])
+    for field, dtype in NUMERIC_FIELDS.items():
+        columns[field] = np.array([row[field] for row in rows.values()], dtype=dtype)
+
+    destination_counts = [len(row["destinations"]) for row in rows.values()]
+    columns["destination_offsets"] = np.zeros(len(rows) + 1, dtype="<i8")
+    np.cumsum(destination_counts, out=columns["destination_offsets"][1:])
+    columns["destination_ids"] = np.array(
+        [city_ids.setdefault(city, len(city_ids)) for row in rows.values() for city in row["destinations"]], dtype="<i4"
+    )
+
+    columnar = {id_field, "destinations"} | set(STRING_FIELDS) | set(NUMERIC_FIELDS)
+    columns["extra_offsets"], columns["extra_bytes"] = encode_strings([
+        json.dumps({field: value for field, value in row.items() if field not in columnar}, ensure_ascii=False)
+        for row in rows.values()
+    ])
+    return columns
+
+
+def similarity_columns(rows, destination_aliases, num_perm=LSH_NUM_PERM, threshold=LSH_THRESHOLD):
+    """LSH band buckets over the normalized destination sets of a table, with table rows as item positions"""
+    alias_index = DestinationAliasIndex(destination_aliases)
+    token_sets = {}
+    for row, itinerary in enumerate(rows.values()):
+        destinations = frozenset(alias_index.normalize(city) for city in itinerary["destinations"])
+        if destinations:  # itineraries without destinations never reach the library's minimum score
+            token_sets[row] = destinations
+    index = MinHashLSHIndex(token_sets, num_perm, threshold)
+    table_rows = np.array(index.keys, dtype="<i4")
+    columns = {}
+    for band, (sorted_keys, order) in enumerate(index.buckets):
+        columns[f"band{band}_keys"] = sorted_keys.astype("<u8")
+        columns[f"band{band}_rows"] = table_rows[order]
+    return columns
+
+
+def json_sha256(value):
+    """Hex sha256 of a JSON value in canonical form"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def file_sha256(path):
+    """Hex sha256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_library_snapshot(tables, version, source_sha256, path=None, source_signature=None, destination_aliases=None):
+    """Serialize the library tables atomically
+
+    source_sha256 and source_signature, the (mtime_ns, size) of the source
+    file, tie the file to the source it was built from; workers compare the
+    signature. With destination_aliases, a large library's LSH buckets are
+    precomputed under those aliases and the default LSH settings.
+    """
+    path = path or os.environ.get(LIBRARY_SNAPSHOT_PATH_ENV, DEFAULT_LIBRARY_SNAPSHOT_PATH)
+    city_ids = {}
+    columns = {table: table_columns(tables[table], id_field, city_ids)
+               for table, id_field in LIBRARY_SNAPSHOT_TABLES.items()}
+    columns["cities"] = dict(zip(("offsets", "bytes"), encode_strings(list(city_ids))))
+    similarity = None
+    if destination_aliases is not None and len(tables[SIMILARITY_TABLE]) >= LSH_MIN_LIBRARY_SIZE:
+        columns["similarity_index"] = similarity_columns(tables[SIMILARITY_TABLE], destination_aliases)
+        similarity = {"num_perm": LSH_NUM_PERM, "threshold": LSH_THRESHOLD,
+                      "aliases_sha256": json_sha256(destination_aliases)}
+
+    # Lay every column out at an aligned offset after the header, so it maps without copying
+    layout = {}
+    position = 0
+    for group, group_columns in columns.items():
+        layout[group] = {}
+        for name, array in group_columns.items():
+            layout[group][name] = {"dtype": array.dtype.str, "offset": position, "length": len(array)}
+            position += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    rows = {table: len(tables[table]) for table in LIBRARY_SNAPSHOT_TABLES}
+    header = json.dumps({
+        "version": version, "source_sha256": source_sha256,
+        "source_signature": list(source_signature) if source_signature else None,
+        "similarity_index": similarity, "rows": rows, "columns": layout
+    }).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".t2india_library.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + np.array(len(header), dtype="<u8").tobytes() + header)
+            for group, group_columns in columns.items():
+                for name, array in group_columns.items():
+                    f.seek(data_start + layout[group][name]["offset"])
+                    f.write(array.tobytes())
+            f.truncate(data_start + position)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def build_library_snapshot(source_path=None, path=None, destination_aliases=None):
+    """Build step: parse the library source and write its snapshot; returns the parsed source"""
+    source_path = source_path or os.environ.get(LIBRARY_SOURCE_PATH_ENV, DEFAULT_LIBRARY_SOURCE_PATH)
+    with open(source_path, "rb") as f:
+        # Stat before reading: an edit during the read leaves a newer signature, so the snapshot reads as stale
+        stat = os.fstat(f.fileno())
+        raw = f.read()
+    # Hash the bytes that are parsed, so a concurrent edit cannot pair one version's hash with another's rows
+    source = json.loads(raw)
+    missing = [table for table in LIBRARY_SNAPSHOT_TABLES if table not in source]
+    if missing:
+        raise ValueError(f"Library source {source_path} is missing tables: {', '.join(missing)}")
+    write_library_snapshot(
+        source, source.get("version"), hashlib.sha256(raw).hexdigest(), path,
+        (stat.st_mtime_ns, stat.st_size), destination_aliases
+    )
+    return source
+
+
+class StringColumn:
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __getitem__(self, row):
+        return self.data[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def values(self):
+        return [self[row] for row in range(len(self))]
+
+
+class HashIndex:
+    """Row lookup in a string column by binary search over its sorted, mapped hash column"""
+
+    def __init__(self, column, hashes, rows):
+        self.column = column
+        # Plain memoryviews over the mapping: bisect and indexing yield Python ints without NumPy scalar work
+        self.hashes = memoryview(hashes)
+        self.rows = memoryview(rows)
+
+    def find(self, value):
+        """Lowest row holding value, or None"""
+        if not isinstance(value, str):
+            return None
+        target = token_hash(value)
+        position = bisect.bisect_left(self.hashes, target)
+        # Rows sharing a hash are adjacent, in row order
+        while position < len(self.hashes) and self.hashes[position] == target:
+            row = self.rows[position]
+            if self.column[row] == value:
+                return row
+            position += 1
+        return None
+
+
+class DestinationSets(Mapping):
+    """Read-only {itinerary id: frozenset of normalized destinations} over a table, built on access"""
+
+    def __init__(self, table, normalize):
+        self.table = table
+        # Each distinct city is normalized once, on first use
+        self.normalized_city = lru_cache(maxsize=None)(lambda city: normalize(table.cities[city]))
+
+    def __getitem__(self, itinerary_id):
+        row = self.table.id_index.find(itinerary_id)
+        if row is None:
+            raise KeyError(itinerary_id)
+        return frozenset(self.normalized_city(city) for city in self.table.row_destination_ids(row).tolist())
+
+    def __iter__(self):
+        return iter(self.table.ids.values())
+
+    def __len__(self):
+        return len(self.table.ids)
+
+
+class ItineraryTable(Mapping):
+    """Read-only {key: itinerary} view over one table's columns; rows are decoded on access"""
+
+    def __init__(self, columns, id_field, cities):
+        self.id_field = id_field
+        self.cities = cities  # city id -> name
+        self.keys_column = StringColumn(columns["key_offsets"], columns["key_bytes"])
+        self.ids = StringColumn(columns[f"{id_field}_offsets"], columns[f"{id_field}_bytes"])
+        self.key_index = HashIndex(self.keys_column, columns["key_hashes"], columns["key_rows"])
+        self.id_index = HashIndex(self.ids, columns[f"{id_field}_hashes"], columns[f"{id_field}_rows"])
+        self.strings = {field: StringColumn(columns[f"{field}_offsets"], columns[f"{field}_bytes"])
+                        for field in STRING_FIELDS}
+        self.numbers = {field: columns[field] for field in NUMERIC_FIELDS}
+        self.destination_offsets = columns["destination_offsets"]
+        self.destination_ids = columns["destination_ids"]
+        self.extras = StringColumn(columns["extra_offsets"], columns["extra_bytes"])
+        # Precomputed LSH buckets and the settings and aliases hash they were built with; see similarity_index
+        self.similarity = None
+        self.similarity_buckets = None
+        # Decoded rows are shared between callers and must be treated as read-only
+        self.row = lru_cache(maxsize=ROW_CACHE_SIZE)(self.decode_row)
+
+    def __getitem__(self, key):
+        row = self.key_index.find(key)
+        if row is None:
+            raise KeyError(key)
+        return self.row(row)
+
+    def __iter__(self):
+        return iter(self.keys_column.values())
+
+    def __len__(self):
+        return len(self.keys_column)
+
+    def __contains__(self, key):
+        return self.key_index.find(key) is not None
+
+    def key_ids(self):
+        """(key, itinerary id) pairs in table order, without decoding rows"""
+        return list(zip(self.keys_column.values(), self.ids.values()))
+
+    def row_destination_ids(self, row):
+        return self.destination_ids[self.destination_offsets[row]:self.destination_offsets[row + 1]]
+
+    def decode_row(self, row):
+        itinerary = json.loads(self.extras[row])
+        itinerary[self.id_field] = self.ids[row]
+        for field, column in self.strings.items():
+            itinerary[field] = column[row]
+        for field, column in self.numbers.items():
+            itinerary[field] = column[row].item()
+        itinerary["destinations"] = [self.cities[city] for city in self.row_destination_ids(row).tolist()]
+        return itinerary
+
+    def destination_sets(self, normalize):
+        """{itinerary id: frozenset of normalized destinations}, each set built when it is looked up"""
+        return DestinationSets(self, normalize)
+
+    def similarity_index(self, destination_aliases, num_perm, threshold):
+        """LSH index over the buckets written by the build, or None when they were built for other aliases or settings"""
+        settings = self.similarity
+        if (settings is None or settings["num_perm"] != num_perm or settings["threshold"] != threshold
+                or settings["aliases_sha256"] != json_sha256(destination_aliases)):
+            return None
+        return MinHashLSHIndex.from_buckets(self.keys_column, self.similarity_buckets, num_perm, threshold)
+
+
+class LibrarySnapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            # The mapping outlives the descriptor; pages are shared by every process mapping the file
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a T2India library snapshot")
+        header_length = int(np.frombuffer(self.buffer, dtype="<u8", count=1, offset=len(MAGIC))[0])
+        header_start = len(MAGIC) + 8
+        header = json.loads(self.buffer[header_start:header_start + header_length].decode("utf-8"))
+        data_start = -(-(header_start + header_length) // ALIGNMENT) * ALIGNMENT
+        self.version = header["version"]
+        self.source_sha256 = header["source_sha256"]
+        signature = header["source_signature"]
+        self.source_signature = tuple(signature) if signature else None  # (mtime_ns, size) of the source
+
+        columns = {
+            group: {
+                name: np.frombuffer(self.buffer, dtype=spec["dtype"], count=spec["length"],
+                                    offset=data_start + spec["offset"])
+                for name, spec in group_columns.items()
+            }
+            for group, group_columns in header["columns"].items()
+        }
+        self.cities = StringColumn(columns["cities"]["offsets"], columns["cities"]["bytes"]).values()
+        self.tables = {
+            table: ItineraryTable(columns[table], id_field, self.cities)
+            for table, id_field in LIBRARY_SNAPSHOT_TABLES.items()
+        }
+        if header["similarity_index"] is not None:
+            buckets = columns["similarity_index"]
+            table = self.tables[SIMILARITY_TABLE]
+            table.similarity = header["similarity_index"]
+            table.similarity_buckets = [
+                (buckets[f"band{band}_keys"], buckets[f"band{band}_rows"]) for band in range(len(buckets) // 2)
+            ]
+
+
+if __name__ == "__main__":
+    # Build step: serialize the library source for the workers to map, with LSH buckets under the reference aliases
+    import sys
+    from t2india_data_registry import REFERENCE_DATA_PATH, REFERENCE_DATA_PATH_ENV
+
+    output_path = sys.argv[1] if len(sys.argv) > 1 else None
+    source_path = sys.argv[2] if len(sys.argv) > 2 else None
+    reference_path = sys.argv[3] if len(sys.argv) > 3 else os.environ.get(REFERENCE_DATA_PATH_ENV, REFERENCE_DATA_PATH)
+    with open(reference_path, encoding="utf-8") as f:
+        destination_aliases = json.load(f)["destination_aliases"]
+    source = build_library_snapshot(source_path, output_path, destination_aliases)
+    counts = ", ".join(f"{len(source[table])} {table}" for table in LIBRARY_SNAPSHOT_TABLES)
+    print(f"Saved library snapshot version {source.get('version')} ({counts}) to "
+          f"{output_path or os.environ.get(LIBRARY_SNAPSHOT_PATH_ENV, DEFAULT_LIBRARY_SNAPSHOT_PATH)}")
@@ -0,0 +1,103 @@
+"""
+T2India MinHash Index
+MinHash signatures with LSH banding to retrieve itineraries whose destination sets are likely similar
+"""
+
+import zlib
+
+import numpy as np
+
+HASH_PRIME = 4294967311  # smallest prime above 2^32, so (a*x + b) stays inside uint64
+
+# Itinerary library retrieval settings, shared by the library and the snapshot build that precomputes its buckets
+LSH_MIN_LIBRARY_SIZE = 2000  # smaller libraries are scanned exactly
+LSH_NUM_PERM = 64
+LSH_THRESHOLD = 0.3  # Jaccard similarity at which candidate retrieval becomes likely
+
+
+def token_hash(token):
+    """Stable 32-bit id for a destination name, identical across processes"""
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def choose_bands(num_perm, threshold):
+    """(bands, rows) with bands * rows <= num_perm whose S-curve midpoint (1/b)^(1/r) is closest to the threshold"""
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1)]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+
+class MinHashLSHIndex:
+    def __init__(self, token_sets, num_perm=64, threshold=0.4, seed=1):
+        """Index {key: non-empty token set}; queries return keys in insertion order
+
+        threshold is the Jaccard similarity around which candidates start
+        being retrieved; lower values raise recall and candidate counts.
+        """
+        self.init_hashes(num_perm, threshold, seed)
+        self.keys = list(token_sets)
+        signatures = self.signature_matrix(list(token_sets.values()))
+        # Only the band buckets are kept; signatures are recomputed for queries
+        self.buckets = [self.bucket_band(signatures, band) for band in range(self.bands)]
+
+    @classmethod
+    def from_buckets(cls, keys, buckets, num_perm=64, threshold=0.4, seed=1):
+        """Index over buckets saved from an index with the same settings; keys[position] is the key of an item"""
+        index = cls.__new__(cls)
+        index.init_hashes(num_perm, threshold, seed)
+        if len(buckets) != index.bands:
+            raise ValueError(f"Expected {index.bands} bands for {num_perm} permutations, got {len(buckets)}")
+        index.keys = keys
+        index.buckets = buckets
+        return index
+
+    def init_hashes(self, num_perm, threshold, seed):
+        """Permutations and band layout; the same settings always give the same hashes"""
+        self.num_perm = num_perm
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+        # Random odd multipliers fold each band's rows into one 64-bit bucket key
+        self.band_mixers = (rng.randint(0, 1 << 62, size=self.rows).astype(np.uint64) << np.uint64(1)) | np.uint64(1)
+
+    def signature_matrix(self, token_sets):
+        """(items, num_perm) minimum hash per permutation, computed over all tokens at once"""
+        lengths = np.array([len(tokens) for tokens in token_sets], dtype=np.int64)
+        if not len(lengths) or not lengths.all():
+            raise ValueError("Every indexed item needs at least one token")
+        # Hash each distinct token once, then take per-item minima over its columns
+        vocabulary = {}
+        token_ids = np.fromiter(
+            (vocabulary.setdefault(token, len(vocabulary)) for token_set in token_sets for token in token_set),
+            dtype=np.int64, count=int(lengths.sum())
+        )
+        token_hashes = np.fromiter((token_hash(token) for token in vocabulary), dtype=np.uint64, count=len(vocabulary))
+        hashed = (self.a[:, None] * token_hashes[None, :] + self.b[:, None]) % np.uint64(HASH_PRIME)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        return np.minimum.reduceat(hashed[:, token_ids], offsets, axis=1).T
+
+    def band_keys(self, signatures, band):
+        """One bucket key per row of signatures for a band"""
+        columns = signatures[:, band * self.rows:(band + 1) * self.rows]
+        return (columns * self.band_mixers[None, :]).sum(axis=1, dtype=np.uint64)
+
+    def bucket_band(self, signatures, band):
+        """(sorted bucket keys, item positions in the same order); a bucket is a run of equal keys"""
+        keys = self.band_keys(signatures, band)
+        order = np.argsort(keys, kind="stable")
+        return keys[order], order.astype(np.int32)
+
+    def candidates(self, tokens):
+        """Keys of items sharing at least one band bucket with the tokens"""
+        if not tokens:
+            return []
+        signature = self.signature_matrix([tokens])
+        found = []
+        for band, (sorted_keys, order) in enumerate(self.buckets):
+            key = self.band_keys(signature, band)[0]
+            start, end = np.searchsorted(sorted_keys, key, side="left"), np.searchsorted(sorted_keys, key, side="right")
+            if start < end:
+                found.append(order[start:end])
+        if not found:
+            return []
+        return [self.keys[position] for position in np.unique(np.concatenate(found)).tolist()]
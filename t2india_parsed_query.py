@@ -0,0 +1,36 @@
+"""
+T2India Parsed Query
+A request parsed once and handed to every stage, with optional per-stage timing
+"""
+
+import time
+
+
+class ParsedQuery:
+    def __init__(self, raw_input, destinations, duration, normalized_destinations):
+        self.raw_input = raw_input
+        self.destinations = destinations  # in order of first mention, no duplicates
+        self.duration = duration  # days, or None when not stated
+        self.normalized_destinations = normalized_destinations  # library spelling, request order, no duplicates
+
+    def to_dict(self):
+        return {
+            "raw_input": self.raw_input,
+            "destinations": self.destinations,
+            "duration": self.duration,
+            "normalized_destinations": self.normalized_destinations
+        }
+
+
+class StageTimer:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.timings = {}  # stage -> milliseconds, in stage order
+        self.last = time.perf_counter() if enabled else None
+
+    def lap(self, stage):
+        """Record the time since the previous lap under stage"""
+        if self.enabled:
+            now = time.perf_counter()
+            self.timings[stage] = (now - self.last) * 1000
+            self.last = now
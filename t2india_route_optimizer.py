@@ -0,0 +1,260 @@
+"""
+T2India Route Optimizer
+Travel-time driven route ordering: exact Held-Karp for small trips, 2-opt/Or-opt local search for larger ones
+"""
+
+import numpy as np
+
+from t2india_connectivity_graph import UNREACHABLE
+
+BUDGET_PENALTY = 10 ** 5  # minutes added per leg that breaks the per-leg time budget
+
+
+class RouteOptimizer:
+    def __init__(self, cities, travel_minutes, exact_limit=12):
+        # travel_minutes[i][j] is the direct travel time in minutes, UNREACHABLE if none
+        self.cities = list(cities)
+        self.city_ids = {city: i for i, city in enumerate(self.cities)}
+        self.exact_limit = exact_limit
+        self.travel_minutes = self.compute_shortest_times(travel_minutes)
+
+    @classmethod
+    def from_connectivity_graph(cls, graph, exact_limit=12):
+        """Build an optimizer from the fastest mode of each connectivity graph edge"""
+        # Connections are listed one way only; assume the reverse leg takes as long
+        return cls(graph.cities, graph.undirected_best_minutes(), exact_limit)
+
+    def compute_shortest_times(self, travel_minutes):
+        """Floyd-Warshall closure so cities without a direct link get a via-city time"""
+        times = np.array(travel_minutes, dtype=np.int64)
+        times = np.minimum(times, UNREACHABLE)
+        np.fill_diagonal(times, 0)
+        for k in range(len(self.cities)):
+            times = np.minimum(times, times[:, k, None] + times[None, k, :])
+        # Plain lists keep the per-element lookups in the solvers cheap
+        return times.tolist()
+
+    def knows(self, city):
+        """Whether the optimizer has travel data for a city"""
+        return city in self.city_ids
+
+    def leg_minutes(self, from_city, to_city):
+        """Fastest known travel time between two cities"""
+        return self.travel_minutes[self.city_ids[from_city]][self.city_ids[to_city]]
+
+    def route_minutes(self, route):
+        """Total travel time of a route"""
+        return sum(self.leg_minutes(route[i], route[i + 1]) for i in range(len(route) - 1))
+
+    def optimize(self, destinations, entry_point=None, exit_point=None, max_leg_minutes=None):
+        """Order destinations to minimise total travel time
+
+        entry_point/exit_point pin the first/last city; passing the same city
+        for both produces a closed tour. Legs longer than max_leg_minutes are
+        avoided whenever any ordering allows it.
+        """
+        cities = []
+        for city in [entry_point] + list(destinations) + [exit_point]:
+            if city is not None and city not in cities:
+                cities.append(city)
+        closed = entry_point is not None and entry_point == exit_point
+
+        nodes = [self.city_ids[city] for city in cities]
+        cost = self.leg_cost_matrix(nodes, max_leg_minutes)
+        start = cities.index(entry_point) if entry_point is not None else None
+        end = cities.index(exit_point) if exit_point is not None else None
+
+        if len(nodes) <= self.exact_limit:
+            order = self.solve_held_karp(cost, start, end, closed)
+            method = "held_karp"
+        else:
+            order = self.solve_local_search(cost, start, end, closed)
+            method = "local_search"
+
+        route = [cities[i] for i in order]
+        legs = [self.leg_minutes(route[i], route[i + 1]) for i in range(len(route) - 1)]
+        over_budget = []
+        if max_leg_minutes is not None:
+            over_budget = [f"{route[i]}→{route[i + 1]}" for i, minutes in enumerate(legs) if minutes > max_leg_minutes]
+
+        return {
+            "route": route,
+            "total_minutes": sum(legs),
+            "over_budget_legs": over_budget,
+            "method": method
+        }
+
+    def leg_cost_matrix(self, nodes, max_leg_minutes):
+        """Travel times between the selected cities, with budget-breaking legs penalised"""
+        cost = []
+        for i in nodes:
+            row = []
+            for j in nodes:
+                minutes = self.travel_minutes[i][j]
+                if max_leg_minutes is not None and minutes > max_leg_minutes:
+                    minutes += BUDGET_PENALTY
+                row.append(minutes)
+            cost.append(row)
+        return cost
+
+    def solve_held_karp(self, cost, start, end, closed):
+        """Exact dynamic programme over subsets of visited cities"""
+        n = len(cost)
+        if n == 1:
+            return [0, 0] if closed else [0]
+
+        full = (1 << n) - 1
+        inf = float("inf")
+        best = [[inf] * n for _ in range(1 << n)]
+        parent = [[-1] * n for _ in range(1 << n)]
+
+        if start is not None:
+            best[1 << start][start] = 0
+        else:
+            for i in range(n):
+                best[1 << i][i] = 0
+
+        for visited in range(1, full + 1):
+            row = best[visited]
+            for last in range(n):
+                path_cost = row[last]
+                if path_cost == inf:
+                    continue
+                last_cost = cost[last]
+                for nxt in range(n):
+                    bit = 1 << nxt
+                    if visited & bit:
+                        continue
+                    # A fixed open-path exit may only be visited last
+                    if end is not None and not closed and nxt == end and (visited | bit) != full:
+                        continue
+                    candidate = path_cost + last_cost[nxt]
+                    if candidate < best[visited | bit][nxt]:
+                        best[visited | bit][nxt] = candidate
+                        parent[visited | bit][nxt] = last
+
+        if closed:
+            last = min(range(n), key=lambda i: best[full][i] + cost[i][start] if i != start else inf)
+        elif end is not None:
+            last = end
+        else:
+            last = min(range(n), key=lambda i: best[full][i])
+
+        order = []
+        visited = full
+        while last != -1:
+            order.append(last)
+            last, visited = parent[visited][last], visited & ~(1 << last)
+        order.reverse()
+        if closed:
+            order.append(start)
+        return order
+
+    def solve_local_search(self, cost, start, end, closed):
+        """Nearest-neighbour construction improved by 2-opt and Or-opt moves"""
+        n = len(cost)
+        last = end if end is not None and not closed else None
+        if start is not None:
+            first = start
+        else:
+            first = min((i for i in range(n) if i != last),
+                        key=lambda i: min(cost[i][j] for j in range(n) if j != i))
+
+        order = [first]
+        remaining = set(range(n)) - {first}
+        if last is not None:
+            remaining.discard(last)
+        while remaining:
+            nxt = min(remaining, key=lambda j: cost[order[-1]][j])
+            order.append(nxt)
+            remaining.remove(nxt)
+        if last is not None:
+            order.append(last)
+        if closed:
+            order.append(first)
+
+        # Endpoints stay pinned when fixed (or closing the tour); otherwise only the start is kept
+        lo = 1 if start is not None or closed else 0
+        hi = len(order) - 1 if last is not None or closed else len(order)
+
+        improved = True
+        while improved:
+            improved = self.two_opt_pass(order, cost, lo, hi) or self.or_opt_pass(order, cost, lo, hi)
+        return order
+
+    def path_cost(self, order, cost):
+        """Cost of visiting the nodes in order"""
+        return sum(cost[order[i]][order[i + 1]] for i in range(len(order) - 1))
+
+    def two_opt_pass(self, order, cost, lo, hi):
+        """Reverse the first segment that shortens the route"""
+        current = self.path_cost(order, cost)
+        for i in range(lo, hi - 1):
+            for j in range(i + 2, hi + 1):
+                candidate = order[:i] + order[i:j][::-1] + order[j:]
+                candidate_cost = self.path_cost(candidate, cost)
+                if candidate_cost < current:
+                    order[:] = candidate
+                    return True
+        return False
+
+    def or_opt_pass(self, order, cost, lo, hi):
+        """Move the first 1-3 city segment whose relocation shortens the route"""
+        current = self.path_cost(order, cost)
+        for length in (1, 2, 3):
+            for i in range(lo, hi - length + 1):
+                segment = order[i:i + length]
+                rest = order[:i] + order[i + length:]
+                for k in range(lo, hi - length + 1):
+                    if k == i:
+                        continue
+                    candidate = rest[:k] + segment + rest[k:]
+                    candidate_cost = self.path_cost(candidate, cost)
+                    if candidate_cost < current:
+                        order[:] = candidate
+                        return True
+        return False
+
+
+def nearest_neighbour_two_opt(cost, start=0, end=None, closed=False):
+    """Nearest-neighbour tour improved by 2-opt, for symmetric costs such as geographic distance
+
+    The start is pinned; end pins the last city of an open tour and closed
+    returns to the start. Each 2-opt move is priced from the two edges it
+    replaces, so a pass is O(n^2) with no route re-summing.
+    """
+    n = len(cost)
+    order = [start]
+    remaining = set(range(n)) - {start, end}
+    while remaining:
+        row = cost[order[-1]]
+        nxt = min(remaining, key=row.__getitem__)
+        order.append(nxt)
+        remaining.remove(nxt)
+    if end is not None and end != start:
+        order.append(end)
+    if closed:
+        order.append(start)
+
+    size = len(order)
+    # With a free end the tail segment can be reversed too, which replaces a single edge
+    last = size if end is None and not closed else size - 1
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, last - 1):
+            a, b = order[i - 1], order[i]
+            cost_a, cost_ab = cost[a], cost[a][b]
+            for j in range(i + 1, last):
+                c = order[j]
+                if j + 1 < size:
+                    d = order[j + 1]
+                    delta = cost_a[c] + cost[b][d] - cost_ab - cost[c][d]
+                else:
+                    delta = cost_a[c] - cost_ab
+                if delta < -1e-9:
+                    order[i:j + 1] = order[j:i - 1:-1]
+                    b = order[i]
+                    cost_ab = cost_a[b]
+                    improved = True
+    return order
@@ -0,0 +1,195 @@
+"""
+T2India Multimodal Routing Engine
+Dijkstra shortest paths and Yen k-best paths over connectivity_matrix edges plus intermediate hub legs
+"""
+
+import heapq
+
+from t2india_connectivity_graph import MISSING
+
+CAB_PAISE_PER_KM = 1500  # Estimated cab fare where the hub table has no price
+TIME_WEIGHT = "time"
+COST_WEIGHT = "cost"
+BLEND_WEIGHT = "blend"
+
+
+def total_cost(costs):
+    """Sum of leg costs in paise, or None when any leg is unpriced"""
+    costs = list(costs)
+    return None if None in costs else sum(costs)
+
+
+class MultimodalRoutingEngine:
+    def __init__(self, graph, intermediate_hubs=None, weight=TIME_WEIGHT, minutes_per_rupee=0.01):
+        # minutes_per_rupee sets the blend trade-off: 0.01 makes ₹100 worth one minute
+        self.weight = weight
+        self.minutes_per_rupee = minutes_per_rupee
+        self.edges = {}  # city -> {neighbour: [leg records]}
+        self.tree_cache = {}  # (source, weight) -> (distances, previous)
+        self.path_cache = {}  # (origin, destination, weight) -> described path
+
+        self.add_graph_edges(graph)
+        self.add_hub_edges(intermediate_hubs or {})
+
+    def add_edge(self, from_city, to_city, record):
+        """Register a leg both ways; the data lists most connections in one direction only"""
+        for a, b in ((from_city, to_city), (to_city, from_city)):
+            self.edges.setdefault(a, {}).setdefault(b, []).append(record)
+            self.edges.setdefault(b, {})
+
+    def add_graph_edges(self, graph):
+        """Merge every mode of every connectivity graph edge"""
+        for (i, j), mode_ids in graph.pair_modes.items():
+            for m in mode_ids:
+                minutes = int(graph.minutes[m, i, j])
+                if minutes == MISSING:
+                    continue
+                cost_min = int(graph.cost_min_paise[m, i, j])
+                self.add_edge(graph.cities[i], graph.cities[j], {
+                    "mode": graph.modes[m],
+                    "minutes": minutes,
+                    "cost_min_paise": cost_min if cost_min != MISSING else None,
+                    "cost_max_paise": int(graph.cost_max_paise[m, i, j]) if cost_min != MISSING else None
+                })
+
+    def add_hub_edges(self, intermediate_hubs):
+        """Merge the cab/road legs between remote destinations and their airports"""
+        for city, hub_info in intermediate_hubs.items():
+            for hub, details in hub_info["nearest_airports"].items():
+                fare = details["distance_km"] * CAB_PAISE_PER_KM
+                self.add_edge(city, hub, {
+                    "mode": details["transport"],
+                    "minutes": details["travel_minutes"],
+                    "cost_min_paise": fare,
+                    "cost_max_paise": fare
+                })
+
+    def knows(self, city):
+        """Whether the city is a node of the unified graph"""
+        return city in self.edges
+
+    def leg_weight(self, record, weight):
+        """Edge weight of a single leg under the chosen weighting"""
+        if weight == TIME_WEIGHT:
+            return record["minutes"]
+        if record["cost_min_paise"] is None:
+            # Unpriced legs are never taken when cost counts, rather than being free
+            if weight in (COST_WEIGHT, BLEND_WEIGHT):
+                return float("inf")
+            raise ValueError(f"Unknown weight: {weight}")
+        cost_rupees = (record["cost_min_paise"] + record["cost_max_paise"]) / 200
+        if weight == COST_WEIGHT:
+            return cost_rupees
+        if weight == BLEND_WEIGHT:
+            return record["minutes"] + cost_rupees * self.minutes_per_rupee
+        raise ValueError(f"Unknown weight: {weight}")
+
+    def best_leg(self, from_city, to_city, weight):
+        """Cheapest mode between adjacent cities under the chosen weighting"""
+        return min(self.edges[from_city][to_city], key=lambda record: self.leg_weight(record, weight))
+
+    def shortest_path_tree(self, source, weight=None):
+        """Dijkstra tree from a source, cached so repeated origins are lookups"""
+        weight = weight or self.weight
+        key = (source, weight)
+        if key not in self.tree_cache:
+            self.tree_cache[key] = self.dijkstra(source, weight)
+        return self.tree_cache[key]
+
+    def dijkstra(self, source, weight, blocked_edges=frozenset(), blocked_nodes=frozenset()):
+        """Plain Dijkstra returning distance and predecessor maps"""
+        distances = {source: 0}
+        previous = {}
+        heap = [(0, source)]
+        while heap:
+            distance, city = heapq.heappop(heap)
+            if distance > distances.get(city, float("inf")):
+                continue
+            for neighbour in self.edges.get(city, {}):
+                if neighbour in blocked_nodes or (city, neighbour) in blocked_edges:
+                    continue
+                candidate = distance + self.leg_weight(self.best_leg(city, neighbour, weight), weight)
+                if candidate < distances.get(neighbour, float("inf")):
+                    distances[neighbour] = candidate
+                    previous[neighbour] = city
+                    heapq.heappush(heap, (candidate, neighbour))
+        return distances, previous
+
+    def shortest_path(self, origin, destination, weight=None):
+        """Best path between two cities, or None when they are not connected"""
+        weight = weight or self.weight
+        key = (origin, destination, weight)
+        if key in self.path_cache:
+            return self.path_cache[key]
+        if not self.knows(origin) or not self.knows(destination):
+            return None
+
+        distances, previous = self.shortest_path_tree(origin, weight)
+        described = None
+        if destination in distances:
+            path = [destination]
+            while path[-1] != origin:
+                path.append(previous[path[-1]])
+            path.reverse()
+            described = self.describe_path(path, weight)
+        self.path_cache[key] = described
+        return described
+
+    def k_shortest_paths(self, origin, destination, k=3, weight=None):
+        """Yen's algorithm: up to k loop-free paths in increasing weight"""
+        weight = weight or self.weight
+        first = self.shortest_path(origin, destination, weight)
+        if first is None:
+            return []
+
+        paths = [first]
+        candidates = []
+        seen = {tuple(first["path"])}
+        while len(paths) < k:
+            previous_path = paths[-1]["path"]
+            for spur_index in range(len(previous_path) - 1):
+                spur_city = previous_path[spur_index]
+                root = previous_path[:spur_index + 1]
+
+                blocked_edges = set()
+                for found in paths:
+                    if found["path"][:spur_index + 1] == root:
+                        blocked_edges.add((found["path"][spur_index], found["path"][spur_index + 1]))
+                blocked_nodes = frozenset(root[:-1])
+
+                distances, previous = self.dijkstra(spur_city, weight, blocked_edges, blocked_nodes)
+                if destination not in distances:
+                    continue
+                spur = [destination]
+                while spur[-1] != spur_city:
+                    spur.append(previous[spur[-1]])
+                candidate = root[:-1] + spur[::-1]
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    described = self.describe_path(candidate, weight)
+                    heapq.heappush(candidates, (described["weight"], len(seen), described))
+
+            if not candidates:
+                break
+            paths.append(heapq.heappop(candidates)[2])
+        return paths
+
+    def describe_path(self, path, weight):
+        """Expand a city path into per-leg records and totals"""
+        legs = []
+        for from_city, to_city in zip(path, path[1:]):
+            record = self.best_leg(from_city, to_city, weight)
+            legs.append(dict(record, **{"from": from_city, "to": to_city}))
+        return {
+            "path": path,
+            "legs": legs,
+            "minutes": sum(leg["minutes"] for leg in legs),
+            "cost_min_paise": total_cost(leg["cost_min_paise"] for leg in legs),
+            "cost_max_paise": total_cost(leg["cost_max_paise"] for leg in legs),
+            "weight": sum(self.leg_weight(leg, weight) for leg in legs)
+        }
+
+    def clear_cache(self):
+        """Drop cached shortest-path trees after connectivity data changes"""
+        self.tree_cache.clear()
+        self.path_cache.clear()